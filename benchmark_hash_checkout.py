@@ -0,0 +1,47 @@
+"""Benchmark hash_checkout against the non-streaming implementation it replaced.
+
+Hashes an input shaped like the gen.generate argument dict and build ids with both implementations,
+checking they agree.
+
+Usage: python benchmark_hash_checkout.py [repetitions]
+"""
+import random
+import string
+import sys
+import timeit
+
+import pkgpanda.util
+from pkgpanda.test_util import reference_hash_checkout
+
+
+def random_str(rand):
+    alphabet = string.ascii_letters + string.digits + string.punctuation + ' \n\u00b5\u2603'
+    return ''.join(rand.choice(alphabet) for _ in range(rand.randint(0, 20)))
+
+
+def main():
+    repetitions = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    rand = random.Random(0)
+    item = {
+        'arguments': {random_str(rand): random_str(rand) for _ in range(500)},
+        'build_ids': {
+            'package{}'.format(i): {
+                'sources': {'main': {'kind': 'url', 'url': random_str(rand), 'sha1': random_str(rand)}},
+                'requires': [random_str(rand) for _ in range(10)],
+            } for i in range(200)
+        },
+    }
+    assert pkgpanda.util.hash_checkout(item) == reference_hash_checkout(item)
+
+    def time(function):
+        # Best of a few runs, the machine's noise only ever adds time.
+        return min(timeit.repeat(lambda: function(item), number=repetitions, repeat=5))
+
+    reference_time = time(reference_hash_checkout)
+    streaming_time = time(pkgpanda.util.hash_checkout)
+    print('hash_checkout x {}: reference {:.4f}s, streaming {:.4f}s ({:.1f}x)'.format(
+        repetitions, reference_time, streaming_time, reference_time / streaming_time))
+
+
+if __name__ == '__main__':
+    main()
@@ -56,11 +56,21 @@ def do_configure(config_path=CONFIG_PATH):
 
 
 def generate_node_upgrade_script(installed_cluster_version, config_path=CONFIG_PATH):
+    """Returns error code
 
+    :param installed_cluster_version: version the nodes are upgrading from, or a comma separated
+        list of versions to generate a script for each of them from a single configuration generation
+    :type installed_cluster_version: string | None
+    """
     if installed_cluster_version is None:
         print('Must provide the version of the cluster upgrading from')
         return 1
 
+    installed_cluster_versions = [version for version in installed_cluster_version.split(',') if version]
+    if not installed_cluster_versions:
+        print('Must provide the version of the cluster upgrading from')
+        return 1
+
     config = Config(config_path)
     try:
         gen_out = config_util.onprem_generate(config)
@@ -77,7 +87,13 @@ def generate_node_upgrade_script(installed_cluster_version, config_path=CONFIG_P
     config_util.make_serve_dir(gen_out)
 
     # generate the upgrade script
-    upgrade.generate_node_upgrade_script(gen_out, installed_cluster_version)
+    if len(installed_cluster_versions) == 1:
+        return upgrade.generate_node_upgrade_script(gen_out, installed_cluster_versions[0])
+
+    upgrade_script_paths = upgrade.generate_node_upgrade_scripts(gen_out, installed_cluster_versions)
+    for version, upgrade_script_path in zip(installed_cluster_versions, upgrade_script_paths):
+        print("Node upgrade script URL for upgrading from {}: {}".format(
+            version, gen_out.arguments['bootstrap_url'] + upgrade_script_path + upgrade.UPGRADE_SCRIPT_NAME))
 
     return 0
 
@@ -1,22 +1,26 @@
+"""The installer CLI.
+
+Only what every mode needs is imported up front. Each mode imports what it uses when it runs, so
+the quick ones (--version, --hash-password) don't pay for importing gen, release and their
+dependencies (boto3, cryptography, ...). --profile-startup reports what got imported and how long
+it took.
+"""
 import argparse
 import json
 import logging
 import os
 import sys
 
-import coloredlogs
-from passlib.hash import sha512_crypt
-
-import dcos_installer.config
 import dcos_installer.constants
-import gen.calc
-from dcos_installer import backend
+from dcos_installer.exceptions import NoConfigError
 from dcos_installer.prettyprint import print_header
 
 log = logging.getLogger(__name__)
 
 
 def setup_logger(options):
+    import coloredlogs
+
     level = 'INFO'
     if options.verbose:
         level = 'DEBUG'
@@ -38,6 +42,8 @@ def setup_logger(options):
 
 
 def do_version(args):
+    import gen.calc
+
     print(json.dumps(
         {
             'version': gen.calc.entry['must']['dcos_version'],
@@ -46,6 +52,11 @@ def do_version(args):
     return 0
 
 
+def import_backend():
+    from dcos_installer import backend
+    return backend
+
+
 def web_installer(options):
     log.error('The DC/OS web installer (--web) has been removed.\n'
               'Please refer to the DC/OS Installation guide at https://docs.mesosphere.com/1.12/installing/')
@@ -59,11 +70,11 @@ dispatch_dict_simple = {
         'Starting DC/OS installer in web mode',
         'Run the web interface'),
     'genconf': (
-        lambda args: backend.do_configure(),
+        lambda args: import_backend().do_configure(),
         'EXECUTING CONFIGURATION GENERATION',
         'Create DC/OS install files customized according to {}.'.format(dcos_installer.constants.CONFIG_PATH)),
     'aws-cloudformation': (
-        lambda args: backend.do_aws_cf_configure(),
+        lambda args: import_backend().do_aws_cf_configure(),
         'EXECUTING AWS CLOUD FORMATION TEMPLATE GENERATION',
         'Generate AWS Advanced AWS CloudFormation templates using the provided config')
 }
@@ -80,6 +91,8 @@ def do_hash_password(password):
             else:
                 log.error('Must provide a non-empty password')
 
+    from passlib.hash import sha512_crypt
+
     print_header("HASHING PASSWORD TO SHA512")
     hashed_password = sha512_crypt.encrypt(password)
     return hashed_password
@@ -95,7 +108,7 @@ def dispatch(args):
         sys.exit(0)
 
     if args.action == 'generate-node-upgrade-script':
-        status = backend.generate_node_upgrade_script(args.installed_cluster_version)
+        status = import_backend().generate_node_upgrade_script(args.installed_cluster_version)
         sys.exit(status)
 
     if args.action in dispatch_dict_simple:
@@ -138,7 +151,8 @@ def get_argument_parser():
         metavar='installed_cluster_version',
         dest='installed_cluster_version',
         nargs='?',
-        help='Generate a script that upgrades DC/OS nodes running installed_cluster_version'
+        help='Generate a script that upgrades DC/OS nodes running installed_cluster_version. Give a comma '
+             'separated list of versions to generate a script for each of them at once'
     )
 
     parser.add_argument(
@@ -147,6 +161,11 @@ def get_argument_parser():
         action='store_true',
         help='Verbose log output (DEBUG).')
 
+    parser.add_argument(
+        '--profile-startup',
+        action='store_true',
+        help='Report how long each module imported by the selected mode took to import, to stderr.')
+
     parser.add_argument(
         '-p',
         '--port',
@@ -177,14 +196,24 @@ def main():
     if 'INSTALLER_ARGV0' in os.environ:
         sys.argv[0] = os.environ['INSTALLER_ARGV0']
     argument_parser = get_argument_parser()
+    options = argument_parser.parse_args()
+
+    import_timer = None
+    if options.profile_startup:
+        from dcos_installer.importtime import ImportTimer
+        import_timer = ImportTimer()
+        import_timer.install()
 
     try:
-        options = argument_parser.parse_args()
         setup_logger(options)
         dispatch(options)
-    except dcos_installer.config.NoConfigError as ex:
+    except NoConfigError as ex:
         print(ex)
         sys.exit(1)
+    finally:
+        if import_timer is not None:
+            import_timer.uninstall()
+            import_timer.report()
 
 
 if __name__ == '__main__':
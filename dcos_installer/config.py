@@ -5,6 +5,7 @@ import os.path
 import yaml
 
 import gen
+from dcos_installer.exceptions import NoConfigError
 from gen.build_deploy.bash import onprem_source
 from gen.exceptions import ValidationError
 from pkgpanda.util import load_yaml, write_string, YamlParseError
@@ -65,10 +66,6 @@ def make_default_config_if_needed(config_path):
     write_string(config_path, config_sample)
 
 
-class NoConfigError(Exception):
-    pass
-
-
 class Config():
 
     def __init__(self, config_path):
@@ -1,13 +1,14 @@
 import logging
 import os
-import subprocess
 import sys
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 
 import gen
 import gen.build_deploy.bash
 import pkgpanda
 from dcos_installer.constants import ARTIFACT_DIR, CLUSTER_PACKAGES_PATH, SERVE_DIR
-from pkgpanda.util import make_directory
+from pkgpanda.util import copy_file_fast, make_directory
 
 log = logging.getLogger(__name__)
 
@@ -46,6 +47,28 @@ def parent_dirs(filename):
         yield '/'.join(dirs)
 
 
+def existing_files(base_dir, filenames):
+    """The subset of filenames (Relative to base_dir) which exist, listing each directory once."""
+    listings = {}
+    existing = set()
+    for filename in filenames:
+        directory, _, name = filename.rpartition('/')
+        if directory not in listings:
+            try:
+                with os.scandir(base_dir + '/' + directory if directory else base_dir) as entries:
+                    listings[directory] = {entry.name for entry in entries}
+            except (FileNotFoundError, NotADirectoryError):
+                listings[directory] = set()
+        if name in listings[directory]:
+            existing.add(filename)
+    return existing
+
+
+# Number of files copied at once when staging artifacts. Copies which can't be hard linked or
+# reflinked are bound by the disk rather than Python so they overlap well on threads.
+copy_workers = 4
+
+
 def do_move_atomic(src_dir, dest_dir, filenames):
     assert os.path.exists(src_dir)
     assert os.path.exists(dest_dir)
@@ -53,18 +76,17 @@ def do_move_atomic(src_dir, dest_dir, filenames):
     created_dirs = []
     created_files = []
 
-    def mkdir(dirname):
-        created_dirs.append(dirname)
-        subprocess.check_output(['mkdir', dirname])
-
-    def copy(src, dest):
+    def copy(filename):
+        dest = dest_dir + '/' + filename
         created_files.append(dest)
-        subprocess.check_output(['cp', src, dest])
+        return copy_file_fast(src_dir + '/' + filename, dest)
 
     def rollback():
         for filename in reversed(created_files):
             try:
                 os.remove(filename)
+            except FileNotFoundError:
+                pass
             except OSError as ex:
                 log.error("Internal error removing temporary file. Might have corrupted file %s: %s",
                           filename, ex.strerror)
@@ -77,35 +99,52 @@ def do_move_atomic(src_dir, dest_dir, filenames):
 
         sys.exit(1)
 
+    # Every parent directory in one pass, parents before their children.
+    parents = sorted({parent_dir for filename in filenames for parent_dir in parent_dirs(filename)})
+
+    executor = ThreadPoolExecutor(max_workers=copy_workers)
+    futures = []
     try:
-        # Copy across
-        for filename in filenames:
-            for parent_dir in parent_dirs(filename):
-                dest_parent_dir = dest_dir + '/' + parent_dir
-                if not os.path.exists(dest_parent_dir):
-                    mkdir(dest_parent_dir)
-            copy(src_dir + '/' + filename, dest_dir + '/' + filename)
-    except subprocess.CalledProcessError as ex:
-        log.error("Copy failed: %s\nOutput:\n%s", ex.cmd, ex.output)
+        for parent_dir in parents:
+            dest_parent_dir = dest_dir + '/' + parent_dir
+            if not os.path.isdir(dest_parent_dir):
+                os.mkdir(dest_parent_dir)
+                created_dirs.append(dest_parent_dir)
+
+        # Copy across. The files are hard linked into place when possible, they're never modified.
+        futures = [executor.submit(copy, filename) for filename in filenames]
+        methods = Counter(future.result() for future in futures)
+        log.debug("Staged %s files into %s: %s", len(filenames), dest_dir, dict(methods))
+    except OSError as ex:
+        log.error("Copy failed: %s", ex)
         log.error("Removing partial artifacts")
+        _stop_copies(executor, futures)
         rollback()
     except KeyboardInterrupt:
         log.error("Copy out of installer interrupted. Removing partial files.")
+        _stop_copies(executor, futures)
         rollback()
+    finally:
+        executor.shutdown(wait=True)
+
+
+def _stop_copies(executor, futures):
+    # Let the copies in progress finish so nothing gets written after it's been rolled back.
+    for future in futures:
+        future.cancel()
+    executor.shutdown(wait=True)
 
 
 def fetch_artifacts(filenames, src_dir, dest_dir):
     # If all the dest files already exist, no-op
-    dest_files = [dest_dir + '/' + filename for filename in filenames]
-    if all(map(os.path.exists, dest_files)):
+    if len(existing_files(dest_dir, filenames)) == len(set(filenames)):
         return
 
     # Make sure the source files exist
-    src_files = [src_dir + '/' + filename for filename in filenames]
-    for filename in src_files:
-        if not os.path.exists(filename):
-            log.error("Internal Error: %s not found. Should have been in the installer container.", filename)
-            raise FileNotFoundError(filename)
+    for filename in sorted(set(filenames) - existing_files(src_dir, filenames)):
+        filename = src_dir + '/' + filename
+        log.error("Internal Error: %s not found. Should have been in the installer container.", filename)
+        raise FileNotFoundError(filename)
 
     make_directory(dest_dir)
     do_move_atomic(src_dir, dest_dir, filenames)
@@ -0,0 +1,75 @@
+"""Import time profiling for the installer's --profile-startup.
+
+Times each module imported while an ImportTimer is installed and reports them in the format of
+python -X importtime (Which needs Python 3.7+). Imports are timed by wrapping builtins.__import__,
+so an import statement which imports several modules (A package and its submodule, or the
+submodules in a from import) is reported as one entry naming each of them.
+"""
+
+import builtins
+import importlib.util
+import sys
+import threading
+import time
+
+
+class ImportTimer():
+    """Records how long the imports made on the installing thread take."""
+
+    def __init__(self):
+        # (depth, name, self seconds, cumulative seconds) in the order the imports finished.
+        self.records = []
+        self.__import = None
+        self.__thread = None
+        # Cumulative seconds of the finished imports nested in each import in progress.
+        self.__nested = [0]
+        self.__recorded = set()
+
+    def install(self):
+        assert self.__import is None
+        self.__import = builtins.__import__
+        self.__thread = threading.get_ident()
+        builtins.__import__ = self.__timed_import
+
+    def uninstall(self):
+        builtins.__import__ = self.__import
+        self.__import = None
+
+    def __new_modules(self, name, globals, fromlist, level):
+        if level:
+            name = importlib.util.resolve_name('.' * level + name, (globals or {}).get('__package__'))
+        parts = name.split('.')
+        names = ['.'.join(parts[:i]) for i in range(1, len(parts) + 1)]
+        names += [name + '.' + item for item in fromlist or () if item != '*']
+        return [name for name in names if name not in sys.modules]
+
+    def __timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        if threading.get_ident() != self.__thread:
+            return self.__import(name, globals, locals, fromlist, level)
+        new_modules = self.__new_modules(name, globals, fromlist, level)
+        if not new_modules:
+            return self.__import(name, globals, locals, fromlist, level)
+
+        depth = len(self.__nested) - 1
+        self.__nested.append(0)
+        start = time.perf_counter()
+        try:
+            return self.__import(name, globals, locals, fromlist, level)
+        finally:
+            cumulative = time.perf_counter() - start
+            nested = self.__nested.pop()
+            self.__nested[-1] += cumulative
+            # Modules imported by nested imports were reported by them.
+            imported = [name for name in new_modules if name in sys.modules and name not in self.__recorded]
+            self.__recorded.update(imported)
+            if imported:
+                self.records.append((depth, ', '.join(imported), cumulative - nested, cumulative))
+
+    def report(self, file=None):
+        file = file if file is not None else sys.stderr
+        print('import time: self [us] | cumulative | imported package', file=file)
+        for depth, name, self_seconds, cumulative in self.records:
+            print('import time: {:>9} | {:>10} | {}{}'.format(
+                int(self_seconds * 1e6), int(cumulative * 1e6), '  ' * depth, name), file=file)
+        total = sum(cumulative for depth, _, _, cumulative in self.records if depth == 0)
+        print('import time: {:.1f} ms importing {} modules'.format(total * 1000, len(self.records)), file=file)
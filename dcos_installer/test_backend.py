@@ -45,8 +45,19 @@ master_list: ['10.0.0.1', '10.0.0.2', '10.0.0.5']
     create_fake_build_artifacts(tmpdir)
 
     output = subprocess.check_output(['dcos_installer', '--generate-node-upgrade-script', 'fake'], cwd=str(tmpdir))
-    assert output.decode('utf-8').splitlines()[-1].split("Node upgrade script URL: ", 1)[1]\
-                                                  .endswith("dcos_node_upgrade.sh")
+    url = output.decode('utf-8').splitlines()[-1].split("Node upgrade script URL: ", 1)[1]
+    assert url.endswith("dcos_node_upgrade.sh")
+
+    # The script for an installed version and config is reused, and several versions can be generated at once.
+    output = subprocess.check_output(
+        ['dcos_installer', '--generate-node-upgrade-script', 'fake,other'], cwd=str(tmpdir))
+    lines = output.decode('utf-8').splitlines()[-2:]
+    assert lines[0] == "Node upgrade script URL for upgrading from fake: " + url
+    other_url = lines[1].split("Node upgrade script URL for upgrading from other: ", 1)[1]
+    assert other_url.endswith("dcos_node_upgrade.sh")
+    assert other_url != url
+    script_path = other_url.split('file:///opt/dcos_install_tmp', 1)[1]
+    assert 'Upgrading DC/OS $role_name other -> ' in tmpdir.join('genconf/serve' + script_path).read()
 
     try:
         subprocess.check_output(['dcos_installer', '--generate-node-upgrade-script'], cwd=str(tmpdir))
@@ -86,6 +97,29 @@ def test_do_validate_config(tmpdir, monkeypatch):
         assert Config(config_path='genconf/config.yaml').do_validate() == expected_output
 
 
+def test_do_validate_config_reads_files(tmpdir, monkeypatch):
+    monkeypatch.setenv('BOOTSTRAP_VARIANT', 'test_variant')
+    create_fake_build_artifacts(tmpdir)
+    ip_detect = tmpdir.join('genconf/ip-detect')
+    ip_detect.write('#!/bin/bash\necho 127.0.0.1', ensure=True)
+    config = {
+        'cluster_name': 'DC/OS',
+        'master_discovery': 'static',
+        'exhibitor_storage_backend': 'static',
+        'resolvers': ['8.8.8.8'],
+        'bootstrap_url': 'file:///opt/dcos_install_tmp',
+        'master_list': ['10.0.0.1'],
+    }
+
+    with tmpdir.as_cwd():
+        assert to_config(config).do_validate() == {}
+
+        # Validating again sees the files as they are now, not as they were the last time.
+        ip_detect.remove()
+        assert to_config(dict(config, master_list=['10.0.0.2'])).do_validate() == {
+            'ip_detect_contents': 'ip-detect script `genconf/ip-detect` must exist'}
+
+
 def test_get_config(tmpdir):
     workspace = tmpdir.strpath
     temp_config_path = workspace + '/config.yaml'
@@ -1,3 +1,8 @@
+import json
+import os
+import subprocess
+import sys
+
 import pytest
 
 import gen
@@ -41,6 +46,55 @@ def test_set_arg_parser():
         parse_args(['--validate', '--hash-password', 'foo'])
 
 
+# Importing gen for the version is as much as --version should ever need, never the backend
+# (boto3, release, ...).
+def test_version_startup():
+    result = subprocess.run(
+        [sys.executable, '-m', 'dcos_installer.cli', '--version', '--profile-startup'],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        env=dict(os.environ, BOOTSTRAP_VARIANT='some-variant'),
+        check=True)
+    assert json.loads(result.stdout.decode())['variant'] == 'some-variant'
+
+    report = result.stderr.decode().splitlines()
+    imported = {
+        name.strip().split('.')[0]
+        for line in report[1:-1]
+        for name in line.rsplit('|', 1)[1].split(',')}
+    assert 'gen' in imported
+    assert not imported & {'boto3', 'botocore', 'cryptography', 'passlib', 'release', 'requests'}, \
+        '\n'.join(report)
+
+
+# Startup time is mostly spent importing, so the number of modules --version imports on top of what
+# the interpreter starts with is kept under a ceiling (It imported 208 when this was recorded; the
+# backend takes it to 393). Only raise it for imports --version really needs.
+version_module_ceiling = 240
+
+
+def loaded_modules(*code):
+    """The modules loaded once the python code has run (Even if it exits)."""
+    result = subprocess.run(
+        [sys.executable, '-c', '\n'.join((
+            'import atexit, json, sys',
+            'atexit.register(lambda: sys.stderr.write("\\n" + json.dumps(sorted(sys.modules))))') + code)],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        env=dict(os.environ, BOOTSTRAP_VARIANT='some-variant'))
+    return set(json.loads(result.stderr.decode().rsplit('\n', 1)[1]))
+
+
+def test_version_module_count():
+    baseline = loaded_modules()
+    version = loaded_modules(
+        'import runpy',
+        'sys.argv = ["dcos_installer", "--version"]',
+        'runpy.run_module("dcos_installer.cli", run_name="__main__")')
+    assert 'gen' in version
+    assert len(version - baseline) <= version_module_ceiling, sorted(version - baseline)
+
+
 def test_stringify_config():
     stringify = gen.stringify_configuration
 
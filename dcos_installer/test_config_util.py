@@ -0,0 +1,58 @@
+import os
+
+import pytest
+
+import pkgpanda.util
+from dcos_installer import config_util
+
+
+filenames = [
+    'bootstrap/12345.bootstrap.tar.xz',
+    'bootstrap/12345.active.json',
+    'packages/a/a--1.tar.xz',
+    'packages/b/b--1.tar.xz',
+]
+
+
+def make_artifacts(tmpdir):
+    for filename in filenames:
+        tmpdir.join('artifacts', filename).write(filename, ensure=True)
+    tmpdir.join('serve').ensure(dir=True)
+    return str(tmpdir.join('artifacts')), str(tmpdir.join('serve'))
+
+
+def test_existing_files(tmpdir):
+    src_dir, dest_dir = make_artifacts(tmpdir)
+    assert config_util.existing_files(src_dir, filenames + ['missing/file', 'bootstrap/missing']) == set(filenames)
+    assert config_util.existing_files(dest_dir, filenames) == set()
+
+
+def test_fetch_artifacts(tmpdir):
+    src_dir, dest_dir = make_artifacts(tmpdir)
+    tmpdir.join('serve/packages/a').ensure(dir=True)
+
+    config_util.fetch_artifacts(filenames, src_dir, dest_dir)
+    for filename in filenames:
+        assert tmpdir.join('serve', filename).read() == filename
+
+    with pytest.raises(FileNotFoundError):
+        config_util.fetch_artifacts(filenames + ['packages/c/c--1.tar.xz'], src_dir, dest_dir)
+
+
+def test_do_move_atomic_rollback(tmpdir, monkeypatch):
+    src_dir, dest_dir = make_artifacts(tmpdir)
+    tmpdir.join('serve/packages').ensure(dir=True)
+    copy_file_fast = pkgpanda.util.copy_file_fast
+
+    def failing_copy(source_path, destination_path):
+        if destination_path.endswith('b--1.tar.xz'):
+            raise OSError('No space left on device')
+        return copy_file_fast(source_path, destination_path)
+
+    monkeypatch.setattr(config_util, 'copy_file_fast', failing_copy)
+    with pytest.raises(SystemExit):
+        config_util.do_move_atomic(src_dir, dest_dir, filenames)
+
+    # Everything staged is removed again, but not the directories which were already there.
+    assert os.listdir(dest_dir) == ['packages']
+    assert os.listdir(dest_dir + '/packages') == []
@@ -2,13 +2,23 @@
 Generating node upgrade script
 """
 
+import logging
+import os
 import uuid
 
 import gen.build_deploy.util as util
 import gen.calc
 import gen.template
 from dcos_installer.constants import SERVE_DIR
-from pkgpanda.util import make_directory, write_string
+from pkgpanda.util import load_json, make_directory, write_json, write_string
+
+log = logging.getLogger(__name__)
+
+UPGRADE_SCRIPT_NAME = '/dcos_node_upgrade.sh'
+
+# Maps config ID -> installed cluster version -> the path (Relative to the serve directory) of the
+# directory holding the upgrade script for it.
+UPGRADE_SCRIPT_INDEX = '/upgrade/index.json'
 
 
 node_upgrade_template = r"""#!/bin/bash
@@ -159,7 +169,19 @@ fi
 """
 
 
-def generate_node_upgrade_script(gen_out, installed_cluster_version, serve_dir=SERVE_DIR):
+def load_upgrade_script_index(serve_dir):
+    try:
+        return load_json(serve_dir + UPGRADE_SCRIPT_INDEX)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def generate_node_upgrade_scripts(gen_out, installed_cluster_versions, serve_dir=SERVE_DIR):
+    """Upgrade script paths (Relative to serve_dir) for each of installed_cluster_versions.
+
+    Scripts are reused from earlier runs for the same installed cluster version and config ID (The
+    config ID covers everything the script is rendered from), otherwise they're rendered and written
+    to a new path, which gets recorded in the index for next time."""
 
     # installed_cluster_version: Current installed version on the cluster
     # installer_version: Version we are upgrading to
@@ -170,20 +192,48 @@ def generate_node_upgrade_script(gen_out, installed_cluster_version, serve_dir=S
 
     package_list = ' '.join(package['id'] for package in gen_out.cluster_packages.values())
 
-    bash_script = gen.template.parse_str(node_upgrade_template).render({
-        'dcos_image_commit': util.dcos_image_commit,
-        'generation_date': util.template_generation_date,
-        'bootstrap_url': bootstrap_url,
-        'cluster_packages': package_list,
-        'installed_cluster_version': installed_cluster_version,
-        'installer_version': installer_version})
+    index = load_upgrade_script_index(serve_dir)
+    config_scripts = index.setdefault(gen_out.config_id, {})
+
+    template = None
+    upgrade_script_paths = []
+    for installed_cluster_version in installed_cluster_versions:
+        upgrade_script_path = config_scripts.get(installed_cluster_version)
+        if upgrade_script_path is not None and os.path.exists(serve_dir + upgrade_script_path + UPGRADE_SCRIPT_NAME):
+            log.debug("Reusing node upgrade script for %s: %s", installed_cluster_version, upgrade_script_path)
+            upgrade_script_paths.append(upgrade_script_path)
+            continue
+
+        if template is None:
+            template = gen.template.parse_str(node_upgrade_template)
 
-    upgrade_script_path = '/upgrade/' + uuid.uuid4().hex
+        bash_script = template.render({
+            'dcos_image_commit': util.dcos_image_commit,
+            'generation_date': util.template_generation_date,
+            'bootstrap_url': bootstrap_url,
+            'cluster_packages': package_list,
+            'installed_cluster_version': installed_cluster_version,
+            'installer_version': installer_version})
 
-    make_directory(serve_dir + upgrade_script_path)
+        upgrade_script_path = '/upgrade/' + uuid.uuid4().hex
 
-    write_string(serve_dir + upgrade_script_path + '/dcos_node_upgrade.sh', bash_script)
+        make_directory(serve_dir + upgrade_script_path)
+
+        write_string(serve_dir + upgrade_script_path + UPGRADE_SCRIPT_NAME, bash_script)
+
+        config_scripts[installed_cluster_version] = upgrade_script_path
+        upgrade_script_paths.append(upgrade_script_path)
+
+    make_directory(serve_dir + '/upgrade')
+    write_json(serve_dir + UPGRADE_SCRIPT_INDEX, index)
+
+    return upgrade_script_paths
+
+
+def generate_node_upgrade_script(gen_out, installed_cluster_version, serve_dir=SERVE_DIR):
+    bootstrap_url = gen_out.arguments['bootstrap_url']
+    upgrade_script_path, = generate_node_upgrade_scripts(gen_out, [installed_cluster_version], serve_dir)
 
-    print("Node upgrade script URL: " + bootstrap_url + upgrade_script_path + '/dcos_node_upgrade.sh')
+    print("Node upgrade script URL: " + bootstrap_url + upgrade_script_path + UPGRADE_SCRIPT_NAME)
 
     return 0
@@ -43,11 +43,15 @@ from pkgpanda.util import (
     json_prettyprint,
     load_string,
     split_by_token,
+    write_files,
     write_json,
     write_string,
     write_yaml,
 )
 
+# Templates every configuration is generated from.
+default_template_filenames = [dcos_config_yaml, cloud_config_yaml, 'dcos-metadata.yaml', dcos_services_yaml]
+
 # List of all roles all templates should have.
 role_names = {"master", "slave", "slave_public"}
 
@@ -222,6 +226,14 @@ def merge_dictionaries(base, additions):
     return base_copy
 
 
+def load_gen_extra_template(template_name):
+    """The template overriding / adding to template_name in gen_extra, if there is one."""
+    extra_filename = "gen_extra/" + template_name
+    if os.path.exists(extra_filename):
+        return gen.template.parse_str(load_string(extra_filename))
+    return None
+
+
 def load_templates(template_dict):
     result = dict()
     for name, template_list in template_dict.items():
@@ -229,10 +241,9 @@ def load_templates(template_dict):
         for template_name in template_list:
             result_list.append(gen.template.parse_resources(template_name))
 
-            extra_filename = "gen_extra/" + template_name
-            if os.path.exists(extra_filename):
-                result_list.append(gen.template.parse_str(
-                    load_string(extra_filename)))
+            extra_template = load_gen_extra_template(template_name)
+            if extra_template is not None:
+                result_list.append(extra_template)
         result[name] = result_list
     return result
 
@@ -273,14 +284,27 @@ def target_from_templates(template_dict):
     # since we never want to target just one template at a time for now (they
     # all merge into one config package).
     target = gen.internals.Target()
-    templates = load_templates(template_dict)
-    for template_list in templates.values():
-        for template in template_list:
-            target += template.target_from_ast()
+    for template_list in template_dict.values():
+        for template_name in template_list:
+            target += gen.template.resource_target(template_name)
+
+            extra_template = load_gen_extra_template(template_name)
+            if extra_template is not None:
+                target += extra_template.target_from_ast()
 
     return [target]
 
 
+def write_template_bundle(path, extra_templates=list()):
+    """Write a gen.template.TemplateBundle of the templates generate() uses (Plus extra_templates) to path.
+
+    For installers to ship, where the templates never change."""
+    bundle = gen.template.TemplateBundle()
+    for template_name in default_template_filenames + extra_templates:
+        bundle.add(template_name)
+    bundle.write(path)
+
+
 def write_to_non_taken(base_filename, json):
     number = 0
 
@@ -294,41 +318,54 @@ def write_to_non_taken(base_filename, json):
     return filename
 
 
+def gen_package_files(config):
+    """The files of the dcos-config style package described by config, for make_tar_from_files()."""
+    # Version will be setup-{sha1 of contents}
+    # Only contains package, root
+    assert config.keys() == {"package"}
+
+    files = dict()
+    for file_info in config["package"]:
+        assert file_info.keys() <= {"path", "content", "permissions"}
+        path = file_info['path']
+        if is_absolute_path(path):
+            _, path = os.path.splitdrive(path)
+
+        # Match what writing the content out in text mode would produce.
+        content = (file_info['content'] or '').replace('\n', os.linesep).encode()
+
+        # the file has special mode defined, handle that.
+        if 'permissions' in file_info:
+            assert isinstance(file_info['permissions'], str)
+            mode = int(file_info['permissions'], 8)
+        else:
+            mode = 0o644
+
+        files[path.replace(os.sep, '/')] = (content, mode)
+
+    return files
+
+
 def do_gen_package(config, package_filename):
     # Generate the specific dcos-config package.
-    # Version will be setup-{sha1 of contents}
-    with gen.util.pkgpanda_package_tmpdir() as tmpdir:
-        # Only contains package, root
-        assert config.keys() == {"package"}
-
-        # Write out the individual files
-        for file_info in config["package"]:
-            assert file_info.keys() <= {"path", "content", "permissions"}
-            if is_absolute_path(file_info['path']):
-                fileinfo_drive, fileinfo_path = os.path.splitdrive(file_info['path'])
-                path = tmpdir + fileinfo_path
-            else:
-                path = tmpdir + '/' + file_info['path']
-            try:
-                if os.path.dirname(path):
-                    os.makedirs(os.path.dirname(path), mode=0o755)
-            except FileExistsError:
-                pass
-
-            with open(path, 'w') as f:
-                f.write(file_info['content'] or '')
-
-            # the file has special mode defined, handle that.
-            if 'permissions' in file_info:
-                assert isinstance(file_info['permissions'], str)
-                os.chmod(path, int(file_info['permissions'], 8))
-            else:
-                os.chmod(path, 0o644)
+    gen.util.make_pkgpanda_package_from_files(gen_package_files(config), package_filename)
+
+
+def write_gen_package(config, target):
+    """Write the package do_gen_package() builds from config straight into the directory target.
 
-        gen.util.make_pkgpanda_package(tmpdir, package_filename)
+    target ends up the same as extracting the package into it."""
+    write_files(target, gen_package_files(config), dir_mode=0o755)
 
 
-def render_late_content(content, late_values):
+def render_late_content(content, late_values, placeholders=None):
+    """Replace the late bind placeholders in content with their late_values.
+
+    If placeholders (as produced by index_late_placeholders()) is given, the
+    content is spliced at those offsets rather than scanned for placeholders.
+    """
+    if placeholders is not None:
+        return _splice_late_content(content, late_values, placeholders)
 
     def _dereference_placeholders(parts):
         for part, is_placeholder in parts:
@@ -348,14 +385,69 @@ def render_late_content(content, late_values):
     )))
 
 
+def _splice_late_content(content, late_values, placeholders):
+    parts = []
+    consumed = 0
+    for start, end, name in placeholders:
+        # Cheap sanity check that the index matches the content it was built for.
+        if start < consumed or content[start:end] != gen.internals.LATE_BIND_PLACEHOLDER.format(name):
+            raise Exception('Bad late config file: placeholder index does not match content at {}'.format(start))
+        if name not in late_values:
+            log.debug('Found placeholder for unknown value "{}" in late config: {}'.format(name, repr(content)))
+            raise Exception('Bad late config file: Found placeholder for unknown value "{}"'.format(name))
+        parts.append(content[consumed:start])
+        parts.append(late_values[name])
+        consumed = end
+    parts.append(content[consumed:])
+    return ''.join(parts)
+
+
 def _late_bind_placeholder_in(string_):
     return gen.internals.LATE_BIND_PLACEHOLDER_START in string_ or gen.internals.LATE_BIND_PLACEHOLDER_END in string_
 
 
+def index_late_placeholders(files):
+    """Return the offsets of the late bind placeholders in the content of each file.
+
+    The result maps file paths to a list of [start, end, name] entries, one per
+    placeholder, in the order they appear in the content. Files without
+    content are omitted.
+    """
+    prefix = gen.internals.LATE_BIND_PLACEHOLDER_START
+    suffix = gen.internals.LATE_BIND_PLACEHOLDER_END
+    index = dict()
+    for file_info in files:
+        if not file_info.get('content'):
+            continue
+
+        placeholders = []
+        offset = 0
+        for part, is_placeholder in split_by_token(prefix, suffix, file_info['content']):
+            if is_placeholder:
+                placeholders.append([offset, offset + len(part), part[len(prefix):-len(suffix)]])
+            offset += len(part)
+        index[file_info['path']] = placeholders
+    return index
+
+
 def resolve_late_package(config, late_values):
+    """Render the late package config using late_values.
+
+    If the late package config has a 'placeholders' index (added by generate()
+    since the placeholder offsets are known at generation time) it is used to
+    render each file's content without scanning it for placeholders.
+    """
+    placeholders = config.get('placeholders', dict())
+
+    def render_file(file_info):
+        resolved_file_info = dict(file_info)
+        resolved_file_info['content'] = render_late_content(
+            file_info['content'], late_values, placeholders.get(file_info['path']))
+        return resolved_file_info
+
     resolved_config = {
         'package': [
-            {k: render_late_content(v, late_values) if k == 'content' else v for k, v in file_info.items()}
+            render_file(file_info) if 'content' in file_info else dict(file_info)
             for file_info in config['package']
         ]
     }
@@ -423,9 +515,11 @@ def validate_all_arguments_match_parameters(parameters, setters, arguments):
 def validate(
         arguments,
         extra_templates=list(),
-        extra_sources=list()):
+        extra_sources=list(),
+        executor=None,
+        profiler=None):
     sources, targets, _ = get_dcosconfig_source_target_and_templates(arguments, extra_templates, extra_sources)
-    return gen.internals.resolve_configuration(sources, targets).status_dict
+    return gen.internals.resolve_configuration(sources, targets, executor, profiler=profiler).status_dict
 
 
 def user_arguments_to_source(user_arguments) -> gen.internals.Source:
@@ -453,7 +547,7 @@ def get_dcosconfig_source_target_and_templates(
     # TODO(cmaloney): Make these all just defined by the base calc.py
     config_package_names = ['dcos-config', 'dcos-metadata']
 
-    template_filenames = [dcos_config_yaml, cloud_config_yaml, 'dcos-metadata.yaml', dcos_services_yaml]
+    template_filenames = list(default_template_filenames)
 
     # TODO(cmaloney): Check there are no duplicates between templates and extra_template_files
     template_filenames += extra_templates
@@ -529,13 +623,14 @@ def build_late_package(late_files, config_id, provider):
 
     return {
         'package': late_files,
-        'name': 'dcos-provider-{}-{}--setup'.format(config_id, provider)
+        'name': 'dcos-provider-{}-{}--setup'.format(config_id, provider),
+        'placeholders': index_late_placeholders(late_files),
     }
 
 
-def validate_and_raise(sources, targets):
+def validate_and_raise(sources, targets, partial=None, executor=None):
     # TODO(cmaloney): Make it so we only get out the dcosconfig target arguments not all the config target arguments.
-    resolver = gen.internals.resolve_configuration(sources, targets)
+    resolver = gen.internals.resolve_configuration(sources, targets, executor, partial=partial)
     status = resolver.status_dict
 
     if status['status'] == 'errors':
@@ -609,11 +704,29 @@ def get_config_id(argument_dict: dict):
     })
 
 
+def resolve_partial(
+        arguments,
+        extra_templates=list(),
+        extra_sources=list(),
+        extra_targets=list(),
+        varying=frozenset()) -> gen.internals.PartialResolution:
+    """Resolve what generate() calls with these arguments share, for passing to them as partial.
+
+    The generate() calls may only differ in sources which set the varying names, and in adding
+    templates to extra_templates (Which should be the templates they all have in common)."""
+    sources, targets, templates = get_dcosconfig_source_target_and_templates(arguments, extra_templates, extra_sources)
+
+    # The builtin template_filenames includes the extra_templates.
+    return gen.internals.PartialResolution(sources, targets + extra_targets, set(varying) | {'template_filenames'})
+
+
 def generate(
         arguments,
         extra_templates=list(),
         extra_sources=list(),
-        extra_targets=list()):
+        extra_targets=list(),
+        partial=None,
+        executor=None):
     # To maintain the old API where we passed arguments rather than the new name.
     user_arguments = arguments
     arguments = None
@@ -621,7 +734,7 @@ def generate(
     sources, targets, templates = get_dcosconfig_source_target_and_templates(
         user_arguments, extra_templates, extra_sources)
 
-    resolver = validate_and_raise(sources, targets + extra_targets)
+    resolver = validate_and_raise(sources, targets + extra_targets, partial, executor)
     argument_dict = get_final_arguments(resolver)
     late_variables = get_late_variables(resolver, sources)
     secret_builtins = ['expanded_config_full', 'user_arguments_full', 'config_yaml_full']
@@ -723,7 +836,10 @@ def generate(
         late_package_id = PackageId(late_package['name'])
         late_package_filename = make_package_filename(late_package_id, '.dcos_config')
         os.makedirs(os.path.dirname(late_package_filename), mode=0o755, exist_ok=True)
-        write_yaml(late_package_filename, {'package': late_package['package']}, default_flow_style=False)
+        write_yaml(
+            late_package_filename,
+            {'package': late_package['package'], 'placeholders': late_package['placeholders']},
+            default_flow_style=False)
         log.info('Package filename: {}'.format(late_package_filename))
         stable_artifacts.append(late_package_filename)
 
@@ -796,6 +912,7 @@ def generate(
 
     return Bunch({
         'arguments': argument_dict,
+        'config_id': config_id,
         'cluster_packages': cluster_package_info,
         'stable_artifacts': stable_artifacts,
         'channel_artifacts': channel_artifacts,
@@ -1,7 +1,9 @@
 """AWS Image Creation, Management, Testing"""
 
 import json
+from contextlib import contextmanager
 from copy import deepcopy
+from itertools import chain
 from typing import Tuple
 
 import boto3
@@ -282,40 +284,54 @@ def gen_ami_mapping(mappings):
     return json.dumps(final, indent=4, sort_keys=True)
 
 
-def transform(line):
+def cloud_config_join_elements(cloud_config):
+    """Yield the elements of an Fn::Join (With the empty string) which builds cloud_config.
 
-    def _jsonify_literals(parts):
-        for part, is_ref in parts:
-            if is_ref:
-                yield part
-            else:
-                yield json.dumps(part)
+    cloud_config is text with CloudFormation functions (`{ "Ref" : "AWS::Region" }`) embedded in it.
+    Each line becomes its literal text and functions followed by a newline, in one pass over the
+    text."""
+    line_empty = True
+    for part, is_function in split_by_token('{ ', ' }', cloud_config):
+        if is_function:
+            yield json.loads(part)
+            line_empty = False
+            continue
 
-    return ', '.join(_jsonify_literals(split_by_token('{ ', ' }', line))) + ', "\\n",\n'
+        *lines, rest = part.split('\n')
+        for line in lines:
+            if line or line_empty:
+                yield line
+            yield '\n'
+            line_empty = True
+        if rest:
+            yield rest
+            line_empty = False
 
+    if not line_empty:
+        yield '\n'
 
-def render_cloudformation_transform(cf_template, transform_func=lambda x: x, **kwds):
-    # TODO(cmaloney): There has to be a cleaner way to do this transformation.
-    # For now just moved from cloud_config_cf.py
-    # TODO(cmaloney): Move with the logic that does this same thing in Azure
-
-    template_str = gen.template.parse_str(cf_template).render(
-        {k: transform_func(v) for k, v in kwds.items()}
-    )
-
-    template_json = json.loads(template_str)
 
+def _add_cloudformation_metadata(template_json):
     template_json['Metadata']['DcosImageCommit'] = util.dcos_image_commit
     template_json['Metadata']['TemplateGenerationDate'] = util.template_generation_date
 
     return json.dumps(template_json)
 
 
-def render_cloudformation(cf_template, **kwds):
-    def transform_lines(text):
-        return ''.join(map(transform, text.splitlines())).rstrip(',\n')
+def render_cloudformation_transform(cf_template, transform_func=lambda x: x, **kwds):
+    template_str = gen.template.parse_str(cf_template).render(
+        {k: transform_func(v) for k, v in kwds.items()}
+    )
 
-    return render_cloudformation_transform(cf_template, transform_func=transform_lines, **kwds)
+    return _add_cloudformation_metadata(json.loads(template_str))
+
+
+def render_cloudformation(cf_template, **kwds):
+    """Render cf_template, placing the Fn::Join elements of each cloud config in kwds into the list
+    it's templated in."""
+    return _add_cloudformation_metadata(util.render_json_template(
+        cf_template,
+        spliced={k: list(cloud_config_join_elements(v)) for k, v in kwds.items()}))
 
 
 @retry(stop_max_attempt_number=5, wait_exponential_multiplier=1000)
@@ -360,6 +376,44 @@ def gen_supporting_template():
             cloudformation)
 
 
+# Names the sources of the advanced templates set differently for each node type / os_type / num_masters.
+advanced_varying = set(chain.from_iterable(source.setters.keys() for _, source in groups.values())) | {
+    'os_type', 'region_to_ami_mapping', 'num_masters', 'nat_ami_mapping'}
+
+# Partial resolutions shared by all the advanced templates of one set of variant arguments, by
+# json.dumps(variant_args, sort_keys=True), while advanced_partials() is making them. Calculated before
+# forking template workers (See gen.build_deploy.util.generate_artifacts) so they're inherited rather
+# than each recalculating it.
+_advanced_partials = {}
+
+
+@contextmanager
+def advanced_partials(variant_arguments):
+    """Share the partial resolution of each of variant_arguments between the advanced templates made in the block."""
+    keys = []
+    for variant_args in variant_arguments:
+        key = json.dumps(variant_args, sort_keys=True)
+        if key in _advanced_partials:
+            continue
+        _advanced_partials[key] = gen.resolve_partial(
+            variant_args,
+            extra_templates=['aws/dcos-config.yaml'],
+            extra_sources=[aws_base_source],
+            extra_targets=[gen.internals.Target(variables={'cloudformation_s3_url_full'})],
+            varying=advanced_varying)
+        keys.append(key)
+    try:
+        yield
+    finally:
+        for key in keys:
+            del _advanced_partials[key]
+
+
+def get_advanced_partial(variant_args):
+    """The partial resolution of variant_args, if there is one (See advanced_partials())."""
+    return _advanced_partials.get(json.dumps(variant_args, sort_keys=True))
+
+
 def make_advanced_bundle(variant_args, extra_sources, template_name, cc_params):
     extra_templates = [
         'aws/dcos-config.yaml',
@@ -380,7 +434,8 @@ def make_advanced_bundle(variant_args, extra_sources, template_name, cc_params):
         extra_templates=extra_templates,
         extra_sources=extra_sources + [aws_base_source],
         # TODO(cmaloney): Merge this with dcos_installer/backend.py::get_aws_advanced_target()
-        extra_targets=[gen.internals.Target(variables={'cloudformation_s3_url_full'})])
+        extra_targets=[gen.internals.Target(variables={'cloudformation_s3_url_full'})],
+        partial=get_advanced_partial(variant_args))
 
     cloud_config = results.templates['cloud-config.yaml']
 
@@ -411,53 +466,69 @@ def make_advanced_bundle(variant_args, extra_sources, template_name, cc_params):
     return (cloudformation, results)
 
 
-def gen_advanced_template(arguments, variant_prefix, reproducible_artifact_path, os_type):
+advanced_master_counts = [1, 3, 5, 7]
+
+
+def gen_advanced_node_template(arguments, variant_prefix, reproducible_artifact_path, os_type, node_type, num_masters):
+    """Artifacts of the advanced template for one node type (and num_masters for master templates)."""
+    # TODO(cmaloney): This forcibly overwriting arguments might overwrite a user set argument
+
+    # without noticing (such as exhibitor_storage_backend)
+    node_template_id, node_source = groups[node_type]
+    local_source = Source()
+    local_source.add_must('os_type', os_type)
+    local_source.add_must('region_to_ami_mapping', gen_ami_mapping({"coreos", "el7", "el7prereq"}))
+    params = cf_instance_groups[node_template_id]
+    params['report_name'] = aws_advanced_report_names[node_type]
+    params['os_type'] = os_type
+    params['node_type'] = node_type
+    template_key = 'advanced-{}'.format(node_type)
+    template_name = template_key + '.json'
+
+    def _as_artifact(filename, bundle):
+        yield from _as_artifact_and_pkg(variant_prefix, filename, bundle)
+
+    if node_type == 'master':
+        master_tk = '{}-{}-{}'.format(os_type, template_key, num_masters)
+        print('Building {} {} for num_masters = {}'.format(os_type, node_type, num_masters))
+        num_masters_source = Source()
+        num_masters_source.add_must('num_masters', str(num_masters))
+        bundle = make_advanced_bundle(arguments,
+                                      [node_source, local_source, num_masters_source],
+                                      template_name,
+                                      deepcopy(params))
+        yield from _as_artifact('{}.json'.format(master_tk), bundle)
+
+        # Zen template corresponding to this number of masters
+        yield _as_cf_artifact(
+            '{}{}-zen-{}.json'.format(variant_prefix, os_type, num_masters),
+            render_cloudformation_transform(
+                resource_string("gen", "aws/templates/advanced/zen.json").decode(),
+                variant_prefix=variant_prefix,
+                reproducible_artifact_path=reproducible_artifact_path,
+                **bundle[1].arguments))
+    else:
+        local_source.add_must('num_masters', '1')
+        local_source.add_must('nat_ami_mapping', gen_ami_mapping({"natami"}))
+        bundle = make_advanced_bundle(arguments,
+                                      [node_source, local_source],
+                                      template_name,
+                                      deepcopy(params))
+        yield from _as_artifact('{}-{}'.format(os_type, template_name), bundle)
+
+
+def advanced_template_tasks(arguments, variant_prefix, reproducible_artifact_path, os_type):
+    """The independent gen_advanced_node_template calls which make up the advanced templates for os_type."""
     for node_type in ['master', 'priv-agent', 'pub-agent']:
-        # TODO(cmaloney): This forcibly overwriting arguments might overwrite a user set argument
-
-        # without noticing (such as exhibitor_storage_backend)
-        node_template_id, node_source = groups[node_type]
-        local_source = Source()
-        local_source.add_must('os_type', os_type)
-        local_source.add_must('region_to_ami_mapping', gen_ami_mapping({"coreos", "el7", "el7prereq"}))
-        params = cf_instance_groups[node_template_id]
-        params['report_name'] = aws_advanced_report_names[node_type]
-        params['os_type'] = os_type
-        params['node_type'] = node_type
-        template_key = 'advanced-{}'.format(node_type)
-        template_name = template_key + '.json'
-
-        def _as_artifact(filename, bundle):
-            yield from _as_artifact_and_pkg(variant_prefix, filename, bundle)
-
-        if node_type == 'master':
-            for num_masters in [1, 3, 5, 7]:
-                master_tk = '{}-{}-{}'.format(os_type, template_key, num_masters)
-                print('Building {} {} for num_masters = {}'.format(os_type, node_type, num_masters))
-                num_masters_source = Source()
-                num_masters_source.add_must('num_masters', str(num_masters))
-                bundle = make_advanced_bundle(arguments,
-                                              [node_source, local_source, num_masters_source],
-                                              template_name,
-                                              deepcopy(params))
-                yield from _as_artifact('{}.json'.format(master_tk), bundle)
-
-                # Zen template corresponding to this number of masters
-                yield _as_cf_artifact(
-                    '{}{}-zen-{}.json'.format(variant_prefix, os_type, num_masters),
-                    render_cloudformation_transform(
-                        resource_string("gen", "aws/templates/advanced/zen.json").decode(),
-                        variant_prefix=variant_prefix,
-                        reproducible_artifact_path=reproducible_artifact_path,
-                        **bundle[1].arguments))
-        else:
-            local_source.add_must('num_masters', '1')
-            local_source.add_must('nat_ami_mapping', gen_ami_mapping({"natami"}))
-            bundle = make_advanced_bundle(arguments,
-                                          [node_source, local_source],
-                                          template_name,
-                                          deepcopy(params))
-            yield from _as_artifact('{}-{}'.format(os_type, template_name), bundle)
+        for num_masters in (advanced_master_counts if node_type == 'master' else [None]):
+            yield (gen_advanced_node_template, arguments, variant_prefix, reproducible_artifact_path, os_type,
+                   node_type, num_masters)
+
+
+def gen_advanced_template(arguments, variant_prefix, reproducible_artifact_path, os_type):
+    with advanced_partials([arguments]):
+        yield from util.generate_artifacts(list(
+            advanced_template_tasks(arguments, variant_prefix, reproducible_artifact_path, os_type)))
 
 
 aws_simple_source = Source({
@@ -563,34 +634,33 @@ def gen_buttons(build_name, reproducible_artifact_path, tag, commit, variant_arg
         })
 
 
-def do_create(tag, build_name, reproducible_artifact_path, commit, variant_arguments, all_completes):
-    # Generate the single-master and multi-master templates.
+def gen_num_masters_template(variant_prefix, filename, arguments, num_masters):
+    num_masters_source = Source()
+    num_masters_source.add_must('num_masters', str(num_masters))
+    yield from gen_simple_template(variant_prefix, filename, arguments, num_masters_source)
+
 
+def do_create(tag, build_name, reproducible_artifact_path, commit, variant_arguments, all_completes):
+    # Every template is an independent gen.generate run, so they're all built concurrently and their
+    # artifacts merged back in the order listed here.
+    tasks = []
     for bootstrap_variant, variant_base_args in variant_arguments.items():
         variant_prefix = pkgpanda.util.variant_prefix(bootstrap_variant)
 
-        def make(num_masters, filename):
-            num_masters_source = Source()
-            num_masters_source.add_must('num_masters', str(num_masters))
-            yield from gen_simple_template(
-                variant_prefix,
-                filename,
-                variant_base_args,
-                num_masters_source)
-
         # Single master templates
-        yield from make(1, 'single-master.cloudformation.json')
+        tasks.append((gen_num_masters_template, variant_prefix, 'single-master.cloudformation.json',
+                      variant_base_args, 1))
 
         # Multi master templates
-        yield from make(3, 'multi-master.cloudformation.json')
+        tasks.append((gen_num_masters_template, variant_prefix, 'multi-master.cloudformation.json',
+                      variant_base_args, 3))
 
         # Advanced templates
         for os_type in ['coreos', 'el7']:
-            yield from gen_advanced_template(
-                variant_base_args,
-                variant_prefix,
-                reproducible_artifact_path,
-                os_type)
+            tasks += advanced_template_tasks(variant_base_args, variant_prefix, reproducible_artifact_path, os_type)
+
+    with advanced_partials(variant_arguments.values()):
+        yield from util.generate_artifacts(tasks)
 
     # Button page linking to the basic templates.
     button_page = gen_buttons(build_name, reproducible_artifact_path, tag, commit, variant_arguments)
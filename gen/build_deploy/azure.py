@@ -103,14 +103,16 @@ def validate_cloud_config(cc_string):
         sys.exit(1)
 
 
-def transform(cloud_config_yaml_str):
+def transform(cloud_config):
     '''
-    Transforms the given yaml into a list of strings which are concatenated
-    together by the ARM template system. We must make it a list of strings so
-    that ARM template parameters appear at the top level of the template and get
-    substituted.
+    Transforms the given cloud config into an ARM template expression which
+    concatenates its JSON as a list of strings. We must make it a list of strings
+    so that ARM template parameters appear at the top level of the template and
+    get substituted.
+
+    @param cloud_config: dict, Cloud Configuration
     '''
-    cc_json = json.dumps(yaml.safe_load(cloud_config_yaml_str), sort_keys=True)
+    cc_json = json.dumps(cloud_config, sort_keys=True)
 
     def _quote_literals(parts):
         for part, is_param in parts:
@@ -120,8 +122,7 @@ def transform(cloud_config_yaml_str):
                 validate_cloud_config(part)
                 yield "'{}'".format(part)
 
-    # We're embedding this as a json string.
-    return json.dumps(
+    return (
         "[base64(concat('#cloud-config\n\n', " +
         ", ".join(_quote_literals(split_by_token('[[[', ']]]', cc_json, strip_token_decoration=True))) +
         "))]"
@@ -130,18 +131,17 @@ def transform(cloud_config_yaml_str):
 
 def render_arm(
         arm_template,
-        master_cloudconfig_yaml_str,
-        slave_cloudconfig_yaml_str,
-        slave_public_cloudconfig_yaml_str):
-
-    template_str = gen.template.parse_str(arm_template).render({
-        'master_cloud_config': transform(master_cloudconfig_yaml_str),
-        'slave_cloud_config': transform(slave_cloudconfig_yaml_str),
-        'slave_public_cloud_config': transform(slave_public_cloudconfig_yaml_str)
+        master_cloudconfig,
+        slave_cloudconfig,
+        slave_public_cloudconfig):
+
+    template_json = util.render_json_template(arm_template, values={
+        'master_cloud_config': transform(master_cloudconfig),
+        'slave_cloud_config': transform(slave_cloudconfig),
+        'slave_public_cloud_config': transform(slave_public_cloudconfig)
     })
 
     # Add in some metadata to help support engineers
-    template_json = json.loads(template_str)
     template_json['variables']['DcosImageCommit'] = util.dcos_image_commit
     template_json['variables']['TemplateGenerationDate'] = util.template_generation_date
     return json.dumps(template_json)
@@ -172,12 +172,7 @@ def gen_templates(gen_arguments, arm_template, extra_sources):
         cc_variant = deepcopy(cloud_config)
 
         # Add roles
-        cc_variant = results.utils.add_roles(cc_variant, params['roles'] + ['azure'])
-
-        # NOTE: If this gets printed in string stylerather than '|' the Azure
-        # parameters which need to be split out for the arm to
-        # interpret end up all escaped and undoing it would be hard.
-        variant_cloudconfig[variant] = results.utils.render_cloudconfig(cc_variant)
+        variant_cloudconfig[variant] = results.utils.add_roles(cc_variant, params['roles'] + ['azure'])
 
     # Render the arm
     arm = render_arm(
@@ -273,14 +268,19 @@ def make_template(num_masters, gen_arguments, varietal, bootstrap_variant_prefix
 
 
 def do_create(tag, build_name, reproducible_artifact_path, commit, variant_arguments, all_completes):
+    # Each template is an independent gen.generate run, so they're built concurrently and their
+    # artifacts merged back in the order listed here.
+    tasks = []
     for arm_t in ['dcos', 'acs']:
         for num_masters in [1, 3, 5]:
             for bootstrap_name, gen_arguments in variant_arguments.items():
-                yield from make_template(
+                tasks.append((
+                    make_template,
                     num_masters,
                     gen_arguments,
                     arm_t,
-                    pkgpanda.util.variant_prefix(bootstrap_name))
+                    pkgpanda.util.variant_prefix(bootstrap_name)))
+    yield from util.generate_artifacts(tasks)
 
     yield {
         'channel_path': 'azure.html',
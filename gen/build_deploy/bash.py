@@ -755,6 +755,7 @@ def make_installer_docker(variant, variant_info, installer_info):
     bootstrap_latest_filename = pkgpanda.util.variant_prefix(variant) + 'bootstrap.latest'
     latest_complete_filename = pkgpanda.util.variant_prefix(variant) + 'complete.latest.json'
     packages_dir = 'packages'
+    template_bundle_filename = 'gen_template_bundle.pickle'
     docker_image_name = 'mesosphere/dcos-genconf:' + image_version
 
     # TODO(cmaloney): All of this should use package_resources
@@ -782,17 +783,19 @@ def make_installer_docker(variant, variant_info, installer_info):
             'bootstrap_active_filename': bootstrap_active_filename,
             'bootstrap_latest_filename': bootstrap_latest_filename,
             'latest_complete_filename': latest_complete_filename,
-            'packages_dir': packages_dir})
+            'packages_dir': packages_dir,
+            'template_bundle_filename': template_bundle_filename})
 
         fill_template('installer_internal_wrapper', {
             'variant': pkgpanda.util.variant_str(variant),
             'bootstrap_id': bootstrap_id,
-            'dcos_image_commit': util.dcos_image_commit})
+            'dcos_image_commit': util.dcos_image_commit,
+            'template_bundle_filename': template_bundle_filename})
 
         subprocess.check_call(['chmod', '+x', dest_path('installer_internal_wrapper')])
 
         # TODO(cmaloney) make this use make_bootstrap_artifacts / that set
-        # rather than manually keeping everything in sync
+        # rather than manually keeping everything in sync (Including with local_artifact_paths)
         copy_to_build('packages/cache/bootstrap', bootstrap_filename)
         copy_to_build('packages/cache/bootstrap', installer_bootstrap_filename)
         copy_to_build('packages/cache/bootstrap', bootstrap_active_filename)
@@ -802,6 +805,10 @@ def make_installer_docker(variant, variant_info, installer_info):
             package_name = pkgpanda.PackageId(package_id).name
             copy_to_build('packages/cache/', packages_dir + '/' + package_name + '/' + package_id + '.tar.xz')
 
+        # The templates never change within the image, so they're parsed once here rather than every
+        # time the installer runs.
+        gen.write_template_bundle(dest_path(template_bundle_filename))
+
         # Copy across gen_extra if it exists
         if os.path.exists('gen_extra'):
             copy_directory('gen_extra', dest_path('gen_extra'))
@@ -830,6 +837,24 @@ def make_installer_docker(variant, variant_info, installer_info):
     return installer_filename
 
 
+def local_artifact_paths(variants, all_completes):
+    """Paths under packages/cache/ which do_create needs locally to build installers for the given variants.
+
+    Must be kept in sync with the files make_installer_docker copies into the installer."""
+    paths = set()
+    for variant in variants:
+        installer_info = all_completes.get('{}installer'.format(pkgpanda.util.variant_prefix(variant)))
+        if installer_info is None:
+            continue
+        variant_info = all_completes[variant]
+        paths.add('bootstrap/' + variant_info['bootstrap'] + '.bootstrap.tar.xz')
+        paths.add('bootstrap/' + variant_info['bootstrap'] + '.active.json')
+        paths.add('bootstrap/' + installer_info['bootstrap'] + '.bootstrap.tar.xz')
+        for package_id in variant_info['packages']:
+            paths.add('packages/' + pkgpanda.PackageId(package_id).name + '/' + package_id + '.tar.xz')
+    return paths
+
+
 def do_create(tag, build_name, reproducible_artifact_path, commit, variant_arguments, all_completes):
     """Create a installer script for each variant in bootstrap_dict.
 
@@ -1,9 +1,15 @@
+import json
 import os
 import os.path
 import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from itertools import chain
 from subprocess import check_output
 
+import gen.template
+import gen.util
 from pkgpanda.util import write_json, write_string
 
 dcos_image_commit = os.getenv('DCOS_IMAGE_COMMIT', None)
@@ -16,6 +22,81 @@ if dcos_image_commit is None:
 
 template_generation_date = str(datetime.utcnow())
 
+# Number of processes the cloud template builders fan gen.generate calls out to. 1 builds them in-process.
+template_workers = int(os.getenv('DCOS_TEMPLATE_WORKERS', os.cpu_count() or 1))
+
+
+def _list_artifacts(package_mtime, function, *args):
+    gen.util.package_mtime = package_mtime
+    return list(function(*args))
+
+
+def generate_artifacts(tasks, max_workers=None):
+    """Yield the artifacts of each (function, *args) task, where function is an artifact generator.
+
+    The tasks are independent so they run in a pool of max_workers (Default: template_workers)
+    processes. Artifacts are yielded in task order, so the output doesn't depend on scheduling. The
+    functions and arguments must be picklable (Module level functions, plain data). Every package
+    made by the tasks gets the same mtime, so it doesn't depend on which process made it either."""
+    if max_workers is None:
+        max_workers = template_workers
+    package_mtime = int(time.time())
+    if max_workers <= 1 or len(tasks) <= 1:
+        previous_mtime = gen.util.package_mtime
+        gen.util.package_mtime = package_mtime
+        try:
+            for function, *args in tasks:
+                yield from function(*args)
+        finally:
+            gen.util.package_mtime = previous_mtime
+        return
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(_list_artifacts, package_mtime, function, *args) for function, *args in tasks]
+        for future in futures:
+            yield from future.result()
+
+
+def _placeholder(name):
+    return '\0{}'.format(name)
+
+
+def _substitute(node, values, spliced):
+    if isinstance(node, dict):
+        for key, value in node.items():
+            if isinstance(value, str):
+                if value in values:
+                    node[key] = values[value]
+            else:
+                _substitute(value, values, spliced)
+    elif isinstance(node, list):
+        items = []
+        for item in node:
+            if isinstance(item, str):
+                if item in spliced:
+                    items.extend(spliced[item])
+                    continue
+                item = values.get(item, item)
+            else:
+                _substitute(item, values, spliced)
+            items.append(item)
+        node[:] = items
+
+
+def render_json_template(template_str, values=dict(), spliced=dict()):
+    """Render the gen template of a JSON document template_str into the document it describes.
+
+    Each variable in values is replaced by its value, and each variable in spliced (Which must be an
+    element of a list in the template) by the elements of its value. They're placed in the parsed
+    document rather than rendered as JSON text, so that text isn't escaped and parsed back out."""
+    template_json = json.loads(gen.template.parse_str(template_str).render(
+        {name: json.dumps(_placeholder(name)) for name in chain(values, spliced)}))
+    _substitute(
+        template_json,
+        {_placeholder(name): value for name, value in values.items()},
+        {_placeholder(name): value for name, value in spliced.items()})
+    return template_json
+
 
 def try_makedirs(path):
     try:
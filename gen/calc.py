@@ -312,6 +312,11 @@ def validate_network_default_name(overlay_network_default_name, dcos_overlay_net
             overlay_network_default_name))
 
 
+@gen.internals.pure
+def validate_dcos_overlay_network_default_name(dcos_overlay_network_default_name, dcos_overlay_network):
+    validate_network_default_name(dcos_overlay_network_default_name, dcos_overlay_network)
+
+
 class IPVersion(IntEnum):
     IPv4 = 4
     IPv6 = 6
@@ -329,6 +334,7 @@ def validate_config_subnet(config_name, subnet, version=IPVersion.IPv4):
         raise AssertionError(err_msg) from ex
 
 
+@gen.internals.pure
 def validate_dcos_overlay_network(dcos_overlay_network):
     # a validate dcos_overlay_network is in such a format:
     # dcos_overlay_network :
@@ -399,6 +405,7 @@ def validate_dcos_overlay_network(dcos_overlay_network):
             gen.internals.validate_one_of(overlay['enabled'], [True, False])
 
 
+@gen.internals.pure
 def validate_overlay_networks_not_overlap(dcos_overlay_network,
                                           dcos_overlay_enable,
                                           calico_network_cidr,
@@ -485,10 +492,12 @@ def validate_dns_search(dns_search):
     assert len(dns_search.split()) <= 6, "Must contain no more than 6 domains"
 
 
+@gen.internals.pure
 def validate_master_list(master_list):
     return validate_ip_list(master_list)
 
 
+@gen.internals.pure
 def validate_resolvers(resolvers):
     resolvers_list = validate_json_list(resolvers)
     check_duplicates(resolvers_list)
@@ -502,6 +511,7 @@ def validate_resolvers(resolvers):
     return validate_ip_port_list(resolvers)
 
 
+@gen.internals.pure
 def validate_mesos_dns_ip_sources(mesos_dns_ip_sources):
     return validate_json_list(mesos_dns_ip_sources)
 
@@ -722,6 +732,7 @@ def validate_s3_prefix(s3_prefix):
     assert not s3_prefix.endswith('/'), "Must be a file path and cannot end in a /"
 
 
+@gen.internals.pure
 def validate_dns_bind_ip_blacklist(dns_bind_ip_blacklist):
     return validate_ip_list(dns_bind_ip_blacklist)
 
@@ -732,6 +743,7 @@ def calculate_dns_bind_ip_blacklist_json(dns_bind_ip_blacklist, dns_bind_ip_rese
     return json.dumps(reserved_ips + ips)
 
 
+@gen.internals.pure
 def validate_dns_forward_zones(dns_forward_zones):
     """
      "forward_zones": {"a.contoso.com": ["1.1.1.1:53", "2.2.2.2"],
@@ -1103,6 +1115,7 @@ def validate_check_config(check_config):
     return check_config_obj
 
 
+@gen.internals.pure
 def validate_custom_checks(custom_checks, check_config):
 
     def cluster_check_names(config):
@@ -1184,8 +1197,7 @@ entry = {
         lambda dcos_net_cluster_identity: validate_true_false(dcos_net_cluster_identity),
         lambda dcos_net_rest_enable: validate_true_false(dcos_net_rest_enable),
         lambda dcos_net_watchdog: validate_true_false(dcos_net_watchdog),
-        lambda dcos_overlay_network_default_name, dcos_overlay_network:
-            validate_network_default_name(dcos_overlay_network_default_name, dcos_overlay_network),
+        validate_dcos_overlay_network_default_name,
         lambda dcos_overlay_enable: validate_true_false(dcos_overlay_enable),
         lambda dcos_overlay_mtu: validate_int_in_range(dcos_overlay_mtu, 552, None),
         lambda dcos_overlay_config_attempts: validate_int_in_range(dcos_overlay_config_attempts, 0, 10),
@@ -1227,7 +1239,7 @@ entry = {
         validate_mesos_default_container_shm_size,
         lambda check_config: validate_check_config(check_config),
         lambda custom_checks: validate_check_config(custom_checks),
-        lambda custom_checks, check_config: validate_custom_checks(custom_checks, check_config),
+        validate_custom_checks,
         lambda fault_domain_enabled: validate_true_false(fault_domain_enabled),
         lambda mesos_master_work_dir: validate_absolute_path(mesos_master_work_dir),
         lambda mesos_agent_work_dir: validate_absolute_path(mesos_agent_work_dir),
@@ -6,6 +6,10 @@ class ValidationError(Exception):
         self.unset = unset
         super().__init__(str(errors), str(unset))
 
+    def __reduce__(self):
+        # Keep errors / unset intact when raised in a worker process (ex: gen.build_deploy.util.generate_artifacts)
+        return (ValidationError, (self.errors, self.unset))
+
     def __str__(self):
         return "<ValidationError errors: {}; unset: {}".format(self.errors, self.unset)
 
@@ -17,6 +21,9 @@ class ExhibitorTLSBootstrapError(Exception):
     def __init__(self, errors):
         self.errors = errors
 
+    def __reduce__(self):
+        return (ExhibitorTLSBootstrapError, (self.errors,))
+
     def __str__(self):
         return "<ExhibitorTLSBootstrapError errors: {}>".format(', '.join(self.errors))
 
@@ -2,9 +2,13 @@ import copy
 import enum
 import inspect
 import logging
+import threading
+import time
+from concurrent.futures import Executor
 from contextlib import contextmanager
 from functools import partial, partialmethod
-from typing import Any, Callable, Dict, List, Set, Tuple, Union
+from itertools import chain
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, Union
 
 from gen.exceptions import ValidationError
 from pkgpanda.util import hash_checkout
@@ -50,6 +54,21 @@ def function_id(function: Callable):
     }
 
 
+def pure(function: Callable) -> Callable:
+    """Mark a validate function as pure.
+
+    Pure validate functions only look at their arguments (no I/O, no shared
+    state), so a Validator given an executor may run them on it. They need to be
+    defined at module level so a process pool can pickle them.
+    """
+    function.is_pure = True
+    return function
+
+
+def is_pure(function: Callable) -> bool:
+    return getattr(function, 'is_pure', False)
+
+
 class Late:
     """A value which is going to be bound 'late' / is only known at cluster launch time."""
 
@@ -96,6 +115,9 @@ class Setter:
         def get_value():
             return value
 
+        # The value if it's a plain string, known before resolving anything.
+        self.constant = value if isinstance(value, str) else None
+
         if isinstance(value, str):
             self.calc = get_value
             self.parameters = set()
@@ -359,6 +381,12 @@ class SkipError(Exception):
     pass
 
 
+# NOTE: This exception should never escape the Resolver
+class VaryingException(Exception):
+    """Raised when a partial resolution (See PartialResolution) needs the value of a varying name."""
+    pass
+
+
 # has a deterministic chunk before and after the variable name so we can deterministically get out
 # the name
 LATE_BIND_PLACEHOLDER_START = 'LATE_BIND_PLACEHOLDER_START_'
@@ -456,19 +484,119 @@ class ArgumentDict(dict):
         self._finalized = True
 
 
+class CallProfile:
+    """Accumulated cost of calling one setter or validate function."""
+
+    def __init__(self, kind: str, name: str):
+        self.kind = kind
+        self.name = name
+        self.calls = 0
+        self.total_time = 0.0
+        self.input_size = 0
+
+    def __repr__(self):
+        return "<CallProfile {} {}, calls: {}, total_time: {:.6f}, input_size: {}>".format(
+            self.kind, self.name, self.calls, self.total_time, self.input_size)
+
+
+class Profiler:
+    """Records call count, cumulative time and input size of setters and validate functions.
+
+    Profiling is opt-in. Resolvers and Validators given a profiler report every
+    setter and validate function call to it. Setters are recorded by the name of
+    the argument they calculate, validate functions by their function name and
+    parameters.
+    """
+
+    def __init__(self):
+        # (kind, name) -> CallProfile
+        self.profiles = dict()
+        self._lock = threading.Lock()
+
+    def call(self, kind: str, name: str, function: Callable, *args, **kwargs):
+        input_size = sum(len(value) for value in chain(args, kwargs.values()) if isinstance(value, str))
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            self.record(kind, name, time.perf_counter() - start, input_size)
+
+    def record(self, kind: str, name: str, elapsed: float, input_size: int):
+        """Record a call made somewhere else (Like a validate function run on an executor)."""
+        with self._lock:
+            profile = self.profiles.get((kind, name))
+            if profile is None:
+                profile = self.profiles[(kind, name)] = CallProfile(kind, name)
+            profile.calls += 1
+            profile.total_time += elapsed
+            profile.input_size += input_size
+
+    def sorted_profiles(self) -> List[CallProfile]:
+        """Return all profiles, most expensive first."""
+        return sorted(self.profiles.values(), key=lambda p: (-p.total_time, p.kind, p.name))
+
+    def report(self) -> str:
+        lines = ['{:<8} {:<70} {:>6} {:>12} {:>12}'.format('kind', 'name', 'calls', 'total (s)', 'input size')]
+        for profile in self.sorted_profiles():
+            lines.append('{:<8} {:<70} {:>6} {:>12.6f} {:>12}'.format(
+                profile.kind, profile.name, profile.calls, profile.total_time, profile.input_size))
+        return '\n'.join(lines)
+
+    def log_report(self):
+        log.info("Setter and validate function profile:\n%s", self.report())
+
+
+def _function_name(function: Callable) -> str:
+    if isinstance(function, partial):
+        function = function.func
+    return getattr(function, '__name__', repr(function))
+
+
+def _call_validate_fns(validate_fns, args, kwargs) -> Tuple[Optional[str], List[float]]:
+    """Call validate_fns in order until one fails.
+
+    Returns the message of the one which failed (None if they all passed) and how long each call took."""
+    times = list()
+    try:
+        for validate_fn in validate_fns:
+            start = time.perf_counter()
+            try:
+                validate_fn(*args, **kwargs)
+            finally:
+                times.append(time.perf_counter() - start)
+    except AssertionError as ex:
+        return ex.args[0], times
+    return None, times
+
+
 class Validator:
-    """Holds a collection of validate functions, and can be asked to call them"""
+    """Holds a collection of validate functions, and can be asked to call them
 
-    def __init__(self, validate_functions, targets):
+    Given an executor, the validate functions which are all pure for a parameter (or set of
+    parameters) run on it: those of single parameters with a constant value are started before
+    resolution by prevalidate(), those of multiple parameters once resolution is done. Pure
+    validate functions can be pickled, so the executor can be a process pool."""
+
+    def __init__(
+            self,
+            validate_functions,
+            targets,
+            profiler: Optional[Profiler]=None,
+            executor: Optional[Executor]=None):
         # Note: targets must be passed in and inspected here, since the validate_functions that a
         # target yields can't be inspected for the parameter name. To get around this yield_validates
         # returns a two-tuple of the name and a callable.
+        self._profiler = profiler
+        self._executor = executor
 
         # Re-arrange the validation functions so we can more easily access them by
         # argument name.
         self._validate_by_arg = dict()
         self._multi_arg_validate = dict()
 
+        # (name, value) -> Future of the single parameter validation started by prevalidate()
+        self._prevalidated = dict()
+
         for function in validate_functions:
             parameters = get_function_parameters(function)
             # Could build up the single and multi parameter validation function maps in the same
@@ -483,6 +611,37 @@ class Validator:
             for parameter, function in target.yield_validates():
                 self._validate_by_arg.setdefault(parameter, list()).append(function)
 
+    def _can_submit(self, validate_fns) -> bool:
+        return self._executor is not None and all(map(is_pure, validate_fns))
+
+    def _result(self, parameters, validate_fns, args, kwargs, future=None) -> Optional[str]:
+        """The message of the first of validate_fns to fail, calling them unless future already did."""
+        error, times = future.result() if future is not None else _call_validate_fns(validate_fns, args, kwargs)
+        if self._profiler is not None:
+            input_size = sum(len(value) for value in chain(args, kwargs.values()) if isinstance(value, str))
+            for function, elapsed in zip(validate_fns, times):
+                name = '{}({})'.format(_function_name(function), ', '.join(sorted(parameters)))
+                self._profiler.record('validate', name, elapsed, input_size)
+        return error
+
+    def prevalidate(self, values: Dict[str, List[str]]):
+        """Start validating the given possible values of single parameters on the executor.
+
+        validate_single() uses the result if it's asked to validate one of them."""
+        for name, name_values in values.items():
+            validate_fns = self._validate_by_arg.get(name)
+            if validate_fns is None or not self._can_submit(validate_fns):
+                continue
+            for value in name_values:
+                if (name, value) not in self._prevalidated:
+                    self._prevalidated[(name, value)] = self._executor.submit(
+                        _call_validate_fns, validate_fns, (value,), {})
+
+    def cancel_prevalidation(self):
+        """Stop any validation prevalidate() started which hasn't been needed."""
+        for future in self._prevalidated.values():
+            future.cancel()
+
     def validate_single(self, name: str, value: str):
         """Calls all validate functions which validate the given parameter name
 
@@ -491,8 +650,10 @@ class Validator:
         """
         validate_fns = self._validate_by_arg.get(name)
         if validate_fns is not None:
-            for validate_fn in validate_fns:
-                validate_fn(value)
+            future = self._prevalidated.get((name, value))
+            error = self._result({name}, validate_fns, (value,), {}, future)
+            if error is not None:
+                raise AssertionError(error)
 
     # TODO(cmaloney): The distance between the validate_single and multi_arg_validate interface,
     # while necessary for efficient functioning currently, is showing that there is tension between
@@ -500,6 +661,9 @@ class Validator:
     # argument set is finalized rather than one big pass at the end would likely make it much
     # cleaner.
     def yield_multi_argument_validate_errors(self, arguments: ArgumentDict):
+        # Results are collected in the order the parameter sets were registered, whether they were
+        # computed here or on the executor, so errors come out in the same order either way.
+        results = list()
         for parameter_set, validate_fns in self._multi_arg_validate.items():
             # Build up argument map for validate function. If any arguments are
             # unset then skip this validate function.
@@ -525,11 +689,15 @@ class Validator:
 
             # Call the validation function, catching AssertionErrors and turning them into errors in
             # the error dictionary.
-            try:
-                for validate_fn in validate_fns:
-                    validate_fn(**kwargs)
-            except AssertionError as ex:
-                yield (parameter_set, ex.args[0])
+            future = None
+            if self._can_submit(validate_fns):
+                future = self._executor.submit(_call_validate_fns, validate_fns, (), kwargs)
+            results.append((parameter_set, validate_fns, kwargs, future))
+
+        for parameter_set, validate_fns, kwargs, future in results:
+            error = self._result(parameter_set, validate_fns, (), kwargs, future)
+            if error is not None:
+                yield (parameter_set, error)
 
 
 # Depth first search argument calculator. Detects cycles, as well as unmet
@@ -537,7 +705,19 @@ class Validator:
 # TODO(cmaloney): Separate chain / path building when unwinding from the root
 #                 error messages.
 class Resolver:
-    def __init__(self, setters, validate_fns, targets):
+    def __init__(
+            self,
+            setters,
+            validate_fns,
+            targets,
+            profiler: Optional[Profiler]=None,
+            executor: Optional[Executor]=None,
+            varying: Set[str]=frozenset(),
+            partial: Optional['PartialResolution']=None):
+        """If varying is given the Resolver may only be resolved with resolve_partial(), leaving every
+        argument which depends on a varying name unresolved. If partial is given the arguments it
+        resolved are reused rather than calculated again."""
+
         self._resolved = False
         self._setters = setters
         self._targets = targets
@@ -554,7 +734,17 @@ class Resolver:
 
         self._contexts = list()
 
-        self._validator = Validator(validate_fns, targets)
+        self._profiler = profiler
+        self._validator = Validator(validate_fns, targets, profiler, executor)
+
+        self._varying = frozenset(varying)
+        self._varying_dependents = set()
+
+        if partial is not None:
+            self._arguments.update(partial.arguments)
+            self._errors.update(partial.errors)
+            self._unset |= partial.unset
+            self._late |= partial.late
 
     def _calculate(self, resolvable):
         # Filter out any setters which have predicates / conditions which are
@@ -630,7 +820,10 @@ class Resolver:
             kwargs[parameter] = self._resolve_name(parameter)
 
         try:
-            value = setter.calc(**kwargs)
+            if self._profiler is None:
+                value = setter.calc(**kwargs)
+            else:
+                value = self._profiler.call('setter', resolvable.name, setter.calc, **kwargs)
             self._validator.validate_single(resolvable.name, value)
         except AssertionError as ex:
             raise CalculatorError(ex.args[0], [ex]) from ex
@@ -648,14 +841,20 @@ class Resolver:
                 "eval stack. name: {} eval_stack: {}".format(
                     name, self._eval_stack), [(name, copy.copy(self._eval_stack),)])
         self._eval_stack.append(name)
-        yield
-        foo = self._eval_stack.pop()
-        assert foo == name, "Internal consistency error: Unwinding stack seems to not be the order it was built in..."
+        try:
+            yield
+        finally:
+            foo = self._eval_stack.pop()
+            assert foo == name, \
+                "Internal consistency error: Unwinding stack seems to not be the order it was built in..."
 
     def _ensure_finalized(self, resolvable):
         if resolvable.is_finalized:
             return
 
+        if resolvable.name in self._varying:
+            raise VaryingException(resolvable.name)
+
         # Calculate the value, noting that we're in the context of calculating it.
         # NOTE: _stack_layer is outside the try/except so if we find a loop, it will report /
         # finalize on the first instance we passed, rather than finalizing once immediately for
@@ -664,6 +863,10 @@ class Resolver:
         with self._stack_layer(resolvable.name):
             try:
                 resolvable.finalize_value(*self._calculate(resolvable))
+            except VaryingException:
+                # Left unresolved, to be calculated by each full resolution which uses the partial one.
+                self._varying_dependents.add(resolvable.name)
+                raise
             except LateBoundException:
                 self._late.add(resolvable.name)
                 resolvable.finalize_late()
@@ -678,6 +881,9 @@ class Resolver:
                 self._errors[resolvable.name] = msg
                 raise
 
+    def _depends_on_varying(self, name):
+        return name in self._varying or name in self._varying_dependents
+
     def _resolve_name(self, name):
         try:
             resolvable = self._arguments[name]
@@ -693,8 +899,8 @@ class Resolver:
             raise
         finally:
             # The resolvable must have either
-            assert resolvable.is_finalized, "_ensure_finalized is supposed to always finalize a " \
-                "resolvable but didn't: {}".format(resolvable)
+            assert resolvable.is_finalized or self._depends_on_varying(name), "_ensure_finalized is " \
+                "supposed to always finalize a resolvable but didn't: {}".format(resolvable)
 
         # If the resolvable is in an error state, raise it so that all the resolvables
         # depending on it will be put into an error state.
@@ -712,12 +918,17 @@ class Resolver:
         # TODO(cmaloney): All the arguments depended upon by the arguments resolved here should be
         # included in the target's full set of finalized arguments.
         for name in target.variables:
-            self._ensure_finalized(self._arguments[name])
+            self._ensure_finalized_unless_varying(self._arguments[name])
 
         for name, sub_scope in target.sub_scopes.items():
-            self._ensure_finalized(self._arguments[name])
+            self._ensure_finalized_unless_varying(self._arguments[name])
             resolvable = self._arguments[name]
 
+            # In a partial resolution which sub-scope to check may depend on a varying name, leaving it
+            # to the full resolutions.
+            if self._varying and not resolvable.is_finalized:
+                continue
+
             assert resolvable.is_finalized, " _resolve_name should have resulted in finalization " \
                 "of {}".format(resolvable)
 
@@ -737,24 +948,56 @@ class Resolver:
             sub_target = sub_scope.cases[resolvable.value]
             self._calculate_target(sub_target)
 
+            # Only full resolutions finalize targets.
+            if self._varying:
+                continue
+
             # This .update() is safe because Resolver guarantees each argument
             # only ever has one value / resolvable.
             finalized_arguments.update(sub_target.arguments)
 
-        target.finalize(finalized_arguments)
+        if not self._varying:
+            target.finalize(finalized_arguments)
+
+    def _ensure_finalized_unless_varying(self, resolvable):
+        try:
+            self._ensure_finalized(resolvable)
+        except VaryingException:
+            assert self._varying
 
     # Force calculation of all arguments by accessing the arguments in this
     # scope and recursively all sub-scopes.
     def resolve(self):
         assert not self._resolved, "Resolvers should only be resolved once"
+        assert not self._varying, "Resolvers with varying names can only be partially resolved"
         self._resolved = True
 
-        for target in self._targets:
-            self._calculate_target(target)
+        # Validate the constant values of setters while resolving everything else.
+        constants = dict()
+        for name, setters in self._setters.items():
+            constants[name] = [setter.constant for setter in setters if setter.constant is not None]
+        self._validator.prevalidate(constants)
+
+        try:
+            for target in self._targets:
+                self._calculate_target(target)
+        finally:
+            self._validator.cancel_prevalidation()
 
         for parameter_set, error in self._validator.yield_multi_argument_validate_errors(self._arguments):
             self._errors[parameter_set] = error
 
+    def resolve_partial(self):
+        """Calculate everything the targets need which doesn't depend on a varying name.
+
+        Multi-argument validation is left to the full resolutions, since it needs all the arguments."""
+        assert not self._resolved, "Resolvers should only be resolved once"
+        assert self._varying, "Resolvers without varying names must be fully resolved"
+        self._resolved = True
+
+        for target in self._targets:
+            self._calculate_target(target)
+
     @property
     def arguments(self):
         assert self._resolved, "Can't get arguments until they've been resolved"
@@ -802,23 +1045,8 @@ class Resolver:
         }
 
 
-def resolve_configuration(sources: List[Source], targets: List[Target]):
-
-    # Merge the sources into a big dictionary of setters + validators, ensuring
-    # that all setters are either strings or functions.
-    validate = list()
-    setters = dict()
-
-    # Merge all the config targets into one big group of setters for providing
-    # to the calculator
-    # TODO(cmaloney): The setter management / set code is very similar to that in ConfigTarget, they
-    # could probably be joined.
-    for source in sources:
-        for name, setter_list in source.setters.items():
-            setters.setdefault(name, list())
-            setters[name] += setter_list
-        validate += source.validate
-
+def merge_sources(sources: List[Source]):
+    """Merge the sources into a big dictionary of setters + list of validate functions."""
     # Re-enable this after sorting out how to have "optional" config targets which
     # add in extra "acceptable" parameters (SSH Config, AWS Advanced Template config, etc)
     # validate_all_arguments_match_parameters(mandatory_parameters, setters, user_arguments)
@@ -836,8 +1064,81 @@ def resolve_configuration(sources: List[Source], targets: List[Target]):
             setters[name] += setter_list
         validate += source.validate
 
+    return setters, validate
+
+
+class PartialResolution:
+    """Arguments shared by the resolutions of sources which only differ in the setters of the varying names.
+
+    Everything the targets need which doesn't depend on a varying name is resolved once, then reused by
+    each resolve_configuration(partial=...) which only has to calculate the rest."""
+
+    def __init__(self, sources: List[Source], targets: List[Target], varying: Set[str]):
+        setters, validate = merge_sources(sources)
+        self.varying = frozenset(varying)
+        self._setter_ids = self._get_setter_ids(setters)
+        self._validate_ids = [function_id(fn) for fn in validate]
+
+        resolver = Resolver(setters, validate, targets, varying=self.varying)
+        resolver.resolve_partial()
+
+        self.arguments = {
+            name: resolvable for name, resolvable in resolver.arguments.items() if resolvable.is_finalized}
+        self.errors = dict(resolver._errors)
+        self.unset = set(resolver._unset)
+        self.late = set(resolver.late)
+
+    def _get_setter_ids(self, setters):
+        return {name: [setter.make_id() for setter in setter_list]
+                for name, setter_list in setters.items() if name not in self.varying}
+
+    def can_resolve(self, setters, validate, targets) -> bool:
+        """True iff the arguments resolved here are what resolving with the given setters would give."""
+        if self._get_setter_ids(setters) != self._setter_ids:
+            log.debug("Setters of names which aren't varying changed, can't reuse partial resolution")
+            return False
+        if [function_id(fn) for fn in validate] != self._validate_ids:
+            log.debug("Validate functions changed, can't reuse partial resolution")
+            return False
+
+        # The targets may add switch validations for arguments which were already resolved.
+        for target in targets:
+            for name, validate_fn in target.yield_validates():
+                resolvable = self.arguments.get(name)
+                if resolvable is None or not resolvable.is_resolved:
+                    continue
+                try:
+                    validate_fn(resolvable.value)
+                except AssertionError:
+                    log.debug("Switch validation of %s fails, can't reuse partial resolution", name)
+                    return False
+
+        return True
+
+
+def resolve_configuration(
+        sources: List[Source],
+        targets: List[Target],
+        executor: Optional[Executor]=None,
+        partial: Optional[PartialResolution]=None,
+        profiler: Optional[Profiler]=None):
+    """Resolve targets using sources.
+
+    If an executor is given, multi-argument validate functions marked pure are
+    run on it concurrently once resolution is done. That only pays off when they
+    take far longer than sending their arguments to another process, which the
+    validate functions of a typical DC/OS config don't. If a partial resolution is
+    given, the arguments it resolved are reused when its sources only differ
+    from these in the setters of its varying names. If a profiler is given,
+    every setter and validate function call is recorded in it.
+    """
+    setters, validate = merge_sources(sources)
+
+    if partial is not None and not partial.can_resolve(setters, validate, targets):
+        partial = None
+
     # Use setters to calculate every required parameter
-    resolver = Resolver(setters, validate, targets)
+    resolver = Resolver(setters, validate, targets, profiler=profiler, executor=executor, partial=partial)
     resolver.resolve()
 
     def target_finalized(target):
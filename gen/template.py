@@ -15,12 +15,18 @@
 #   switch <identifier>
 #   case <string>:
 #   endswith
+import hashlib
+import logging
+import os
+import pickle
 from typing import Optional, Tuple
 
 from pkg_resources import resource_string
 
 import gen.internals
 
+log = logging.getLogger(__name__)
+
 identifier_valid_characters = 'abcdefghijklmnopqrstuvwxyz_0123456789'
 
 
@@ -502,11 +508,107 @@ def parse_str(text):
     return Template(ast)
 
 
-def parse_resources(filename):
+def parse_resource_text(filename, text):
     try:
-        return parse_str(resource_string(__name__, filename).decode())
+        return parse_str(text)
     except SyntaxError as ex:
         # Don't accidentally overwrite a previously set filename. Shouldn't
         # happen since no code this calls sets ex.filename.
         assert not ex.filename
         raise SyntaxError(ex.message, filename) from ex
+
+
+def parse_resources(filename):
+    text = resource_string(__name__, filename).decode()
+    bundle = get_bundle()
+    if bundle is not None:
+        template = bundle.get_template(filename, text)
+        if template is not None:
+            return template
+    return parse_resource_text(filename, text)
+
+
+def resource_target(filename):
+    """The target of the template in the resource filename (Same as parse_resources(filename).target_from_ast())."""
+    text = resource_string(__name__, filename).decode()
+    bundle = get_bundle()
+    if bundle is not None:
+        target = bundle.get_target(filename, text)
+        if target is not None:
+            return target
+    return parse_resource_text(filename, text).target_from_ast()
+
+
+# Path of a TemplateBundle for parse_resources() and resource_target() to use. Set in the installer's
+# docker image.
+BUNDLE_ENV = 'GEN_TEMPLATE_BUNDLE'
+
+# Oldest pickle protocol which is fast to load, readable by the Python 3.4+ running the installer
+# even if the bundle was written by a newer one.
+BUNDLE_PICKLE_PROTOCOL = 4
+
+_bundles = {}
+
+
+class TemplateBundle:
+    """Resource templates parsed ahead of time, along with the targets derived from them.
+
+    Each template is stored with a digest of the text it was parsed from, and only used while the
+    resource still has that text."""
+
+    def __init__(self, entries: dict=None):
+        # filename -> (text digest, Template, pickled Target). The targets are stored pickled since
+        # resolving finalizes them, so each use needs its own copy.
+        self.entries = entries if entries is not None else dict()
+
+    @staticmethod
+    def digest(text):
+        return hashlib.sha1(text.encode()).hexdigest()
+
+    def add(self, filename):
+        text = resource_string(__name__, filename).decode()
+        template = parse_resource_text(filename, text)
+        self.entries[filename] = (
+            self.digest(text),
+            template,
+            pickle.dumps(template.target_from_ast(), protocol=BUNDLE_PICKLE_PROTOCOL))
+
+    def __get(self, filename, text):
+        entry = self.entries.get(filename)
+        if entry is None:
+            return None
+        if entry[0] != self.digest(text):
+            log.warning("Template %s changed since it was bundled, parsing it", filename)
+            return None
+        return entry
+
+    def get_template(self, filename, text) -> Optional['Template']:
+        entry = self.__get(filename, text)
+        return entry[1] if entry is not None else None
+
+    def get_target(self, filename, text) -> Optional[gen.internals.Target]:
+        entry = self.__get(filename, text)
+        return pickle.loads(entry[2]) if entry is not None else None
+
+    def write(self, path):
+        with open(path, 'wb') as f:
+            pickle.dump(self.entries, f, protocol=BUNDLE_PICKLE_PROTOCOL)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            return cls(pickle.load(f))
+
+
+def get_bundle() -> Optional[TemplateBundle]:
+    """The TemplateBundle at the path in BUNDLE_ENV, if it's set and the bundle loads."""
+    path = os.environ.get(BUNDLE_ENV)
+    if not path:
+        return None
+    if path not in _bundles:
+        try:
+            _bundles[path] = TemplateBundle.load(path)
+        except Exception as ex:
+            log.warning("Unable to load template bundle %s, parsing templates instead: %s", path, ex)
+            _bundles[path] = None
+    return _bundles[path]
@@ -0,0 +1,114 @@
+"""Benchmark rendering the cloud templates against the text based transform they used to go through.
+
+Builds the real AWS advanced and Azure templates, recording the arguments each render function is
+called with, then times rendering those again with each implementation and checks both produce the
+same template.
+
+Usage: DCOS_IMAGE_COMMIT=... python -m gen.tests.benchmark_cloud_templates [repetitions]
+"""
+import json
+import os
+import sys
+import tempfile
+import timeit
+
+import yaml
+
+import gen
+import gen.build_deploy.aws as aws
+import gen.build_deploy.azure as azure
+import gen.build_deploy.util as util
+import gen.template
+from pkgpanda.util import split_by_token
+
+
+arguments = {
+    'bootstrap_url': 'https://example.com/repository',
+    'bootstrap_id': 'bootstrap_id',
+    'bootstrap_variant': '',
+    'package_ids': json.dumps(['package--version']),
+    'cloudformation_s3_url_full': 'https://example.com/repository/commit/sha-1',
+    'azure_download_url': 'https://example.com/azure'}
+
+
+def text_render_cloudformation(cf_template, **kwds):
+    def transform(line):
+        def _jsonify_literals(parts):
+            for part, is_ref in parts:
+                if is_ref:
+                    yield part
+                else:
+                    yield json.dumps(part)
+
+        return ', '.join(_jsonify_literals(split_by_token('{ ', ' }', line))) + ', "\\n",\n'
+
+    def transform_lines(text):
+        return ''.join(map(transform, text.splitlines())).rstrip(',\n')
+
+    return aws.render_cloudformation_transform(cf_template, transform_func=transform_lines, **kwds)
+
+
+def text_render_arm(arm_template, *cloud_configs):
+    def transform(cloud_config):
+        # The cloud config went through YAML text on its way to the transform.
+        cc_json = json.dumps(yaml.safe_load(gen.render_cloudconfig(cloud_config)), sort_keys=True)
+        return json.dumps(
+            "[base64(concat('#cloud-config\n\n', " +
+            ", ".join(part if is_param else "'{}'".format(part)
+                      for part, is_param in split_by_token('[[[', ']]]', cc_json, strip_token_decoration=True)) +
+            "))]")
+
+    template_json = json.loads(gen.template.parse_str(arm_template).render(dict(zip(
+        ['master_cloud_config', 'slave_cloud_config', 'slave_public_cloud_config'],
+        map(transform, cloud_configs)))))
+    template_json['variables']['DcosImageCommit'] = util.dcos_image_commit
+    template_json['variables']['TemplateGenerationDate'] = util.template_generation_date
+    return json.dumps(template_json)
+
+
+def record_calls(module, name):
+    calls = []
+    function = getattr(module, name)
+
+    def record(*args, **kwds):
+        calls.append((args, kwds))
+        return function(*args, **kwds)
+
+    setattr(module, name, record)
+    return function, calls
+
+
+def build_templates():
+    aws.validate_cf = lambda template_body: None
+    util.template_workers = 1
+    render_cloudformation, cloudformation_calls = record_calls(aws, 'render_cloudformation')
+    render_arm, arm_calls = record_calls(azure, 'render_arm')
+    with tempfile.TemporaryDirectory() as tmpdir:
+        os.chdir(tmpdir)
+        list(aws.gen_advanced_template(dict(arguments, provider='aws'), '', 'commit/sha-1', 'coreos'))
+        for varietal in ['dcos', 'acs']:
+            list(azure.make_template(3, dict(arguments, provider='azure'), varietal, ''))
+    return [
+        ('AWS advanced', render_cloudformation, text_render_cloudformation, cloudformation_calls),
+        ('Azure', render_arm, text_render_arm, arm_calls)]
+
+
+def main():
+    repetitions = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    for name, render, text_render, calls in build_templates():
+        for args, kwds in calls:
+            assert render(*args, **kwds) == text_render(*args, **kwds)
+
+        def time(function):
+            # Best of a few runs, the machine's noise only ever adds time.
+            return min(timeit.repeat(
+                lambda: [function(*args, **kwds) for args, kwds in calls], number=repetitions, repeat=5))
+
+        text_time = time(text_render)
+        render_time = time(render)
+        print('{}: {} templates x {}: text transform {:.3f}s, structured {:.3f}s ({:.1f}x)'.format(
+            name, len(calls), repetitions, text_time, render_time, text_time / render_time))
+
+
+if __name__ == '__main__':
+    main()
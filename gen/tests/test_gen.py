@@ -164,6 +164,68 @@ def test_extract_files_containing_late_variables():
         ])
 
 
+def test_late_placeholder_index():
+    placeholder = gen.internals.LATE_BIND_PLACEHOLDER.format
+    late_files = [
+        {
+            'path': '/foo',
+            'content': 'a={} b={}\n'.format(placeholder('a'), placeholder('b')),
+        },
+        {
+            'path': '/bar',
+            'content': placeholder('a'),
+            'permissions': '0600',
+        },
+        {
+            'path': '/pkginfo.json',
+            'content': '{}',
+        },
+    ]
+    late_values = {'a': 'A', 'b': 'some value'}
+    expected_package = {'package': [
+        {
+            'path': '/foo',
+            'content': 'a=A b=some value\n',
+        },
+        {
+            'path': '/bar',
+            'content': 'A',
+            'permissions': '0600',
+        },
+        {
+            'path': '/pkginfo.json',
+            'content': '{}',
+        },
+    ]}
+
+    index = gen.index_late_placeholders(late_files)
+    start_a = len('a=')
+    start_b = len('a={} b='.format(placeholder('a')))
+    assert index == {
+        '/foo': [
+            [start_a, start_a + len(placeholder('a')), 'a'],
+            [start_b, start_b + len(placeholder('b')), 'b'],
+        ],
+        '/bar': [[0, len(placeholder('a')), 'a']],
+        '/pkginfo.json': [],
+    }
+
+    # Resolving with and without the index gives the same result.
+    assert gen.resolve_late_package({'package': late_files, 'placeholders': index}, late_values) == expected_package
+    assert gen.resolve_late_package({'package': late_files}, late_values) == expected_package
+
+    # Unknown late values are an error either way.
+    with pytest.raises(Exception):
+        gen.resolve_late_package({'package': late_files, 'placeholders': index}, {'a': 'A'})
+    with pytest.raises(Exception):
+        gen.resolve_late_package({'package': late_files}, {'a': 'A'})
+
+    # An index which doesn't match the content is rejected.
+    bad_index = dict(index, **{'/bar': [[1, len(placeholder('a')), 'a']]})
+    with pytest.raises(Exception):
+        gen.resolve_late_package({'package': late_files, 'placeholders': bad_index}, late_values)
+
+
 def test_validate_downstream_entry():
     # Valid entries.
     gen.validate_downstream_entry({
@@ -1,4 +1,5 @@
 import json
+import tarfile
 
 import gen.build_deploy.aws
 
@@ -9,3 +10,73 @@ def test_gen_aws_mapping():
     assert len(result) == 9
     # check format of response
     assert result["ap-northeast-1"] == {'stable': gen.build_deploy.aws.region_to_ami_map['ap-northeast-1']['stable']}
+
+
+def test_cloud_config_join_elements():
+    cloud_config = 'region: { "Ref" : "AWS::Region" }\n\n{ "Ref" : "AWS::StackName" } stack\nlast line'
+    assert list(gen.build_deploy.aws.cloud_config_join_elements(cloud_config)) == [
+        'region: ', {'Ref': 'AWS::Region'}, '\n',
+        '', '\n',
+        {'Ref': 'AWS::StackName'}, ' stack', '\n',
+        'last line', '\n']
+    assert list(gen.build_deploy.aws.cloud_config_join_elements('')) == []
+
+
+def test_render_cloudformation():
+    cf_template = """{
+      "Metadata": {},
+      "UserData": { "Fn::Join": ["", ["#cloud-config\\n", {{ cloud_config }}, "end"]] }
+    }"""
+    cloudformation = json.loads(gen.build_deploy.aws.render_cloudformation(
+        cf_template,
+        cloud_config='name: "{ "Ref" : "AWS::StackName" }"\n'))
+    assert cloudformation['UserData'] == {'Fn::Join': ['', [
+        '#cloud-config\n', 'name: "', {'Ref': 'AWS::StackName'}, '"', '\n', 'end']]}
+    assert cloudformation['Metadata']['DcosImageCommit'] == gen.build_deploy.util.dcos_image_commit
+
+
+def test_advanced_templates_in_parallel(monkeypatch, tmpdir):
+    # The templates are made in tmpdir, where the commit can't be found with git.
+    monkeypatch.setenv('DCOS_IMAGE_COMMIT', 'deadbeef')
+    monkeypatch.setattr(gen.build_deploy.aws, 'validate_cf', lambda template_body: None)
+    arguments = {
+        'bootstrap_url': 'https://example.com/repository',
+        'provider': 'aws',
+        'bootstrap_id': 'bootstrap_id',
+        'bootstrap_variant': '',
+        'package_ids': json.dumps(['package--version']),
+        'cloudformation_s3_url_full': 'https://example.com/repository/commit/sha-1'}
+
+    def make_templates(max_workers):
+        monkeypatch.setattr(gen.build_deploy.util, 'template_workers', max_workers)
+        with tmpdir.as_cwd():
+            return list(gen.build_deploy.aws.gen_advanced_template(arguments, '', 'commit/sha-1', 'coreos'))
+
+    # Artifacts come back in the same order whether built in-process or by a pool of workers.
+    serial = make_templates(1)
+    assert [artifact.get('channel_path') for artifact in serial if 'channel_path' in artifact] == [
+        'cloudformation/coreos-advanced-master-1.json',
+        'cloudformation/coreos-zen-1.json',
+        'cloudformation/coreos-advanced-master-3.json',
+        'cloudformation/coreos-zen-3.json',
+        'cloudformation/coreos-advanced-master-5.json',
+        'cloudformation/coreos-zen-5.json',
+        'cloudformation/coreos-advanced-master-7.json',
+        'cloudformation/coreos-zen-7.json',
+        'cloudformation/coreos-advanced-priv-agent.json',
+        'cloudformation/coreos-advanced-pub-agent.json']
+    parallel = make_templates(4)
+    assert parallel == serial
+    assert gen.build_deploy.aws._advanced_partials == {}
+
+    # The packages get the same mtime whichever worker made them.
+    package_mtimes = set()
+    for artifact in parallel:
+        if artifact.get('local_path', '').endswith('.tar.xz'):
+            with tarfile.open(str(tmpdir.join(artifact['local_path']))) as tar:
+                package_mtimes |= {member.mtime for member in tar.getmembers()}
+    assert len(package_mtimes) == 1
+
+    # Sharing the resolution of what the templates have in common doesn't change them.
+    monkeypatch.setattr(gen.build_deploy.aws, 'get_advanced_partial', lambda variant_args: None)
+    assert make_templates(1) == serial
@@ -1,3 +1,6 @@
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from copy import deepcopy
 
 import pytest
@@ -146,3 +149,207 @@ def test_source_secrets():
     extra_secret_entry['secret'].append('d')
     with pytest.raises(Exception):
         Source(extra_secret_entry)
+
+
+def test_profile_resolution():
+    calls = []
+
+    def calculate_b(a):
+        calls.append(a)
+        return a + '_b'
+
+    def validate_b(b):
+        assert b == 'a_str_b'
+
+    source = Source({
+        'validate': [validate_b],
+        'must': {
+            'a': 'a_str',
+            'b': calculate_b,
+        },
+    })
+
+    # Profiling is opt-in and has no effect on resolution.
+    resolver = gen.internals.resolve_configuration([source], [Target({'a', 'b'})])
+    assert resolver.status_dict == {'status': 'ok'}
+
+    profiler = gen.internals.Profiler()
+    resolver = gen.internals.resolve_configuration([source], [Target({'a', 'b'})], profiler=profiler)
+    assert resolver.status_dict == {'status': 'ok'}
+    assert calls == ['a_str', 'a_str']
+
+    assert profiler.profiles.keys() == {('setter', 'a'), ('setter', 'b'), ('validate', 'validate_b(b)')}
+    setter_b = profiler.profiles[('setter', 'b')]
+    assert setter_b.calls == 1
+    assert setter_b.input_size == len('a_str')
+    assert setter_b.total_time >= 0
+    assert profiler.profiles[('validate', 'validate_b(b)')].input_size == len('a_str_b')
+
+    report = profiler.report().splitlines()
+    assert len(report) == 4
+    assert [p.total_time for p in profiler.sorted_profiles()] == sorted(
+        (p.total_time for p in profiler.profiles.values()), reverse=True)
+
+    # Only the resolutions given the profiler are recorded.
+    gen.internals.resolve_configuration([source], [Target({'a', 'b'})])
+    assert setter_b.calls == 1
+
+
+def test_validate_with_executor():
+    validate_thread = dict()
+
+    @gen.internals.pure
+    def validate_a_b(a, b):
+        validate_thread['a_b'] = threading.get_ident()
+        if a == b:
+            raise AssertionError('a and b must differ')
+
+    @gen.internals.pure
+    def validate_b_c(b, c):
+        validate_thread['b_c'] = threading.get_ident()
+        if b == c:
+            raise AssertionError('b and c must differ')
+
+    def validate_a_c(a, c):
+        validate_thread['a_c'] = threading.get_ident()
+        if a == c:
+            raise AssertionError('a and c must differ')
+
+    source = Source({
+        'validate': [validate_a_b, validate_b_c, validate_a_c],
+        'must': {
+            'a': 'x',
+            'b': 'x',
+            'c': 'x',
+        },
+    })
+
+    expected_errors = [
+        (frozenset({'a', 'b'}), 'a and b must differ'),
+        (frozenset({'b', 'c'}), 'b and c must differ'),
+        (frozenset({'a', 'c'}), 'a and c must differ'),
+    ]
+
+    resolver = gen.internals.resolve_configuration([source], [Target({'a', 'b', 'c'})])
+    assert list(resolver._errors.items()) == expected_errors
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        resolver = gen.internals.resolve_configuration([source], [Target({'a', 'b', 'c'})], executor)
+    # Only pure validate functions are handed to the executor.
+    assert validate_thread['a_b'] != threading.get_ident()
+    assert validate_thread['b_c'] != threading.get_ident()
+    assert validate_thread['a_c'] == threading.get_ident()
+
+    # Errors come out in the same order regardless of which validate function finished first.
+    assert list(resolver._errors.items()) == expected_errors
+
+
+@gen.internals.pure
+def validate_c_in_process(c):
+    if c != 'c_str':
+        raise AssertionError('c checked in {}'.format(os.getpid()))
+
+
+@gen.internals.pure
+def validate_a_b_in_process(a, b):
+    if a == b:
+        raise AssertionError('a and b checked in {}'.format(os.getpid()))
+
+
+def test_validate_with_process_pool():
+    def calculate_b(a):
+        return a
+
+    source = Source({
+        'validate': [validate_c_in_process, validate_a_b_in_process],
+        'must': {
+            'a': 'x',
+            'b': calculate_b,
+            'c': 'y',
+        },
+    })
+
+    # Both single and multi-argument validate functions run in the pool's processes.
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        resolver = gen.internals.resolve_configuration([source], [Target({'a', 'b', 'c'})], executor)
+    assert list(resolver._errors.keys()) == ['c', frozenset({'a', 'b'})]
+    for message in resolver._errors.values():
+        pid = int(message.rsplit(' ', 1)[1])
+        assert pid != os.getpid()
+
+    source = Source({
+        'validate': [validate_c_in_process, validate_a_b_in_process],
+        'must': {
+            'a': 'a_str',
+            'b': 'b_str',
+            'c': 'c_str',
+        },
+    })
+    profiler = gen.internals.Profiler()
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        resolver = gen.internals.resolve_configuration(
+            [source], [Target({'a', 'b', 'c'})], executor, profiler=profiler)
+    assert resolver.status_dict == {'status': 'ok'}
+    # Calls made in other processes are still profiled.
+    assert profiler.profiles.keys() == {
+        ('setter', 'a'), ('setter', 'b'), ('setter', 'c'),
+        ('validate', 'validate_c_in_process(c)'), ('validate', 'validate_a_b_in_process(a, b)')}
+
+
+def test_partial_resolution():
+    calls = []
+
+    def calculate_b(a):
+        calls.append('b')
+        return a + '_b'
+
+    def calculate_c(b, v):
+        calls.append('c')
+        return b + '_' + v
+
+    def calculate_e(d):
+        calls.append('e')
+        return d + '_e'
+
+    base = Source({
+        'must': {
+            'a': 'a_str',
+            'b': calculate_b,
+            'c': calculate_c,
+            'e': calculate_e,
+        },
+        'conditional': {
+            'v': {
+                'v_1': {'must': {'d': 'd_1'}},
+                'v_2': {'must': {'d': 'd_2'}},
+            }
+        }
+    })
+
+    def get_targets():
+        return [Target({'a', 'b', 'c', 'e'})]
+
+    partial = gen.internals.PartialResolution([base], get_targets(), {'v'})
+    assert partial.arguments.keys() == {'a', 'b'}
+    assert calls == ['b']
+
+    # Each full resolution only calculates what depends on the varying name.
+    for value in ['v_1', 'v_2']:
+        variant = Source()
+        variant.add_must('v', value)
+        resolver = gen.internals.resolve_configuration([base, variant], get_targets(), partial=partial)
+        assert resolver.status_dict == {'status': 'ok'}
+        assert resolver.arguments['c'].value == 'a_str_b_' + value
+        assert resolver.arguments['e'].value == 'd_{}_e'.format(value[-1])
+    assert sorted(calls) == ['b', 'c', 'c', 'e', 'e']
+
+    # Sources which set names other than the varying ones differently can't use the partial resolution.
+    calls.clear()
+    variant = Source()
+    variant.add_must('v', 'v_1')
+    variant.add_must('a', 'other_a')
+    resolver = gen.internals.resolve_configuration([base, variant], get_targets(), partial=partial)
+    assert resolver.status_dict['status'] == 'errors'
+    assert 'a' in resolver.status_dict['errors']
+    # Everything is calculated again, b depends on a so it isn't.
+    assert calls == ['e']
@@ -1,5 +1,6 @@
 import pytest
 
+import gen
 import gen.template
 from gen.internals import Scope, Target
 from gen.template import For, parse_str, Replacement, Switch, Tokenizer, UnsetParameter
@@ -150,3 +151,27 @@ def test_render():
             "btcelsefoo")
     with pytest.raises(UnsetParameter):
         parse_str("{% for a in b %}{{ a }}{% endfor %}else{{ a }}").render({"b": ['b', 't', 'c']})
+
+
+def test_template_bundle(tmpdir, monkeypatch):
+    filenames = gen.default_template_filenames
+    templates = {filename: gen.template.parse_resources(filename) for filename in filenames}
+    bundle_path = str(tmpdir.join('bundle.pickle'))
+    gen.write_template_bundle(bundle_path)
+    monkeypatch.setenv(gen.template.BUNDLE_ENV, bundle_path)
+
+    def fail_parse(text):
+        raise AssertionError('Bundled templates should not be parsed')
+
+    monkeypatch.setattr(gen.template, 'parse_str', fail_parse)
+    for filename in filenames:
+        assert gen.template.parse_resources(filename) == templates[filename]
+        target = gen.template.resource_target(filename)
+        assert target == templates[filename].target_from_ast()
+        # Each target is a new copy, since resolving one finalizes it.
+        assert target is not gen.template.resource_target(filename)
+
+    # Templates which changed since they were bundled are parsed again.
+    monkeypatch.setattr(gen.template, 'resource_string', lambda package, filename: b'{{ changed }}')
+    monkeypatch.setattr(gen.template, 'parse_str', parse_str)
+    assert gen.template.resource_target(gen.dcos_config_yaml) == Target({'changed'})
@@ -1,7 +1,10 @@
+import json
 import logging
+from concurrent.futures import ProcessPoolExecutor
 
 import gen
 from gen.build_deploy.bash import onprem_source
+from gen.tests.utils import make_arguments
 
 
 # TODO(cmaloney): Should be able to pass an exact tree to gen so that we can test
@@ -76,3 +79,32 @@ def test_error_during_validate_calico_network(monkeypatch):
         },
         'unset': set()
     }
+
+
+def test_validate_profile():
+    profiler = gen.internals.Profiler()
+    assert gen.validate(arguments=make_arguments({}), profiler=profiler) == {'status': 'ok'}
+
+    assert ('setter', 'ip_detect_contents') in profiler.profiles
+    assert ('validate', 'validate_master_list(master_list)') in profiler.profiles
+    assert profiler.profiles[('validate', 'validate_master_list(master_list)')].calls == 1
+    assert len(profiler.report().splitlines()) == len(profiler.profiles) + 1
+
+
+def test_validate_with_executor():
+    # Overlaps the default dcos overlay subnet 9.0.0.0/8.
+    arguments = make_arguments({
+        'calico_network_cidr': '9.1.0.0/16',
+        'master_list': json.dumps(['10.0.{}.{}'.format(i // 250, i % 250 + 1) for i in range(1000)]),
+    })
+    with ProcessPoolExecutor(max_workers=4) as executor:
+        result = gen.validate(arguments=arguments, executor=executor)
+    assert result == gen.validate(arguments=arguments)
+    assert result['status'] == 'errors'
+    assert 'overlaps calico network' in result['errors']['calico_network_cidr']['message']
+
+    arguments['master_list'] = json.dumps(['10.0.0.1', '10.0.0.1'])
+    with ProcessPoolExecutor(max_workers=4) as executor:
+        result = gen.validate(arguments=arguments, executor=executor)
+    assert result == gen.validate(arguments=arguments)
+    assert 'master_list' in result['errors']
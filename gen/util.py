@@ -4,7 +4,12 @@ import os.path
 
 from tempfile import TemporaryDirectory
 
-from pkgpanda.util import make_tar
+from pkgpanda.util import make_tar, make_tar_from_files
+
+# The mtime make_pkgpanda_package_from_files() gives everything in a package (None: The current time).
+# Set for the whole of a batch of generate() calls (See gen.build_deploy.util.generate_artifacts()) so
+# the packages are the same whichever process makes them.
+package_mtime = None
 
 
 def pkgpanda_package_tmpdir():
@@ -24,3 +29,16 @@ def make_pkgpanda_package(contents_dir, package_filename):
 
     make_tar(package_filename, contents_dir)
     logging.info("Package filename: %s", package_filename)
+
+
+def make_pkgpanda_package_from_files(files, package_filename):
+    """Build a package from in-memory files the same way make_pkgpanda_package() builds it from a folder.
+
+    files maps paths within the package to (content bytes, mode) tuples.
+    """
+    # Ensure the output directory exists
+    if os.path.dirname(package_filename):
+        os.makedirs(os.path.dirname(package_filename), exist_ok=True)
+
+    make_tar_from_files(package_filename, files, dir_mode=0o755, mtime=package_mtime)
+    logging.info("Package filename: %s", package_filename)
@@ -374,7 +374,7 @@ def validate_compatible(packages, roles):
 
 
 # TODO(cmaloney): Add a github fetcher, useful for grabbing config tarballs.
-def requests_fetcher(base_url, id_str, target, work_dir):
+def requests_fetcher(base_url, id_str, target, work_dir, session=None):
     assert base_url
     assert type(id_str) == str
     id = PackageId(id_str)
@@ -386,7 +386,7 @@ def requests_fetcher(base_url, id_str, target, work_dir):
     # TODO(cmaloney): Use a private tmp directory so there is no chance of a user
     # intercepting the tarball + other validation data locally.
     with tempfile.NamedTemporaryFile(suffix=".tar.xz") as file:
-        download(file.name, url, work_dir, rm_on_error=False)
+        download(file.name, url, work_dir, rm_on_error=False, session=session)
         extract_tarball(file.name, target)
 
 
@@ -510,14 +510,34 @@ class ConflictingFile(ValidationError):
 # Create folders and symlink files inside the folders. Allows multiple
 # packages to have the same folder and provide it publicly.
 def symlink_tree(src, dest):
-    for name in os.listdir(src):
+    link_tree(src, dest, list_tree(src))
+
+
+def list_tree(src):
+    """The entries symlink_tree(src, dest) makes, as paths relative to src in the order it makes them.
+
+    Directories (Which are made rather than symlinked) end with a '/'."""
+    entries = []
+    for name in sorted(os.listdir(src)):
         src_path = os.path.join(src, name)
-        dest_path = os.path.join(dest, name)
         # Symlink files and symlinks directly. For directories make a
         # real directory and symlink everything inside.
         # NOTE: We could relax this and follow symlinks, but then we
         # need to be careful about recursive filesystem layouts.
         if os.path.isdir(src_path) and not os.path.islink(src_path):
+            entries.append(name + '/')
+            entries += [name + '/' + entry for entry in list_tree(src_path)]
+        else:
+            entries.append(name)
+    return entries
+
+
+def link_tree(src, dest, entries):
+    """Make the entries of src listed by list_tree() inside dest."""
+    for entry in entries:
+        src_path = os.path.join(src, entry.rstrip('/'))
+        dest_path = os.path.join(dest, entry.rstrip('/'))
+        if entry.endswith('/'):
             if os.path.exists(dest_path):
                 # We can only merge a directory into a directory.
                 # We won't merge into a symlink directory because that could
@@ -528,9 +548,6 @@ def symlink_tree(src, dest):
                             src_path, dest_path))
             else:
                 os.makedirs(dest_path)
-
-            # Recurse into the directory symlinking everything so long as the directory isn't
-            symlink_tree(src_path, dest_path)
         else:
             try:
                 os.symlink(src_path, dest_path)
@@ -538,6 +555,63 @@ def symlink_tree(src, dest):
                 raise ConflictingFile(src_path, dest_path, ex) from ex
 
 
+class ActivationPlan:
+    """The parts of activating each package which only depend on the package's contents.
+
+    For each package id that's the list_tree() of every directory in the package which can be
+    linked into the well known directories (Including role specific ones), and the names of the
+    systemd services the package ships. Packages never change for a given id, except late packages
+    (Version "setup") which are rendered on each host, so those are never saved in a plan.
+
+    make_bootstrap_tarball() saves the plan for the packages in a bootstrap tarball, so activating
+    them on a new host only has to look through the packages added on top of those."""
+
+    version = 1
+    linked_dirs = ("bin", "etc", "include", "lib", "dcos.target.wants")
+
+    def __init__(self, packages=None):
+        self.__packages = packages if packages is not None else {}
+
+    @classmethod
+    def load(cls, filename):
+        """The plan saved at filename. An empty plan if there isn't one (Or it's from another version)."""
+        plan = if_exists(load_json, filename)
+        if plan is None or plan.get('version') != cls.version:
+            return cls()
+        return cls(plan['packages'])
+
+    def save(self, filename):
+        write_json(filename, {
+            'version': self.version,
+            'packages': {
+                id: planned for id, planned in self.__packages.items() if PackageId(id).version != "setup"},
+        })
+
+    def __planned(self, package):
+        planned = self.__packages.get(str(package.id))
+        if planned is None:
+            dirs = {}
+            for name in os.listdir(package.path):
+                path = os.path.join(package.path, name)
+                if name.partition('_')[0] in self.linked_dirs and os.path.isdir(path):
+                    dirs[name] = list_tree(path)
+            planned = self.__packages[str(package.id)] = {'dirs': dirs, 'services': None}
+        return planned
+
+    def tree(self, package, dir_name):
+        """list_tree() of dir_name inside package, None if the package has no such directory."""
+        return self.__planned(package)['dirs'].get(dir_name)
+
+    def service_names(self, package):
+        planned = self.__planned(package)
+        if planned['services'] is None:
+            planned['services'] = sorted(
+                os.path.splitext(filename)[0]
+                for _, _, filenames in os.walk(package.path)
+                for filename in filenames if filename.endswith(".service"))
+        return planned['services']
+
+
 # Manages a systemd-sysusers user set.
 # Can have users
 class UserManagement:
@@ -771,7 +845,14 @@ class Install:
 
     # Builds new working directories for the new active set, then swaps it into place as atomically as possible.
 
-    def activate(self, packages):
+    def activate(self, packages, plan=None):
+        """Make packages the active set.
+
+        What only depends on the contents of each package is looked up in plan (An ActivationPlan),
+        which has anything it's missing added to it."""
+        if plan is None:
+            plan = ActivationPlan()
+
         # Ensure the new set is reasonable.
         validate_compatible(packages, self.__roles)
 
@@ -801,11 +882,12 @@ class Install:
         for name in new_dirs:
             os.makedirs(name)
 
-        def symlink_all(src, dest):
-            if not os.path.isdir(src):
+        def symlink_all(package, dir_name, dest):
+            entries = plan.tree(package, dir_name)
+            if entries is None:
                 return
 
-            symlink_tree(src, dest)
+            link_tree(os.path.join(package.path, dir_name), dest, entries)
 
         log.info("Set the new LD_LIBRARY_PATH, PATH.")
         env_contents = env_header.format("/opt/mesosphere" if self.__fake_path else self.__root)
@@ -818,21 +900,6 @@ class Install:
         log.info("Building up the set of users.")
         sysusers = UserManagement(self.__manage_users, self.__add_users)
 
-        def _get_service_files(_dir):
-            service_files = []
-            for root, directories, filenames in os.walk(_dir):
-                for filename in filter(lambda name: name.endswith(".service"), filenames):
-                    service_files.append(os.path.join(root, filename))
-            return service_files
-
-        def _get_service_names(_dir):
-            service_files = list(map(os.path.basename, _get_service_files(_dir)))
-
-            if not service_files:
-                return []
-
-            return list(map(lambda name: os.path.splitext(name)[0], service_files))
-
         # Add the folders, config in each package.
         for package in packages:
             # Package folders
@@ -843,18 +910,16 @@ class Install:
             # while inside the packages they are always top level directories.
             for new, dir_name in zip(new_dirs, self.__well_known_dirs):
                 dir_name = os.path.basename(dir_name)
-                pkg_dir = os.path.join(package.path, dir_name)
 
                 assert os.path.isabs(new)
-                assert os.path.isabs(pkg_dir)
+                assert os.path.isabs(package.path)
 
                 try:
-                    symlink_all(pkg_dir, new)
+                    symlink_all(package, dir_name, new)
 
                     # Symlink all applicable role-based config
                     for role in self.__roles:
-                        role_dir = os.path.join(package.path, "{0}_{1}".format(dir_name, role))
-                        symlink_all(role_dir, new)
+                        symlink_all(package, "{0}_{1}".format(dir_name, role), new)
 
                 except ConflictingFile as ex:
                     raise ValidationError("Two packages are trying to install the same file {0} or "
@@ -905,7 +970,7 @@ class Install:
                         check_call(['chown', '-R', str(uid), state_dir_path])
 
             if package.sysctl:
-                service_names = _get_service_names(package.path)
+                service_names = plan.service_names(package)
 
                 if not service_names:
                     raise ValueError("service name required for sysctl could not be determined for {package}".format(
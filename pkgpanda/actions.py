@@ -2,17 +2,19 @@ import logging
 import os
 import sys
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from subprocess import CalledProcessError, check_call
 from typing import List
 
-from gen import do_gen_package, resolve_late_package
-from pkgpanda import PackageId, requests_fetcher
-from pkgpanda.constants import (DCOS_SERVICE_CONFIGURATION_PATH,
+from gen import resolve_late_package, write_gen_package
+from pkgpanda import ActivationPlan, PackageId, requests_fetcher
+from pkgpanda.constants import (ACTIVATION_PLAN_FILE,
+                                DCOS_SERVICE_CONFIGURATION_PATH,
                                 install_root,
                                 SYSCTL_SETTING_KEY)
 from pkgpanda.exceptions import FetchError, PackageConflict, ValidationError
-from pkgpanda.util import (download, extract_tarball, if_exists, load_json,
-                           load_string, load_yaml, write_string)
+from pkgpanda.util import (download, extract_tarball, get_requests_retry_session, if_exists,
+                           load_json, load_string, load_yaml, write_string)
 
 DCOS_TARGET_CONTENTS = """[Install]
 WantedBy=multi-user.target
@@ -20,6 +22,9 @@ WantedBy=multi-user.target
 
 log = logging.getLogger(__name__)
 
+# Number of downloads _do_bootstrap() runs at once.
+BOOTSTRAP_FETCH_WORKERS = 4
+
 
 def activate_packages(install, repository, package_ids, systemd, block_systemd):
     """Replace the active package set with package_ids.
@@ -193,10 +198,10 @@ def _start_dcos_target(block_systemd):
     check_call(["systemctl", "start", "dcos.target"] + no_block)
 
 
-def _get_package_list(package_list_id: str, repository_url: str) -> List[str]:
+def _get_package_list(package_list_id: str, repository_url: str, session=None) -> List[str]:
     package_list_url = repository_url + '/package_lists/{}.package_list.json'.format(package_list_id)
     with tempfile.NamedTemporaryFile() as f:
-        download(f.name, package_list_url, os.getcwd(), rm_on_error=False)
+        download(f.name, package_list_url, os.getcwd(), rm_on_error=False, session=session)
         package_list = load_json(f.name)
 
     if not isinstance(package_list, list):
@@ -207,15 +212,58 @@ def _get_package_list(package_list_id: str, repository_url: str) -> List[str]:
     return package_list
 
 
+def _get_late_package(pkg_id: PackageId, repository_url: str, session=None) -> dict:
+    with tempfile.NamedTemporaryFile() as f:
+        download(
+            f.name,
+            repository_url + '/packages/{0}/{1}.dcos_config'.format(pkg_id.name, str(pkg_id)),
+            os.getcwd(),
+            rm_on_error=False,
+            session=session,
+        )
+        return load_yaml(f.name)
+
+
+def _fetch_cluster_packages(install, repository, repository_url, fetcher, session, submit):
+    """Submit fetching the cluster packages which aren't local, returning them all."""
+    package_list_filename = install.get_config_filename("setup-flags/cluster-package-list")
+    print("Checking for cluster packages in:", package_list_filename)
+    package_list_id = if_exists(load_string, package_list_filename)
+    if not package_list_id:
+        print("No cluster-packages specified")
+        return []
+
+    print("Cluster package list:", package_list_id)
+    cluster_packages = _get_package_list(package_list_id, repository_url, session)
+    print("Loading cluster-packages: {}".format(cluster_packages))
+
+    # Validate the package ids
+    for package_id_str in cluster_packages:
+        PackageId(package_id_str)
+
+    # Fetch the packages if not local
+    for package_id_str in sorted(set(cluster_packages)):
+        if not repository.has_package(package_id_str):
+            submit(repository.add, fetcher, package_id_str)
+
+    return cluster_packages
+
+
 def _do_bootstrap(install, repository):
+    """Add the packages to activate to the repository, then activate them.
+
+    The package list and late package are downloaded at the same time, and the packages start
+    downloading (BOOTSTRAP_FETCH_WORKERS at a time, over one HTTP session) as soon as the list of
+    them is known, while the late package is rendered straight into the repository."""
     # These files should be set by the environment which initially builds
     # the host (cloud-init).
     repository_url = if_exists(load_string, install.get_config_filename("setup-flags/repository-url"))
+    session = get_requests_retry_session()
 
     def fetcher(id, target):
         if repository_url is None:
             raise ValidationError("ERROR: Non-local package {} but no repository url given.".format(id))
-        return requests_fetcher(repository_url, id, target, os.getcwd())
+        return requests_fetcher(repository_url, id, target, os.getcwd(), session=session)
 
     setup_pkg_dir = install.get_config_filename("setup-packages")
     if os.path.exists(setup_pkg_dir):
@@ -223,8 +271,6 @@ def _do_bootstrap(install, repository):
             "setup-packages is no longer supported. It's functionality has been replaced with late "
             "binding packages. Found setup packages dir: {}".format(setup_pkg_dir))
 
-    setup_packages_to_activate = []
-
     # If the host has late config values, build the late config package from them.
     late_config = if_exists(load_yaml, install.get_config_filename("setup-flags/late-config.yaml"))
     if late_config:
@@ -239,70 +285,64 @@ def _do_bootstrap(install, repository):
         if pkg_id.version != "setup":
             raise ValidationError("Late package must have the version setup. Bad package: {}".format(pkg_id_str))
 
-        # Collect the late config package.
-        with tempfile.NamedTemporaryFile() as f:
-            download(
-                f.name,
-                repository_url + '/packages/{0}/{1}.dcos_config'.format(pkg_id.name, pkg_id_str),
-                os.getcwd(),
-                rm_on_error=False,
-            )
-            late_package = load_yaml(f.name)
-
-        # Resolve the late package using the bound late config values.
-        final_late_package = resolve_late_package(late_package, late_values)
-
-        # Render the package onto the filesystem and add it to the package
-        # repository.
-        with tempfile.NamedTemporaryFile() as f:
-            do_gen_package(final_late_package, f.name)
-            repository.add(lambda _, target: extract_tarball(f.name, target), pkg_id_str)
-        setup_packages_to_activate.append(pkg_id_str)
-
-    # If active.json is set on the host, use that as the set of packages to
-    # activate. Otherwise just use the set of currently active packages (those
-    # active in the bootstrap tarball)
-    to_activate = None
-    active_path = install.get_config_filename("setup-flags/active.json")
-    if os.path.exists(active_path):
-        print("Loaded active packages from", active_path)
-        to_activate = load_json(active_path)
-
-        # Ensure all packages are local
-        print("Ensuring all packages in active set {} are local".format(",".join(to_activate)))
-        for package in to_activate:
-            repository.add(fetcher, package)
-    else:
-        print("Calculated active packages from bootstrap tarball")
-        to_activate = list(install.get_active())
-
-        package_list_filename = install.get_config_filename("setup-flags/cluster-package-list")
-        print("Checking for cluster packages in:", package_list_filename)
-        package_list_id = if_exists(load_string, package_list_filename)
-        if package_list_id:
-            print("Cluster package list:", package_list_id)
-            cluster_packages = _get_package_list(package_list_id, repository_url)
-            print("Loading cluster-packages: {}".format(cluster_packages))
-
-            for package_id_str in cluster_packages:
-                # Validate the package ids
-                pkg_id = PackageId(package_id_str)
-
-                # Fetch the packages if not local
-                if not repository.has_package(package_id_str):
-                    repository.add(fetcher, package_id_str)
-
-                # Add the package to the set to activate
-                setup_packages_to_activate.append(package_id_str)
-        else:
-            print("No cluster-packages specified")
+    setup_packages_to_activate = []
+    futures = []
+
+    def submit(fn, *args):
+        future = executor.submit(fn, *args)
+        futures.append(future)
+        return future
+
+    with ThreadPoolExecutor(max_workers=BOOTSTRAP_FETCH_WORKERS) as executor:
+        try:
+            # Collect the late config package.
+            if late_config:
+                late_package_future = submit(_get_late_package, pkg_id, repository_url, session)
+
+            # If active.json is set on the host, use that as the set of packages to
+            # activate. Otherwise just use the set of currently active packages (those
+            # active in the bootstrap tarball)
+            to_activate = None
+            active_path = install.get_config_filename("setup-flags/active.json")
+            if os.path.exists(active_path):
+                print("Loaded active packages from", active_path)
+                to_activate = load_json(active_path)
+
+                # Ensure all packages are local
+                print("Ensuring all packages in active set {} are local".format(",".join(to_activate)))
+                for package in sorted(set(to_activate)):
+                    submit(repository.add, fetcher, package)
+            else:
+                print("Calculated active packages from bootstrap tarball")
+                to_activate = list(install.get_active())
+                setup_packages_to_activate += _fetch_cluster_packages(
+                    install, repository, repository_url, fetcher, session, submit)
+
+            if late_config:
+                # Resolve the late package using the bound late config values.
+                final_late_package = resolve_late_package(late_package_future.result(), late_values)
+
+                # Render the package straight into the package repository.
+                repository.add(lambda _, target: write_gen_package(final_late_package, target), pkg_id_str)
+                setup_packages_to_activate.append(pkg_id_str)
+
+            for future in futures:
+                future.result()
+        except BaseException:
+            # Don't start any more downloads, only wait for the ones in progress.
+            for future in futures:
+                future.cancel()
+            raise
 
     # Calculate the full set of final packages (Explicit activations + setup packages).
     # De-duplicate using a set.
     to_activate = list(set(to_activate + setup_packages_to_activate))
 
+    # Reuse the activation plan the bootstrap tarball was built with for the packages in it.
+    plan = ActivationPlan.load(os.path.join(install.root, ACTIVATION_PLAN_FILE))
+
     print("Activating packages")
-    install.activate(repository.load_packages(to_activate))
+    install.activate(repository.load_packages(to_activate), plan)
 
 
 def _apply_sysctl(setting, service):
@@ -13,9 +13,9 @@ from os.path import exists
 import pkgpanda.build.constants
 import pkgpanda.build.src_fetchers
 from pkgpanda import expand_require as expand_require_exceptions
-from pkgpanda import Install, PackageId, Repository
+from pkgpanda import ActivationPlan, Install, PackageId, Repository
 from pkgpanda.actions import add_package_file
-from pkgpanda.constants import install_root, PKG_DIR, RESERVED_UNIT_NAMES
+from pkgpanda.constants import ACTIVATION_PLAN_FILE, install_root, PKG_DIR, RESERVED_UNIT_NAMES
 from pkgpanda.exceptions import FetchError, PackageError, ValidationError
 from pkgpanda.subprocess import CalledProcessError, check_call, check_output
 from pkgpanda.util import (check_forbidden_services, download_atomic,
@@ -608,7 +608,15 @@ def make_bootstrap_tarball(package_store, packages, variant):
         skip_systemd_dirs=True,
         manage_users=False,
         manage_state_dir=False)
-    install.activate(repository.load_packages(pkg_ids))
+    packages = repository.load_packages(pkg_ids)
+    plan = ActivationPlan()
+    install.activate(packages, plan)
+
+    # Save the activation plan for the packages (Including the services of packages activating didn't need
+    # to look for) so activating them again on each host only has to look through the packages it adds.
+    for package in packages:
+        plan.service_names(package)
+    plan.save(os.path.join(pkgpanda_root, ACTIVATION_PLAN_FILE))
 
     # Mark the tarball as a bootstrap tarball/filesystem so that
     # dcos-setup.service will fire.
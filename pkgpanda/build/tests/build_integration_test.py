@@ -174,6 +174,7 @@ def test_bootstrap(tmpdir):
         assert merged_files == {
             './',
             './active.buildinfo.full.json',
+            './active.plan.json',
             './bootstrap',
             './environment',
             './environment.export',
@@ -10,7 +10,7 @@ Usage:
   pkgpanda remove <id>... [options]
   pkgpanda setup [options]
   pkgpanda uninstall [options]
-  pkgpanda check [--list] [options]
+  pkgpanda check [--list] [--json] [--workers=<n>] [--timeout=<seconds>] [options]
 
 Options:
     --config-dir=<conf-dir>     Use an alternate directory for finding machine
@@ -25,16 +25,23 @@ Options:
     --rooted-systemd            Use $ROOT/dcos.target.wants for systemd management
                                 rather than /etc/systemd/system/dcos.target.wants
     --silent                    Do not log anything
+    --json                      Print check results as JSON, including each check's output and duration
+    --workers=<n>               Number of checks to run at once [default: 4]
+    --timeout=<seconds>         Fail checks still running after this many seconds, killing them
 """
 
+import json
 import logging
 import os
+import signal
+import subprocess
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 from itertools import groupby
 from os import umask
-from subprocess import CalledProcessError, check_call
 
-from docopt import docopt
+from docopt import docopt, DocoptExit
 
 from pkgpanda import actions, constants, Install, PackageId, Repository
 from pkgpanda.exceptions import PackageError, PackageNotFound, ValidationError
@@ -116,16 +123,85 @@ def list_checks(checks):
             print(' - {}'.format(check_file))
 
 
-def run_checks(checks, install, repository):
-    exit_code = 0
+def run_check(path, timeout=None):
+    """Run the check at path, returning its result as a dict (See run_checks())."""
+    result = {'status': 'passed', 'returncode': None, 'stdout': b'', 'stderr': b''}
+    start = time.monotonic()
+    try:
+        # Run the check in its own process group so a timeout kills everything it started, not just
+        # the direct child (Which would leave e.g. a shell script's children running and holding the
+        # output pipes open).
+        process = subprocess.Popen(
+            [path], stdout=subprocess.PIPE, stderr=subprocess.PIPE, start_new_session=True)
+    except OSError as ex:
+        result.update(status='error', stderr=str(ex).encode() + b'\n')
+    else:
+        try:
+            stdout, stderr = process.communicate(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            stdout, stderr = process.communicate()
+            result.update(status='timeout', stdout=stdout, stderr=stderr)
+        else:
+            result.update(
+                status='passed' if process.returncode == 0 else 'failed',
+                returncode=process.returncode,
+                stdout=stdout,
+                stderr=stderr)
+    result['duration'] = time.monotonic() - start
+    return result
+
+
+def run_checks(checks, install, repository, workers=1, timeout=None, as_json=False):
+    """Run the checks found by find_checks, up to workers of them at once.
+
+    Each check's output is captured and written out once it and the checks before it are done, so
+    the output is in the same order as when they were run one after another. With as_json a single
+    JSON document with each check's result, output and duration is printed instead."""
+    assert workers > 0
+    start = time.monotonic()
+    to_run = []
     for pkg_id, check_files in sorted(checks.items()):
         check_dir = repository.load(pkg_id).check_dir
         for check_file in check_files:
-            try:
-                check_call([os.path.join(check_dir, check_file)])
-            except CalledProcessError:
-                print('Check failed: {}'.format(check_file), file=sys.stderr)
+            to_run.append((pkg_id, check_file, os.path.join(check_dir, check_file)))
+
+    exit_code = 0
+    results = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(run_check, path, timeout) for _, _, path in to_run]
+        for (pkg_id, check_file, _), future in zip(to_run, futures):
+            result = future.result()
+            if result['status'] != 'passed':
                 exit_code = 1
+            if as_json:
+                results.append({
+                    'package': pkg_id,
+                    'check': check_file,
+                    'status': result['status'],
+                    'returncode': result['returncode'],
+                    'duration': result['duration'],
+                    'stdout': result['stdout'].decode(errors='replace'),
+                    'stderr': result['stderr'].decode(errors='replace')})
+                continue
+
+            sys.stdout.buffer.write(result['stdout'])
+            sys.stdout.flush()
+            sys.stderr.buffer.write(result['stderr'])
+            if result['status'] == 'timeout':
+                print('Check timed out after {} seconds: {}'.format(timeout, check_file), file=sys.stderr)
+            elif result['status'] != 'passed':
+                print('Check failed: {}'.format(check_file), file=sys.stderr)
+            sys.stderr.flush()
+
+    if as_json:
+        print(json.dumps({
+            'status': 'passed' if exit_code == 0 else 'failed',
+            'duration': time.monotonic() - start,
+            'checks': results}, indent=2, sort_keys=True))
     return exit_code
 
 
@@ -138,6 +214,18 @@ def main():
             default_state_dir_root=constants.STATE_DIR_ROOT,
         ),
     )
+    workers = arguments['--workers']
+    if not workers.isdigit() or int(workers) < 1:
+        raise DocoptExit('--workers must be a positive integer, got {!r}'.format(workers))
+    timeout = arguments['--timeout']
+    if timeout is not None:
+        try:
+            timeout = float(timeout)
+        except ValueError:
+            timeout = 0
+        if not timeout > 0:
+            raise DocoptExit('--timeout must be a positive number of seconds, got {!r}'.format(
+                arguments['--timeout']))
     umask(0o022)
 
     if arguments['--silent']:
@@ -220,7 +308,13 @@ def main():
                 list_checks(checks)
                 sys.exit(0)
             # Run all checks
-            sys.exit(run_checks(checks, install, repository))
+            sys.exit(run_checks(
+                checks,
+                install,
+                repository,
+                workers=int(workers),
+                timeout=timeout,
+                as_json=arguments['--json']))
     except ValidationError as ex:
         print("Validation Error: {0}".format(ex), file=sys.stderr)
         sys.exit(1)
@@ -36,6 +36,9 @@ else:
     dcos_services_yaml = 'dcos-services.yaml'
     cloud_config_yaml = 'cloud-config.yaml'
 
+# The ActivationPlan of the packages in a bootstrap tarball, inside its root.
+ACTIVATION_PLAN_FILE = "active.plan.json"
+
 DCOS_SERVICE_CONFIGURATION_FILE = "dcos-service-configuration.json"
 DCOS_SERVICE_CONFIGURATION_PATH = install_root + "/etc/" + DCOS_SERVICE_CONFIGURATION_FILE
 SYSCTL_SETTING_KEY = "sysctl"
@@ -4,21 +4,63 @@ import http.client
 import logging
 import os
 import sys
+import threading
 
-from flask import current_app, Flask, jsonify, make_response, request
+from flask import current_app, Flask, jsonify, make_response, request, url_for
 
-from pkgpanda import actions, Install, Repository
+from pkgpanda import actions, Install, PackageId, Repository
 from pkgpanda.exceptions import (PackageConflict, PackageError,
                                  PackageNotFound, ValidationError)
+from pkgpanda.http.cache import directory_key, ResponseCache
+from pkgpanda.http.jobs import FetchJobs
 
 
 empty_response = ('', http.client.NO_CONTENT)
 
+response_cache = ResponseCache()
+
 
 def package_listing_response(package_ids):
     return jsonify(sorted(package_ids))
 
 
+def conditional_response(cached):
+    """The cached response, or an empty 304 if the request's If-None-Match already has it."""
+    if request.if_none_match.contains_weak(cached.etag):
+        response = current_app.response_class(status=http.client.NOT_MODIFIED)
+    else:
+        response = current_app.response_class(cached.body, mimetype='application/json')
+    response.set_etag(cached.etag)
+    return response
+
+
+def cached_listing(name, directory, list_package_ids):
+    """The CachedResponse listing the package ids list_package_ids() finds in directory."""
+    key = directory_key(directory)
+    cached = response_cache.get(name, key)
+    if cached is None:
+        package_ids = list_package_ids()
+        cached = response_cache.put(name, key, package_ids, package_listing_response(package_ids).get_data())
+    return cached
+
+
+def cached_active_listing():
+    return cached_listing('active', current_app.install.get_active_dir(), current_app.install.get_active)
+
+
+def cached_package_response(package_id, repository):
+    """package_response, cached while the package's directory stays the same if the package loads."""
+    name = ('package', package_id)
+    key = directory_key(repository.package_path(package_id))
+    cached = response_cache.get(name, key)
+    if cached is None:
+        response = make_response(package_response(package_id, repository))
+        if response.status_code != http.client.OK:
+            return response
+        cached = response_cache.put(name, key, None, response.get_data())
+    return conditional_response(cached)
+
+
 def error_response(message, **kwargs):
     kwargs['error'] = message
     return jsonify(kwargs)
@@ -74,6 +116,18 @@ app = Flask(__name__)
 app.config.from_object('pkgpanda.http.config')
 app.config.from_envvar('PKGPANDA_HTTP_CONFIG', silent=True)
 
+_fetch_jobs_lock = threading.Lock()
+
+
+def get_fetch_jobs():
+    """The app's FetchJobs, which outlive the requests that start and poll them."""
+    with _fetch_jobs_lock:
+        if not hasattr(current_app, 'fetch_jobs'):
+            current_app.fetch_jobs = FetchJobs(
+                current_app.config['FETCH_CONCURRENCY'],
+                current_app.config['FETCH_JOB_HISTORY'])
+        return current_app.fetch_jobs
+
 
 @app.errorhandler(Exception)
 def unexpected_exception_handler(exc):
@@ -107,12 +161,13 @@ def create_work_dir():
 
 @app.route('/repository/', methods=['GET'])
 def get_package_list():
-    return package_listing_response(current_app.repository.list())
+    return conditional_response(cached_listing(
+        'repository', current_app.repository.path, current_app.repository.list))
 
 
 @app.route('/repository/<package_id>', methods=['GET'])
 def get_package(package_id):
-    return package_response(package_id, current_app.repository)
+    return cached_package_response(package_id, current_app.repository)
 
 
 @app.route('/repository/<package_id>', methods=['POST'])
@@ -129,11 +184,13 @@ def fetch_package(package_id):
         )
 
     try:
-        actions.fetch_package(
-            current_app.repository,
-            repository_url,
-            package_id,
-            current_app.config['WORK_DIR'])
+        PackageId(package_id)
+        with get_fetch_jobs().package_lock(package_id):
+            actions.fetch_package(
+                current_app.repository,
+                repository_url,
+                package_id,
+                current_app.config['WORK_DIR'])
     except ValidationError:
         response = (
             invalid_package_id_response(package_id),
@@ -145,6 +202,53 @@ def fetch_package(package_id):
     return response
 
 
+@app.route('/repository/', methods=['POST'])
+def fetch_packages():
+    try:
+        repository_url = request.json['repository_url']
+        package_ids = request.json['package_ids']
+        assert isinstance(package_ids, list) and package_ids
+    except Exception:
+        return (
+            error_response(
+                'Request body must be a json object with a `repository_url` '
+                'key and a `package_ids` key holding a non-empty array of package IDs.'
+            ),
+            http.client.BAD_REQUEST,
+        )
+
+    invalid_package_ids = []
+    for package_id in package_ids:
+        try:
+            PackageId(package_id)
+        except ValidationError:
+            invalid_package_ids.append(package_id)
+    if invalid_package_ids:
+        return (
+            error_response('Invalid package IDs.', invalid_package_ids=invalid_package_ids),
+            http.client.BAD_REQUEST,
+        )
+
+    job = get_fetch_jobs().submit(
+        current_app.repository,
+        repository_url,
+        package_ids,
+        current_app.config['WORK_DIR'])
+    return (
+        jsonify(job.to_dict()),
+        http.client.ACCEPTED,
+        {'Location': url_for('get_job', job_id=job.id)},
+    )
+
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = get_fetch_jobs().get(job_id)
+    if job is None:
+        return error_response('Job {} not found.'.format(job_id)), http.client.NOT_FOUND
+    return jsonify(job.to_dict())
+
+
 @app.route('/repository/<package_id>', methods=['DELETE'])
 def remove_package(package_id):
     try:
@@ -175,19 +279,17 @@ def remove_package(package_id):
 
 @app.route('/active/', methods=['GET'])
 def get_active_package_list():
-    return package_listing_response(current_app.install.get_active())
+    return conditional_response(cached_active_listing())
 
 
 @app.route('/active/<package_id>', methods=['GET'])
 def get_active_package(package_id):
-    response = make_response(
-        package_response(package_id, current_app.repository)
-    )
+    response = cached_package_response(package_id, current_app.repository)
 
-    if response.status_code != http.client.OK:
+    if response.status_code not in (http.client.OK, http.client.NOT_MODIFIED):
         return response
 
-    if package_id not in current_app.install.get_active():
+    if package_id not in cached_active_listing().value:
         return (
             error_response('Package {} is not active.'.format(package_id)),
             http.client.NOT_FOUND,
@@ -0,0 +1,63 @@
+"""Cached responses for the Pkgpanda HTTP API's read only views.
+
+Listings and package descriptions only change when the directories they're read from do, so each
+cached response is stored with a key made from stat()ing those directories and rebuilt once the key
+changes. Responses carry a strong ETag (A hash of the body) so pollers can revalidate them with
+If-None-Match and get an empty 304 back.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from collections import namedtuple
+
+
+CachedResponse = namedtuple('CachedResponse', ['key', 'value', 'body', 'etag'])
+
+# Directories modified more recently than this aren't cached. Filesystem timestamps come from a coarse
+# clock, so a second change in the same tick could leave the modification time as it was.
+RACY_SECONDS = 1
+
+
+def directory_key(path):
+    """Key which changes whenever the directory at path is replaced or has entries added / removed.
+
+    None if there's nothing at path or it was modified too recently to tell apart from a later
+    modification (Like git's "racy" index entries)."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    if stat.st_mtime > time.time() - RACY_SECONDS:
+        return None
+    return (path, stat.st_dev, stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+class ResponseCache():
+    """The latest response body built for each name, along with the key it was built for."""
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__responses = {}
+
+    def get(self, name, key):
+        """The CachedResponse for name if it was built for key."""
+        if key is None:
+            return None
+        with self.__lock:
+            cached = self.__responses.get(name)
+        if cached is None or cached.key != key:
+            return None
+        return cached
+
+    def put(self, name, key, value, body: bytes) -> CachedResponse:
+        """Store the body of the response for name built from value, when its key was key.
+
+        The key must have been computed before value was read, so a change while reading shows up
+        as a new key next time. Nothing is stored for a None key."""
+        cached = CachedResponse(key, value, body, hashlib.sha1(body).hexdigest())
+        if key is not None:
+            with self.__lock:
+                self.__responses[name] = cached
+        return cached
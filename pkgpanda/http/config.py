@@ -11,3 +11,8 @@ DCOS_ROOTED_SYSTEMD = False
 DCOS_STATE_DIR_ROOT = constants.STATE_DIR_ROOT
 
 WORK_DIR = os.path.join(tempfile.gettempdir(), 'pkgpanda_api')
+
+# Number of packages fetched at once by the jobs started with POST /repository/
+FETCH_CONCURRENCY = 4
+# Number of finished jobs kept to be polled at /jobs/<id>
+FETCH_JOB_HISTORY = 100
@@ -0,0 +1,134 @@
+"""Background package fetch jobs for the Pkgpanda HTTP API.
+
+A job fetches a batch of packages on a shared pool of worker threads, so the request which starts it
+returns right away and the job's progress is polled from /jobs/<id>. Jobs live in the memory of the
+process which runs them (The pkgpanda-api service runs a single gunicorn worker).
+"""
+
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from pkgpanda import actions
+
+log = logging.getLogger(__name__)
+
+# Package states
+QUEUED = 'queued'
+FETCHING = 'fetching'
+FETCHED = 'fetched'
+FAILED = 'failed'
+
+# Job states
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+
+
+class FetchJob():
+    """Fetching package_ids from repository_url into repository. Safe to read while it runs."""
+
+    def __init__(self, repository, repository_url, package_ids, work_dir):
+        self.id = uuid.uuid4().hex
+        self.repository = repository
+        self.repository_url = repository_url
+        self.work_dir = work_dir
+        self.packages = OrderedDict((package_id, {'state': QUEUED}) for package_id in package_ids)
+        self.created = time.time()
+        self.start = time.monotonic()
+        self.end = None
+        self.__lock = threading.Lock()
+
+    def set_package_state(self, package_id, state, **details):
+        with self.__lock:
+            self.packages[package_id] = dict(details, state=state)
+            if all(package['state'] in (FETCHED, FAILED) for package in self.packages.values()):
+                self.end = time.monotonic()
+
+    @property
+    def done(self):
+        return self.end is not None
+
+    def to_dict(self):
+        with self.__lock:
+            packages = OrderedDict((package_id, dict(package)) for package_id, package in self.packages.items())
+            end = self.end
+        counts = {state: 0 for state in (QUEUED, FETCHING, FETCHED, FAILED)}
+        for package in packages.values():
+            counts[package['state']] += 1
+        finished = counts[FETCHED] + counts[FAILED]
+        elapsed = (end if end is not None else time.monotonic()) - self.start
+
+        if end is None:
+            state = RUNNING
+        elif counts[FAILED]:
+            state = FAILED
+        else:
+            state = SUCCEEDED
+
+        return {
+            'id': self.id,
+            'state': state,
+            'repository_url': self.repository_url,
+            'created': self.created,
+            'elapsed': elapsed,
+            'progress': {
+                'total': len(packages),
+                'finished': finished,
+                'counts': counts,
+            },
+            'packages_per_second': finished / elapsed if elapsed else 0,
+            'packages': packages,
+        }
+
+
+class FetchJobs():
+    """Runs FetchJobs, fetching at most max_workers packages at once across all of them.
+
+    The last history finished jobs are kept around to be polled."""
+
+    def __init__(self, max_workers, history=100):
+        assert max_workers > 0
+        self.max_workers = max_workers
+        self.history = history
+        self.__jobs = OrderedDict()
+        self.__lock = threading.Lock()
+        self.__package_locks = {}
+        self.__executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def package_lock(self, package_id):
+        """Lock to hold while fetching package_id, so it's only ever being fetched once at a time."""
+        with self.__lock:
+            return self.__package_locks.setdefault(package_id, threading.Lock())
+
+    def fetch(self, job, package_id):
+        job.set_package_state(package_id, FETCHING)
+        start = time.monotonic()
+        try:
+            with self.package_lock(package_id):
+                actions.fetch_package(job.repository, job.repository_url, package_id, job.work_dir)
+        except Exception as ex:
+            log.exception('Job %s failed to fetch %s', job.id, package_id)
+            job.set_package_state(package_id, FAILED, error=str(ex), elapsed=time.monotonic() - start)
+        else:
+            job.set_package_state(package_id, FETCHED, elapsed=time.monotonic() - start)
+
+    def submit(self, repository, repository_url, package_ids, work_dir) -> FetchJob:
+        job = FetchJob(repository, repository_url, package_ids, work_dir)
+        with self.__lock:
+            self.__jobs[job.id] = job
+            self.__forget_finished()
+        for package_id in job.packages:
+            self.__executor.submit(self.fetch, job, package_id)
+        return job
+
+    def get(self, job_id):
+        with self.__lock:
+            return self.__jobs.get(job_id)
+
+    def __forget_finished(self):
+        finished = [job_id for job_id, job in self.__jobs.items() if job.done]
+        for job_id in finished[:max(0, len(finished) - self.history)]:
+            del self.__jobs[job_id]
@@ -1,5 +1,9 @@
+import json
+from shutil import copytree
 from subprocess import check_output, PIPE, Popen, STDOUT
 
+import pytest
+
 from pkgpanda.util import resources_test_dir
 
 list_output = """WARNING: `not_executable.py` is not executable
@@ -40,3 +44,62 @@ def test_check_target_run():
     stdout, stderr = cmd.communicate()
     assert stderr.decode() == run_output_stderr
     assert stdout.decode() == run_output_stdout
+
+
+def test_check_target_run_json(tmpdir):
+    root = tmpdir.join('mesosphere')
+    copytree(resources_test_dir('opt/mesosphere'), str(root), symlinks=True)
+    # The check's child outlives the check itself unless the whole process group is killed.
+    sleep_pid_file = tmpdir.join('sleep_pid')
+    slow_check = root.join('packages/pkg1--12345/check/slow_check.sh')
+    slow_check.write('#!/bin/sh\nsleep 30 &\necho $! > {}\nwait\n'.format(sleep_pid_file))
+    slow_check.chmod(0o755)
+
+    cmd = Popen([
+        'pkgpanda',
+        'check',
+        '--json',
+        '--workers=2',
+        '--timeout=1',
+        '--root', str(root),
+        '--repository', str(root.join('packages'))],
+        stdout=PIPE, stderr=PIPE)
+    stdout, stderr = cmd.communicate()
+    assert cmd.returncode == 1
+    assert stderr.decode() == run_output_stderr
+
+    results = json.loads(stdout.decode())
+    assert results['status'] == 'failed'
+    # The slow check is killed once it times out, and the others don't wait for it.
+    assert results['duration'] < 10
+    assert [(check['package'], check['check'], check['status'], check['stdout']) for check in results['checks']] == [
+        ('pkg1--12345', 'hello_world_ok.py', 'passed', 'Hello World\n'),
+        ('pkg1--12345', 'slow_check.sh', 'timeout', ''),
+        ('pkg2--12345', 'failed_check.py', 'passed', 'I exist to fail...\nAssertion error\n'),
+        ('pkg2--12345', 'shell_script_check.sh', 'passed', 'Hello World\n'),
+    ]
+    assert all(check['duration'] >= 0 for check in results['checks'])
+
+    # The sleep was killed along with the check (It may be left unreaped), not left running.
+    try:
+        with open('/proc/{}/stat'.format(sleep_pid_file.read().strip())) as f:
+            assert f.read().split(')', 1)[1].split()[0] in ('Z', 'X')
+    except FileNotFoundError:
+        pass
+
+
+@pytest.mark.parametrize('option', ['--workers=0', '--workers=two', '--timeout=0', '--timeout=soon'])
+def test_check_target_bad_option(option):
+    cmd = Popen([
+        'pkgpanda',
+        'check',
+        option,
+        '--root', resources_test_dir('opt/mesosphere'),
+        '--repository', resources_test_dir('opt/mesosphere/packages')],
+        stdout=PIPE, stderr=PIPE)
+    stdout, stderr = cmd.communicate()
+    assert cmd.returncode == 1
+    assert stdout == b''
+    assert stderr.decode().startswith(option.split('=')[0] + ' must be a positive')
+    assert 'Usage:' in stderr.decode()
+    assert 'Traceback' not in stderr.decode()
@@ -1,10 +1,12 @@
 import json
 import operator
 import os
+import time
 from shutil import copytree
 
 import pytest
 
+from pkgpanda import Repository
 from pkgpanda.http import app
 from pkgpanda.util import is_windows, resources_test_dir
 
@@ -118,6 +120,57 @@ def test_get_package():
     assert_error(client.get('/repository/!@#*'), 404)
 
 
+# TODO: DCOS_OSS-3468 - muted Windows tests requiring investigation
+@pytest.mark.skipif(is_windows, reason="test fails on Windows reason unknown")
+def test_cached_listings(monkeypatch, tmpdir):
+    _set_test_config(app)
+    client = app.test_client()
+    repo_dir = str(tmpdir.join('repo'))
+    copytree(resources_test_dir('packages'), repo_dir)
+    monkeypatch.setitem(app.config, 'DCOS_REPO_DIR', repo_dir)
+    # Cache the directories this test just made.
+    monkeypatch.setattr('pkgpanda.http.cache.RACY_SECONDS', 0)
+    listings = []
+    list_packages = Repository.list
+
+    def counting_list(self):
+        listings.append(self.path)
+        return list_packages(self)
+
+    monkeypatch.setattr(Repository, 'list', counting_list)
+
+    response = client.get('/repository/')
+    etag = response.headers['ETag']
+    assert_json_response(response, 200, [
+        'mesos--0.22.0',
+        'mesos--0.23.0',
+        'mesos-config--ffddcfb53168d42f92e4771c6f8a8a9a818fd6b8',
+        'mesos-config--justmesos',
+    ], headers={'ETag': etag})
+
+    # Until the repository changes the listing is served from the cache, or not at all if the client has it.
+    assert client.get('/repository/').data == response.data
+    assert_response(client.get('/repository/', headers={'If-None-Match': etag}), 304, b'', headers={'ETag': etag})
+    assert len(listings) == 1
+
+    # Removing a package changes the listing and its ETag.
+    assert_response(client.delete('/repository/mesos--0.23.0'), 204, b'')
+    response = client.get('/repository/', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert 'mesos--0.23.0' not in json.loads(response.data.decode('utf-8'))
+
+    # Package descriptions are cached and revalidated the same way.
+    response = client.get('/active/mesos--0.22.0')
+    assert response.status_code == 200
+    assert_response(
+        client.get('/active/mesos--0.22.0', headers={'If-None-Match': response.headers['ETag']}),
+        304,
+        b'',
+    )
+    assert_error(client.get('/active/mesos--0.23.0'), 404)
+
+
 # TODO: DCOS_OSS-3468 - muted Windows tests requiring investigation
 @pytest.mark.skipif(is_windows, reason="test fails on Windows reason unknown")
 def test_list_active_packages():
@@ -243,6 +296,70 @@ def test_fetch_package(tmpdir):
     )
 
 
+# TODO: DCOS_OSS-3468 - muted Windows tests requiring investigation
+@pytest.mark.skipif(is_windows, reason="test fails on Windows reason unknown")
+def test_fetch_packages_job(tmpdir):
+    _set_test_config(app)
+    client = app.test_client()
+    app.config['DCOS_REPO_DIR'] = str(tmpdir)
+    repository_url = 'file://{}/{}/'.format(os.getcwd(), resources_test_dir('remote_repo'))
+
+    response = client.post(
+        '/repository/',
+        content_type='application/json',
+        data=json.dumps({
+            'repository_url': repository_url,
+            'package_ids': ['mesos--0.22.0', 'mesos--0.23.0'],
+        }),
+    )
+    assert response.status_code == 202
+    job_id = json.loads(response.data.decode('utf-8'))['id']
+    assert response.headers['Location'].endswith('/jobs/{}'.format(job_id))
+
+    # The job runs in the background, poll it until it's done.
+    deadline = time.time() + 30
+    while True:
+        job = json.loads(client.get('/jobs/{}'.format(job_id)).data.decode('utf-8'))
+        if job['state'] != 'running' or time.time() > deadline:
+            break
+        time.sleep(0.05)
+
+    # mesos--0.23.0 isn't in the remote repository.
+    assert job['state'] == 'failed'
+    assert job['progress'] == {
+        'total': 2,
+        'finished': 2,
+        'counts': {'queued': 0, 'fetching': 0, 'fetched': 1, 'failed': 1}}
+    assert job['packages']['mesos--0.22.0']['state'] == 'fetched'
+    assert job['packages']['mesos--0.23.0']['state'] == 'failed'
+    assert 'mesos--0.23.0' in job['packages']['mesos--0.23.0']['error']
+    assert_json_response(client.get('/repository/'), 200, ['mesos--0.22.0'])
+
+    # No package IDs.
+    assert_error(
+        client.post(
+            '/repository/',
+            content_type='application/json',
+            data=json.dumps({'repository_url': repository_url, 'package_ids': []}),
+        ),
+        400,
+    )
+
+    # Invalid package IDs.
+    assert_error(
+        client.post(
+            '/repository/',
+            content_type='application/json',
+            data=json.dumps({'repository_url': repository_url, 'package_ids': ['mesos--0.22.0', 'invalid---package']}),
+        ),
+        400,
+        invalid_package_ids=['invalid---package'],
+    )
+
+    # Unknown job.
+    assert_error(client.get('/jobs/unknown'), 404)
+
+
 # TODO: DCOS_OSS-3468 - muted Windows tests requiring investigation
 @pytest.mark.skipif(is_windows, reason="test fails on Windows reason unknown")
 def test_remove_package(tmpdir):
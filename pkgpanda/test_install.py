@@ -1,11 +1,12 @@
 """ Test reading and changing the active set of available packages"""
 
+import os
 import shutil
 
 import pytest
 
-from pkgpanda import Install, Repository
-from pkgpanda.util import expect_fs, is_windows, resources_test_dir
+from pkgpanda import ActivationPlan, Install, Repository
+from pkgpanda.util import expect_fs, is_windows, load_json, resources_test_dir, write_json
 
 
 @pytest.fixture
@@ -96,3 +97,42 @@ def test_recovery_move_new(tmpdir):
             "include": [".gitignore"],
             "lib": ["libmesos.so"]
         })
+
+
+@pytest.mark.skipif(is_windows, reason="Windows and Linux permissions parsed differently")
+def test_activation_plan(tmpdir, repository):
+    packages = repository.load_packages(['mesos--0.22.0', 'mesos-config--ffddcfb53168d42f92e4771c6f8a8a9a818fd6b8'])
+
+    def activate(name, plan=None):
+        root = str(tmpdir.join(name))
+        Install(root, None, True, False, True, skip_systemd_dirs=True).activate(packages, plan)
+        return {dirpath[len(root):]: sorted(dirnames + filenames)
+                for dirpath, dirnames, filenames in os.walk(root) if '/active' not in dirpath}
+
+    plan = ActivationPlan()
+    planned = activate('planned', plan)
+    for package in packages:
+        plan.service_names(package)
+    plan.save(str(tmpdir.join('plan.json')))
+
+    saved = load_json(str(tmpdir.join('plan.json')))
+    assert saved['packages']['mesos--0.22.0'] == {
+        'dirs': {
+            'bin': ['mesos', 'mesos-dir/', 'mesos-dir/.gitignore'],
+            'bin_master': ['mesos-master', 'mesos-slave'],
+            'dcos.target.wants_master': ['dcos-mesos-master.service'],
+            'dcos.target.wants_slave': ['dcos-mesos-slave.service'],
+            'lib': ['libmesos.so']},
+        'services': ['dcos-mesos-master', 'dcos-mesos-slave']}
+
+    # Activating with the saved plan gives the same result as working it all out again.
+    assert activate('loaded', ActivationPlan.load(str(tmpdir.join('plan.json')))) == planned == activate('unplanned')
+
+    # The saved plan is what's used to activate the packages in it.
+    saved['packages']['mesos--0.22.0']['dirs']['bin'] = ['mesos']
+    write_json(str(tmpdir.join('plan.json')), saved)
+    assert activate('edited', ActivationPlan.load(str(tmpdir.join('plan.json'))))['/bin'] == ['mesos']
+
+    # Plans from other versions are ignored.
+    write_json(str(tmpdir.join('plan.json')), dict(saved, version=0))
+    assert activate('other_version', ActivationPlan.load(str(tmpdir.join('plan.json')))) == planned
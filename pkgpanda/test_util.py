@@ -1,11 +1,15 @@
+import hashlib
 import os
+import tarfile
 import tempfile
+from collections import OrderedDict
 from http.server import BaseHTTPRequestHandler, HTTPServer
 from subprocess import CalledProcessError
 from threading import Thread
 
 import pytest
 import requests
+from hypothesis import given, settings, strategies as st
 
 import pkgpanda.util
 from pkgpanda import UserManagement
@@ -263,6 +267,32 @@ def test_remove_directory():
     assert not os.path.isdir(test_dir)
 
 
+def test_copy_file_fast(monkeypatch, tmpdir):
+    source = tmpdir.join('source')
+    source.write('contents')
+    destination = tmpdir.join('destination')
+
+    assert pkgpanda.util.copy_file_fast(str(source), str(destination)) == 'hardlink'
+    assert os.path.samefile(str(source), str(destination))
+
+    # Replacing a hard linked destination leaves the file it was linked to alone.
+    other = tmpdir.join('other')
+    other.write('other contents')
+    pkgpanda.util.copy_file_fast(str(other), str(destination), hardlink=False)
+    assert destination.read() == 'other contents'
+    assert source.read() == 'contents'
+    assert not os.path.samefile(str(source), str(destination))
+
+    # Each cheaper way of copying falls back to the next when it can't be used.
+    def unsupported(source_fd, destination_fd, size):
+        os.write(destination_fd, b'partial')
+        raise OSError("unsupported")
+
+    monkeypatch.setattr(pkgpanda.util, '_copy_methods', [('unsupported', unsupported)])
+    assert pkgpanda.util.copy_file_fast(str(source), str(destination), hardlink=False) == 'read_write'
+    assert destination.read() == 'contents'
+
+
 def test_variant_variations():
     assert pkgpanda.util.variant_str(None) == ''
     assert pkgpanda.util.variant_str('test') == 'test'
@@ -381,6 +411,183 @@ def test_split_by_token():
     ]
 
 
+def reference_hash_checkout(item):
+    """The original, non-streaming implementation of `hash_checkout`.
+
+    Kept so the streaming implementation can be checked (And timed, see benchmark_hash_checkout.py)
+    against it.
+    """
+    def hash_str(s):
+        hasher = hashlib.sha1()
+        hasher.update(s.encode('utf-8'))
+        return hasher.hexdigest()
+
+    def hash_list(l):
+        return hash_str(",".join(reference_hash_checkout(item) for item in sorted(l)))
+
+    if isinstance(item, str):
+        return hash_str(item)
+    elif isinstance(item, dict):
+        item_hashes = []
+        for k in sorted(item.keys()):
+            item_hashes.append("{0}={1}".format(k, reference_hash_checkout(item[k])))
+        return hash_str(",".join(item_hashes))
+    elif isinstance(item, list):
+        return hash_list(item)
+    elif isinstance(item, int):
+        return hash_str(str(item))
+    elif isinstance(item, set):
+        return hash_list(list(item))
+    else:
+        raise NotImplementedError("{} of type {}".format(item, type(item)))
+
+
+# Leaves and containers of them nested a few levels deep. Lists of mixed types can't be sorted, which both
+# implementations refuse the same way.
+hash_leaves = st.one_of(st.text(), st.integers(), st.booleans())
+hash_items = st.recursive(hash_leaves, lambda children: st.one_of(
+    st.lists(st.text()),
+    st.lists(st.integers()),
+    st.sets(st.text()),
+    st.lists(children),
+    st.dictionaries(st.text(), children),
+    st.dictionaries(st.integers(), children)))
+
+
+@settings(deadline=None)
+@given(hash_items)
+def test_hash_checkout_matches_reference_generated(item):
+    try:
+        expected = reference_hash_checkout(item)
+    except TypeError:
+        with pytest.raises(TypeError):
+            pkgpanda.util.hash_checkout(item)
+    else:
+        assert pkgpanda.util.hash_checkout(item) == expected
+
+
+@pytest.mark.parametrize('item', [
+    '',
+    'foo \u00b5\u2603',
+    -2 ** 40,
+    True,
+    ['b', 'a', 'c'],
+    {'b', 'a'},
+    [['b', 'a'], ['c']],
+    {'a': 'b', 'c': [1, 2], 'd': {'e': {'f'}}},
+    OrderedDict([('z', 'y'), ('a', {'b': 1})]),
+    {'arguments': {'key{}'.format(i): str(i) for i in range(50)}, 'build_ids': {'package': {'requires': ['a', 'b']}}},
+])
+def test_hash_checkout_matches_reference(item):
+    assert pkgpanda.util.hash_checkout(item) == reference_hash_checkout(item)
+
+
+def test_hash_checkout_known_digests():
+    hash_checkout = pkgpanda.util.hash_checkout
+    assert hash_checkout('') == 'da39a3ee5e6b4b0d3255bfef95601890afd80709'
+    assert hash_checkout('foo') == '0beec7b5ea3f0fdbc95d0dd47f3c5bc275da8a33'
+    assert hash_checkout(1) == hash_checkout('1')
+    assert hash_checkout(True) == hash_checkout('True')
+    assert hash_checkout(['b', 'a']) == hash_checkout(['a', 'b']) == hash_checkout({'a', 'b'})
+    assert hash_checkout({'a': 'b'}) == pkgpanda.util.hash_str('a=' + hash_checkout('b'))
+    assert hash_checkout(b'foo') == hash_checkout('foo')
+    assert pkgpanda.util.hash_dict({'a': ['b']}) == hash_checkout({'a': ['b']})
+    assert pkgpanda.util.hash_list(['a']) == hash_checkout(['a'])
+    assert pkgpanda.util.hash_int(3) == hash_checkout(3)
+
+    with pytest.raises(NotImplementedError):
+        hash_checkout(1.5)
+    with pytest.raises(NotImplementedError):
+        hash_checkout({'a': None})
+
+
+@pytest.mark.skipif(pkgpanda.util.is_windows, reason="Windows and Linux permissions parsed differently")
+def test_make_tar_from_files(tmpdir):
+    files = {
+        'etc/foo': (b'foo', 0o600),
+        'bin/bar': (b'bar', 0o755),
+        'baz/qux/quux': (b'quux\n', 0o644),
+        'empty': (b'', 0o644),
+    }
+    mtime = 1500000000
+
+    # Stage the same files on disk and tar them up the way make_tar() does. The
+    # folder is walked in sorted order explicitly since tarfile.add() only
+    # sorts directory listings on Python 3.7+.
+    staging_dir = tmpdir.mkdir('staging')
+    for path, (content, mode) in files.items():
+        staged = staging_dir.join(path)
+        staged.dirpath().ensure(dir=True)
+        staged.write_binary(content)
+        staged.chmod(mode)
+    for root, dirs, filenames in os.walk(str(staging_dir)):
+        os.chmod(root, 0o755)
+        for name in filenames:
+            os.utime(os.path.join(root, name), (mtime, mtime))
+        os.utime(root, (mtime, mtime))
+
+    reference = str(tmpdir.join('reference.tar.xz'))
+    with tarfile.open(reference, mode='w:xz', format=tarfile.GNU_FORMAT) as tar:
+        def add(path, arcname):
+            tar.add(path, arcname=arcname, recursive=False, filter=pkgpanda.util._tar_filter)
+            if os.path.isdir(path):
+                for name in sorted(os.listdir(path)):
+                    add(os.path.join(path, name), os.path.join(arcname, name))
+        add(str(staging_dir), './')
+
+    result = str(tmpdir.join('result.tar.xz'))
+    pkgpanda.util.make_tar_from_files(result, files, mtime=mtime)
+
+    with open(reference, 'rb') as reference_file, open(result, 'rb') as result_file:
+        assert reference_file.read() == result_file.read()
+
+    with tarfile.open(result) as tar:
+        assert tar.getnames() == ['.', './baz', './baz/qux', './baz/qux/quux', './bin', './bin/bar', './empty',
+                                  './etc', './etc/foo']
+        assert tar.extractfile('./etc/foo').read() == b'foo'
+        assert tar.getmember('./etc/foo').mode == 0o600
+
+    # A path can't be both a file and a directory.
+    with pytest.raises(AssertionError):
+        pkgpanda.util.make_tar_from_files(result, {'foo': (b'', 0o644), 'foo/bar': (b'', 0o644)})
+
+    # The tarball replaces the file whole, leaving it alone if writing the tarball fails.
+    with pytest.raises(TypeError):
+        pkgpanda.util.make_tar_from_files(result, {'foo': ('not bytes', 0o644)}, mtime=mtime)
+    with open(reference, 'rb') as reference_file, open(result, 'rb') as result_file:
+        assert reference_file.read() == result_file.read()
+    assert sorted(os.listdir(str(tmpdir))) == ['reference.tar.xz', 'result.tar.xz', 'staging']
+
+
+@pytest.mark.skipif(pkgpanda.util.is_windows, reason="Windows and Linux permissions parsed differently")
+def test_write_files(tmpdir):
+    files = {
+        'etc/foo': (b'foo', 0o600),
+        'bin/bar': (b'bar', 0o755),
+        'baz/qux/quux': (b'quux\n', 0o644),
+    }
+
+    # Writing the files gives the same tree as extracting the tarball of them.
+    tarball = str(tmpdir.join('files.tar.xz'))
+    pkgpanda.util.make_tar_from_files(tarball, files)
+    with tarfile.open(tarball) as tar:
+        tar.extractall(str(tmpdir.join('extracted')))
+    pkgpanda.util.write_files(str(tmpdir.join('written')), files)
+
+    def tree(root):
+        return {os.path.relpath(path, root): (os.stat(path).st_mode, os.path.isfile(path) and open(path, 'rb').read())
+                for path in (os.path.join(dirpath, name)
+                             for dirpath, dirnames, filenames in os.walk(root) for name in dirnames + filenames)}
+
+    assert tree(str(tmpdir.join('written'))) == tree(str(tmpdir.join('extracted')))
+    assert tmpdir.join('written/etc/foo').stat().mode & 0o777 == 0o600
+
+    # Nothing is left behind when writing fails.
+    with pytest.raises(AssertionError):
+        pkgpanda.util.write_files(str(tmpdir.join('bad')), {'foo': (b'', 0o644), 'foo/bar': (b'', 0o644)})
+    assert not tmpdir.join('bad').exists()
+
+
 # TODO: DCOS_OSS-3508 - muted Windows tests requiring investigation
 @pytest.mark.skipif(pkgpanda.util.is_windows, reason="Windows and Linux permissions parsed differently")
 def test_write_string(tmpdir):
@@ -1,27 +1,28 @@
+import binascii
 import hashlib
 import http.server
+import io
 import json
 import logging
 import os
 import platform
+import posixpath
 import re
 import shutil
 import socketserver
 import stat
 import tarfile
 import tempfile
+import time
 from contextlib import contextmanager, ExitStack
 from itertools import chain
 from multiprocessing import Process
 from shutil import rmtree
 from typing import List
 
-import requests
 import retrying
 import teamcity
 import yaml
-from requests.adapters import HTTPAdapter
-from requests.packages.urllib3.util.retry import Retry
 from teamcity.messages import TeamcityServiceMessages
 
 from pkgpanda import subprocess
@@ -30,6 +31,9 @@ from pkgpanda.exceptions import FetchError, IncompleteDownloadError, ValidationE
 log = logging.getLogger(__name__)
 is_windows = platform.system() == "Windows"
 
+if not is_windows:
+    import fcntl
+
 
 def is_absolute_path(path):
     if is_windows:
@@ -72,8 +76,8 @@ def make_directory(path):
     if is_windows:
         path = path.replace('/', '\\')
 
-    if not os.path.exists(path):
-        os.makedirs(path)
+    # exist_ok since another thread / process may be creating the same directory concurrently.
+    os.makedirs(path, exist_ok=True)
 
 
 def copy_file(src_path, dst_path):
@@ -102,6 +106,96 @@ def copy_directory(src_path, dst_path):
         subprocess.check_call(['cp', '-r', src_path, dst_path])
 
 
+# _IOW(0x94, 9, int) from linux/fs.h. Makes the destination file share the source's extents (A
+# copy on write "reflink") on filesystems which support it (btrfs, xfs, ...).
+FICLONE = 0x40049409
+
+
+def _reflink(source_fd, destination_fd, size):
+    if is_windows:
+        raise OSError("reflinks aren't supported on Windows")
+    fcntl.ioctl(destination_fd, FICLONE, source_fd)
+
+
+def _copy_file_range(source_fd, destination_fd, size):
+    # Python 3.8+
+    if not hasattr(os, 'copy_file_range'):
+        raise OSError("os.copy_file_range isn't available")
+    copied = 0
+    while copied < size:
+        count = os.copy_file_range(source_fd, destination_fd, size - copied)
+        if count == 0:
+            break
+        copied += count
+
+
+def _sendfile(source_fd, destination_fd, size):
+    if not hasattr(os, 'sendfile'):
+        raise OSError("os.sendfile isn't available")
+    copied = 0
+    while copied < size:
+        count = os.sendfile(destination_fd, source_fd, copied, size - copied)
+        if count == 0:
+            break
+        copied += count
+
+
+def _read_write(source_fd, destination_fd, size):
+    with open(source_fd, 'rb', closefd=False) as source, open(destination_fd, 'wb', closefd=False) as destination:
+        shutil.copyfileobj(source, destination, 1024 * 1024)
+
+
+# Ways of copying the contents of one open file into another, cheapest first. Each raises OSError if
+# it can't be used for the pair of files (Different filesystems, unsupported by the filesystem /
+# kernel / platform). Reading and writing through userspace is the fallback when none can.
+_copy_methods = [
+    ('reflink', _reflink),
+    ('copy_file_range', _copy_file_range),
+    ('sendfile', _sendfile),
+]
+
+
+def copy_file_fast(source_path, destination_path, hardlink=True):
+    """Copy source_path to destination_path the cheapest way possible, returning the name of the way.
+
+    If hardlink is set destination_path becomes a hard link to source_path when they're on the same
+    filesystem, so it must be fine for the two to share contents (Neither gets modified in place). An
+    existing destination_path is replaced rather than written to, so whatever it was linked to isn't
+    modified. Otherwise the contents are reflinked, copied in the kernel or read and written, in that
+    order of preference."""
+    if os.path.lexists(destination_path):
+        os.unlink(destination_path)
+
+    if hardlink:
+        try:
+            os.link(source_path, destination_path)
+            return 'hardlink'
+        except OSError as ex:
+            log.debug("Unable to hard link %s to %s: %s", source_path, destination_path, ex)
+
+    source_fd = os.open(source_path, os.O_RDONLY)
+    try:
+        stat = os.fstat(source_fd)
+        destination_fd = os.open(destination_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, stat.st_mode & 0o777)
+        try:
+            for name, method in _copy_methods:
+                try:
+                    method(source_fd, destination_fd, stat.st_size)
+                    return name
+                except OSError as ex:
+                    log.debug("Unable to %s %s to %s: %s", name, source_path, destination_path, ex)
+                    # Start over from nothing having been copied.
+                    os.lseek(source_fd, 0, os.SEEK_SET)
+                    os.lseek(destination_fd, 0, os.SEEK_SET)
+                    os.ftruncate(destination_fd, 0)
+            _read_write(source_fd, destination_fd, stat.st_size)
+            return 'read_write'
+        finally:
+            os.close(destination_fd)
+    finally:
+        os.close(source_fd)
+
+
 def variant_str(variant):
     """Return a string representation of variant."""
     if variant is None:
@@ -137,6 +231,11 @@ def variant_suffix(variant, delim='.'):
 
 
 def get_requests_retry_session(max_retries=4, backoff_factor=1, status_forcelist=None):
+    # Imported here since requests takes a while to import and most users of this module don't need it.
+    import requests
+    from requests.adapters import HTTPAdapter
+    from requests.packages.urllib3.util.retry import Retry
+
     status_forcelist = status_forcelist or [500, 502, 504]
     # Default max retries 4 with sleeping between retries 1s, 2s, 4s, 8s
     session = requests.Session()
@@ -160,9 +259,9 @@ def _is_incomplete_download_error(exception):
     wait_random_min=1000,
     wait_random_max=2000,
     retry_on_exception=_is_incomplete_download_error)
-def _download_remote_file(out_filename, url):
+def _download_remote_file(out_filename, url, session=None):
     with open(out_filename, "wb") as f:
-        r = get_requests_retry_session().get(url, stream=True)
+        r = (session or get_requests_retry_session()).get(url, stream=True)
         r.raise_for_status()
 
         total_bytes_read = 0
@@ -178,7 +277,8 @@ def _download_remote_file(out_filename, url):
         return r
 
 
-def download(out_filename, url, work_dir, rm_on_error=True):
+def download(out_filename, url, work_dir, rm_on_error=True, session=None):
+    """Download url to out_filename, using session (From get_requests_retry_session()) if given."""
     assert os.path.isabs(out_filename)
     assert os.path.isabs(work_dir)
     work_dir = work_dir.rstrip('/')
@@ -195,7 +295,7 @@ def download(out_filename, url, work_dir, rm_on_error=True):
                 src_filename = work_dir + '/' + src_filename
             shutil.copyfile(src_filename, out_filename)
         else:
-            _download_remote_file(out_filename, url)
+            _download_remote_file(out_filename, url, session)
     except Exception as fetch_exception:
         if rm_on_error:
             rm_passed = False
@@ -386,17 +486,130 @@ def _tar_filter(tar_info: tarfile.TarInfo) -> tarfile.TarInfo:
     return tar_info
 
 
-def make_tar(result_filename, change_folder):
-    tar_mode = ''
+def _tar_mode():
     if is_windows:
-        tar_mode = 'w:gz'
+        return 'w:gz'
     else:
-        tar_mode = 'w:xz'
+        return 'w:xz'
+
 
-    with tarfile.open(name=str(result_filename), mode=tar_mode) as tar:
+def make_tar(result_filename, change_folder):
+    with tarfile.open(name=str(result_filename), mode=_tar_mode(), format=tarfile.GNU_FORMAT) as tar:
         tar.add(name=str(change_folder), arcname='./', filter=_tar_filter)
 
 
+def _owner_names():
+    """Return the user and group names tarfile records for files this process creates."""
+    try:
+        import grp
+        import pwd
+    except ImportError:
+        return '', ''
+
+    try:
+        uname = pwd.getpwuid(os.geteuid())[0]
+    except KeyError:
+        uname = ''
+    try:
+        gname = grp.getgrgid(os.getegid())[0]
+    except KeyError:
+        gname = ''
+    return uname, gname
+
+
+def make_tar_from_files(result_filename, files, dir_mode=0o755, mtime=None):
+    """Write a tarball of in-memory files without staging them on disk.
+
+    files maps '/'-separated paths (relative to the root of the tarball) to a
+    (content bytes, mode) tuple. Parent directories are added with dir_mode.
+
+    The result is the same as writing the files to a folder whose directories
+    all have dir_mode, setting mtime on everything and calling make_tar() on
+    it: members are added depth first in sorted order with the root as './',
+    owned by uid/gid 0 with this process's user and group names.
+    """
+    if mtime is None:
+        mtime = int(time.time())
+    uname, gname = _owner_names()
+
+    # Build a tree of {name: subtree or (content, mode)}.
+    tree = dict()
+    for path, file_ in files.items():
+        parts = [part for part in path.split('/') if part]
+        assert parts, "Invalid file path: {}".format(repr(path))
+        node = tree
+        for part in parts[:-1]:
+            node = node.setdefault(part, dict())
+            assert isinstance(node, dict), "{} is both a file and a directory".format(repr(path))
+        assert not isinstance(node.get(parts[-1]), dict), "{} is both a file and a directory".format(repr(path))
+        node[parts[-1]] = file_
+
+    def make_tarinfo(name, mode, type_, size=0):
+        tarinfo = tarfile.TarInfo(name)
+        tarinfo.mode = mode
+        tarinfo.type = type_
+        tarinfo.size = size
+        tarinfo.mtime = mtime
+        tarinfo.uname = uname
+        tarinfo.gname = gname
+        return _tar_filter(tarinfo)
+
+    def add_tree(tar, arcname, node):
+        tar.addfile(make_tarinfo(arcname, dir_mode, tarfile.DIRTYPE))
+        for name in sorted(node):
+            child_arcname = posixpath.join(arcname, name)
+            if isinstance(node[name], dict):
+                add_tree(tar, child_arcname, node[name])
+            else:
+                content, mode = node[name]
+                tar.addfile(make_tarinfo(child_arcname, mode, tarfile.REGTYPE, len(content)), io.BytesIO(content))
+
+    # Written next to result_filename and renamed over it, so readers (And other processes making the
+    # same file) never see part of the tarball.
+    result_filename = str(result_filename)
+    fd, temporary_filename = tempfile.mkstemp(
+        prefix=os.path.basename(result_filename), dir=os.path.dirname(os.path.realpath(result_filename)))
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            with tarfile.open(fileobj=f, mode=_tar_mode(), format=tarfile.GNU_FORMAT) as tar:
+                add_tree(tar, './', tree)
+        os.chmod(temporary_filename, 0o644)
+        os.replace(temporary_filename, result_filename)
+    except Exception:
+        os.remove(temporary_filename)
+        raise
+
+
+def write_files(target, files, dir_mode=0o755):
+    """Write in-memory files into the directory target.
+
+    files is in the same form as for make_tar_from_files(), and target ends up the same as extracting
+    the tarball it makes into it (As root, so modes aren't masked). If there are any errors, the
+    directory being written to is deleted.
+    """
+    try:
+        make_directory(target)
+        os.chmod(target, dir_mode)
+        for path, (content, mode) in sorted(files.items()):
+            parts = [part for part in path.split('/') if part]
+            assert parts, "Invalid file path: {}".format(repr(path))
+            directory = target
+            for part in parts[:-1]:
+                directory = os.path.join(directory, part)
+                assert not os.path.isfile(directory), "{} is both a file and a directory".format(repr(path))
+                if not os.path.isdir(directory):
+                    os.mkdir(directory)
+                    os.chmod(directory, dir_mode)
+            filename = os.path.join(directory, parts[-1])
+            assert not os.path.isdir(filename), "{} is both a file and a directory".format(repr(path))
+            with open(filename, 'wb') as f:
+                f.write(content)
+            os.chmod(filename, mode)
+    except:
+        rmtree(target, ignore_errors=True)
+        raise
+
+
 def rewrite_symlinks(root, old_prefix, new_prefix):
     log.info("Rewrite symlinks in %s from %s to %s", root, old_prefix, new_prefix)
     # Find the symlinks and rewrite them from old_prefix to new_prefix
@@ -555,9 +768,7 @@ logger = MessageLogger()
 
 
 def hash_str(s: str):
-    hasher = hashlib.sha1()
-    hasher.update(s.encode('utf-8'))
-    return hasher.hexdigest()
+    return _hash_bytes(s.encode('utf-8')).decode('ascii')
 
 
 def hash_int(i: int):
@@ -565,31 +776,74 @@ def hash_int(i: int):
 
 
 def hash_dict(d: dict):
-    item_hashes = []
-    for k in sorted(d.keys()):
-        assert isinstance(k, str)
-        item_hashes.append("{0}={1}".format(k, hash_checkout(d[k])))
-    return hash_str(",".join(item_hashes))
+    return _hash_dict(d).decode('ascii')
 
 
 def hash_list(l: List[str]):
-    item_hashes = []
-    for item in sorted(l):
-        item_hashes.append(hash_checkout(item))
-    return hash_str(",".join(item_hashes))
+    return _hash_list(l).decode('ascii')
 
 
 def hash_checkout(item):
-    if isinstance(item, str) or isinstance(item, bytes):
-        return hash_str(item)
+    return _hash_item(item).decode('ascii')
+
+
+# The hash_* functions above define the digest format used for package ids,
+# bootstrap ids and config ids: leaves are sha1'd individually and containers
+# sha1 the ','-joined hex digests of their (sorted) children, with dict items
+# rendered as 'key=digest'. The helpers below compute exactly that, but feed a
+# single hasher per container incrementally and pass hex digests around as
+# bytes so no intermediate strings or lists are built for each level.
+
+def _hash_bytes(b: bytes) -> bytes:
+    return binascii.hexlify(hashlib.sha1(b).digest())
+
+
+def _hash_dict(d: dict) -> bytes:
+    hasher = hashlib.sha1()
+    update = hasher.update
+    separator = b''
+    for k in sorted(d.keys()):
+        update(separator)
+        update((k if type(k) is str else '{0}'.format(k)).encode('utf-8'))
+        update(b'=')
+        update(_hash_item(d[k]))
+        separator = b','
+    return binascii.hexlify(hasher.digest())
+
+
+def _hash_list(l) -> bytes:
+    hasher = hashlib.sha1()
+    update = hasher.update
+    separator = b''
+    for item in sorted(l):
+        update(separator)
+        update(_hash_item(item))
+        separator = b','
+    return binascii.hexlify(hasher.digest())
+
+
+def _hash_item(item) -> bytes:
+    # Dispatch on the exact type first since that covers nearly every value we
+    # hash, then fall back to isinstance() so subclasses (OrderedDict, bool,
+    # ...) hash the same way they always have.
+    item_type = type(item)
+    if item_type is str:
+        return _hash_bytes(item.encode('utf-8'))
+    elif item_type is dict:
+        return _hash_dict(item)
+    elif item_type is list or item_type is set:
+        return _hash_list(item)
+
+    if isinstance(item, str):
+        return _hash_bytes(item.encode('utf-8'))
+    elif isinstance(item, bytes):
+        return _hash_bytes(item)
     elif isinstance(item, dict):
-        return hash_dict(item)
-    elif isinstance(item, list):
-        return hash_list(item)
+        return _hash_dict(item)
+    elif isinstance(item, (list, set)):
+        return _hash_list(item)
     elif isinstance(item, int):
-        return hash_int(item)
-    elif isinstance(item, set):
-        return hash_list(list(item))
+        return _hash_bytes(str(item).encode('utf-8'))
     else:
         raise NotImplementedError("{} of type {}".format(item, type(item)))
 
@@ -7,13 +7,18 @@ Co-ordinates across all gen.build_deploy
 """
 
 import argparse
+import collections
 import copy
+import hashlib
 import importlib
 import inspect
 import json
 import logging
 import os.path
 import sys
+import threading
+import time
+from concurrent.futures import as_completed, ThreadPoolExecutor
 from distutils.version import LooseVersion
 from typing import Optional
 
@@ -280,7 +285,78 @@ def get_gen_package_artifact(package_id_str):
         'local_path': package_filename}
 
 
-def make_bootstrap_artifacts(bootstrap_id, package_ids, variant_name, artifact_prefix):
+class ReleaseIndex():
+    """What a release run knows about the bootstraps and packages it releases, each loaded once.
+
+    Built from all_completes ({variant: {'bootstrap': bootstrap_id, 'packages': [package_id]}}), as
+    returned by do_build_packages or recorded in a release's metadata. The create, promote and
+    create_installer flows share one rather than reloading the bootstraps' active.json files and
+    re-deriving the per-variant arguments for each step and provider."""
+
+    def __init__(self, all_completes, cache_dir='packages/cache'):
+        self.all_completes = all_completes
+        self.cache_dir = cache_dir
+
+        # The installer and util are built bootstraps, but not a DC/OS variants. We use
+        # iteration over the complete_dict to enumerate all variants a whole lot,
+        # so explicity remove installer/util here so people don't accidentally hit it.
+        # TODO: make this into a tree option
+        self.complete_dict = {
+            name: info for name, info in all_completes.items()
+            if name is None or not (name.endswith('installer') or name.endswith('util'))}
+
+        self.__active_packages = {}
+        self.__package_artifacts = {}
+        self.__variant_arguments = {}
+        self.__provider_template_defaults = None
+
+    @classmethod
+    def from_metadata(cls, metadata):
+        return cls(metadata['all_completes'])
+
+    def active_packages(self, bootstrap_id) -> list:
+        """The packages in the active.json of the bootstrap."""
+        if bootstrap_id not in self.__active_packages:
+            self.__active_packages[bootstrap_id] = pkgpanda.util.load_json(
+                '{}/bootstrap/{}.active.json'.format(self.cache_dir, bootstrap_id))
+        return self.__active_packages[bootstrap_id]
+
+    def package_artifact(self, package_id_str) -> dict:
+        """get_package_artifact(package_id_str). Artifacts get modified so each call returns a copy."""
+        if package_id_str not in self.__package_artifacts:
+            self.__package_artifacts[package_id_str] = get_package_artifact(package_id_str)
+        return dict(self.__package_artifacts[package_id_str])
+
+    def provider_template_defaults(self) -> dict:
+        """Additional default variant arguments out of gen_extra."""
+        if self.__provider_template_defaults is None:
+            self.__provider_template_defaults = dict()
+            if os.path.exists('gen_extra/calc.py'):
+                mod = importlib.machinery.SourceFileLoader('gen_extra.calc', 'gen_extra/calc.py').load_module()
+                self.__provider_template_defaults = mod.provider_template_defaults
+        return self.__provider_template_defaults
+
+    def variant_arguments(self, bootstrap_url, provider_name) -> dict:
+        """The gen arguments of each DC/OS variant for the provider's templates."""
+        variant_arguments = dict()
+        for variant, variant_info in self.complete_dict.items():
+            if variant not in self.__variant_arguments:
+                self.__variant_arguments[variant] = {
+                    'bootstrap_id': variant_info['bootstrap'],
+                    'bootstrap_variant': pkgpanda.util.variant_prefix(variant),
+                    'package_ids': json.dumps(variant_info['packages'])
+                }
+            arguments = {
+                'bootstrap_url': bootstrap_url,
+                'provider': provider_name,
+            }
+            arguments.update(self.__variant_arguments[variant])
+            arguments.update(self.provider_template_defaults())
+            variant_arguments[variant] = copy.deepcopy(arguments)
+        return variant_arguments
+
+
+def make_bootstrap_artifacts(bootstrap_id, package_ids, variant_name, artifact_prefix, index=None):
     bootstrap_filename = "{}.bootstrap.tar.xz".format(bootstrap_id)
     active_filename = "{}.active.json".format(bootstrap_id)
     active_local_path = artifact_prefix + '/bootstrap/' + active_filename
@@ -288,8 +364,11 @@ def make_bootstrap_artifacts(bootstrap_id, package_ids, variant_name, artifact_p
     latest_complete_filename = "{}complete.latest.json".format(pkgpanda.util.variant_prefix(variant_name))
 
     # Assert that the bootstrap active packages are in the package list.
-    with open(active_local_path) as f:
-        missing_packages = set(json.load(f)) - set(package_ids)
+    if index is not None:
+        active_packages = index.active_packages(bootstrap_id)
+    else:
+        active_packages = pkgpanda.util.load_json(active_local_path)
+    missing_packages = set(active_packages) - set(package_ids)
     assert len(missing_packages) == 0, (
         'variant {} has bootstrap packages missing from the package list: {}'.format(
             pkgpanda.util.variant_name(variant_name),
@@ -315,13 +394,7 @@ def make_bootstrap_artifacts(bootstrap_id, package_ids, variant_name, artifact_p
     }
 
 
-def make_stable_artifacts(cache_repository_url, tree_variants):
-    metadata = {
-        "commit": util.dcos_image_commit,
-        "core_artifacts": [],
-        "packages": set()
-    }
-
+def build_release_index(cache_repository_url, tree_variants) -> ReleaseIndex:
     # TODO(cmaloney): Rather than guessing / reverse-engineering all these paths
     # have do_build_packages get them directly from pkgpanda
     with logger.scope("Building packages"):
@@ -331,21 +404,21 @@ def make_stable_artifacts(cache_repository_url, tree_variants):
             logger.error("Failure building package(s): {}".format(ex))
             raise
 
-    # The installer and util are built bootstraps, but not a DC/OS variants. We use
-    # iteration over the complete_dict to enumerate all variants a whole lot,
-    # so explicity remove installer/util here so people don't accidentally hit it.
-    # TODO: make this into a tree option
-    complete_dict = dict()
-    for name, info in copy.copy(all_completes).items():
-        if name is not None and (name.endswith('installer') or name.endswith('util')):
-            continue
-        complete_dict[name] = info
+    return ReleaseIndex(all_completes)
 
-    metadata["complete_dict"] = complete_dict
-    metadata["all_completes"] = all_completes
 
-    metadata["bootstrap_dict"] = {k: v['bootstrap'] for k, v in complete_dict.items()}
-    metadata["all_bootstraps"] = {k: v['bootstrap'] for k, v in all_completes.items()}
+def make_stable_metadata(index: ReleaseIndex):
+    metadata = {
+        "commit": util.dcos_image_commit,
+        "core_artifacts": [],
+        "packages": set()
+    }
+
+    metadata["complete_dict"] = index.complete_dict
+    metadata["all_completes"] = index.all_completes
+
+    metadata["bootstrap_dict"] = {k: v['bootstrap'] for k, v in index.complete_dict.items()}
+    metadata["all_bootstraps"] = {k: v['bootstrap'] for k, v in index.all_completes.items()}
 
     def add_file(info):
         metadata["core_artifacts"].append(info)
@@ -354,12 +427,12 @@ def make_stable_artifacts(cache_repository_url, tree_variants):
         if package_id in metadata['packages']:
             return
         metadata['packages'].add(package_id)
-        add_file(get_package_artifact(package_id))
+        add_file(index.package_artifact(package_id))
 
     # Add the bootstrap, active.json, packages as reproducible_path artifacts
     # Add the <variant>.bootstrap.latest as a channel_path
-    for name, info in sorted(all_completes.items(), key=lambda kv: pkgpanda.util.variant_str(kv[0])):
-        for file in make_bootstrap_artifacts(info['bootstrap'], info['packages'], name, 'packages/cache'):
+    for name, info in sorted(index.all_completes.items(), key=lambda kv: pkgpanda.util.variant_str(kv[0])):
+        for file in make_bootstrap_artifacts(info['bootstrap'], info['packages'], name, index.cache_dir, index):
             add_file(file)
 
         # Add all the packages which haven't been added yet
@@ -372,6 +445,10 @@ def make_stable_artifacts(cache_repository_url, tree_variants):
     return metadata
 
 
+def make_stable_artifacts(cache_repository_url, tree_variants):
+    return make_stable_metadata(build_release_index(cache_repository_url, tree_variants))
+
+
 def built_resource_to_artifacts(built_resource: dict):
     # Type switch
     if 'packages' in built_resource:
@@ -394,8 +471,11 @@ def built_resource_to_artifacts(built_resource: dict):
 #       'content': '',
 #       'content_file': '',
 #       }]}}
-def make_channel_artifacts(metadata, provider_names):
+def make_channel_artifacts(metadata, provider_names, index: Optional[ReleaseIndex]=None):
     log.debug('making channel artifacts')
+    if index is None:
+        index = ReleaseIndex.from_metadata(metadata)
+
     artifacts = [{
         'channel_path': 'version',
         'local_content': DCOS_VERSION,
@@ -412,21 +492,7 @@ def make_channel_artifacts(metadata, provider_names):
         if name in metadata['storage_urls']:
             bootstrap_url = metadata['storage_urls'][name] + metadata['repository_path']
 
-        variant_arguments = dict()
-
-        for variant, variant_info in metadata['complete_dict'].items():
-            variant_arguments[variant] = copy.deepcopy({
-                'bootstrap_url': bootstrap_url,
-                'provider': name,
-                'bootstrap_id': variant_info['bootstrap'],
-                'bootstrap_variant': pkgpanda.util.variant_prefix(variant),
-                'package_ids': json.dumps(variant_info['packages'])
-            })
-
-            # Load additional default variant arguments out of gen_extra
-            if os.path.exists('gen_extra/calc.py'):
-                mod = importlib.machinery.SourceFileLoader('gen_extra.calc', 'gen_extra/calc.py').load_module()
-                variant_arguments[variant].update(mod.provider_template_defaults)
+        variant_arguments = index.variant_arguments(bootstrap_url, name)
 
         # Add templates for the default variant.
         # Use keyword args to make not matching ordering a loud error around changes.
@@ -666,21 +732,412 @@ def get_storage_provider_factory(kind):
     return module.factories[name]
 
 
-def apply_storage_commands(storage_providers: dict, storage_commands: dict) -> None:
-    assert storage_commands.keys() == {'stage1', 'stage2'}
+def storage_command_chains(commands: list) -> list:
+    """Split the commands of one stage into chains which can be applied independently of each other.
+
+    A copy whose source is the destination of an earlier command in the same stage must run after
+    that command, so it's appended to that command's chain."""
+    chains = []
+    chain_by_destination = {}
+    for command in commands:
+        chain = None
+        if command['method'] == 'copy':
+            chain = chain_by_destination.get(command['args']['source_path'])
+        if chain is None:
+            chain = []
+            chains.append(chain)
+        chain.append(command)
+        chain_by_destination[command['args']['destination_path']] = chain
+    return chains
+
+
+def storage_command_size(command: dict) -> int:
+    """Number of bytes the command sends to the storage provider. Copies happen provider side."""
+    if command['method'] != 'upload':
+        return 0
+    args = command['args']
+    if args.get('blob') is not None:
+        return len(args['blob'])
+    return os.path.getsize(args['local_path'])
+
+
+def listing_folders(paths):
+    """The folders to list_recursive() to find out which of paths exist.
+
+    Each package has its own packages/<name>/ folder (See make_package_filename()), so packages are
+    found from one listing of the packages/ folder they're in rather than one per package. Folders
+    inside another listed folder aren't listed again, and top level files have no folder to list."""
+    folders = set()
+    for path in paths:
+        folder = os.path.dirname(path)
+        if os.path.basename(os.path.dirname(folder)) == 'packages':
+            folder = os.path.dirname(folder)
+        if folder:
+            folders.add(folder)
+
+    listed = []
+    for folder in sorted(folders):
+        if not listed or not folder.startswith(listed[-1] + '/'):
+            listed.append(folder)
+    return listed
+
+
+class ExistenceSnapshot():
+    """Answers exists() for many paths on a storage provider from a few list_recursive() calls.
+
+    See listing_folders() for the folders listed. Paths in written_paths may be created after the
+    snapshot is taken, so existence of those is always asked of the storage provider."""
+
+    def __init__(self, provider, paths, written_paths):
+        self.__provider = provider
+        self.__written_paths = written_paths
+        self.__folders = []
+        self.__existing = set()
+
+        for folder in listing_folders(path for path in paths if path not in written_paths):
+            try:
+                self.__existing |= provider.list_recursive(folder)
+            except Exception as ex:
+                # Not every storage provider can list, and listing may need permissions (Like
+                # s3:ListBucket) which checking a single path doesn't.
+                log.info("Can't list %s, checking existence of each artifact: %r", folder, ex)
+                self.__folders = []
+                self.__existing = set()
+                return
+            self.__folders.append(folder)
+
+    @property
+    def folders(self):
+        return list(self.__folders)
+
+    def _covers(self, path):
+        return any(path.startswith(folder + '/') for folder in self.__folders)
+
+    def exists(self, path):
+        if path in self.__written_paths or not self._covers(path):
+            return self.__provider.exists(path)
+        return path in self.__existing
+
+
+def storage_command_digest(command: dict) -> str:
+    """sha256 hex digest of what an upload command sends to the storage provider."""
+    assert command['method'] == 'upload'
+    args = command['args']
+    if args.get('blob') is not None:
+        return hashlib.sha256(args['blob']).hexdigest()
+
+    hasher = hashlib.sha256()
+    with open(args['local_path'], 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+class ContentManifest():
+    """sha256 digest -> path of content a storage provider already has, kept in the storage provider.
+
+    Only paths which are never written once they exist (Those of if_not_exists uploads, the
+    reproducible artifacts) are recorded, so an entry's path always has the content of its digest.
+    Entries also record the no_cache / content_type the content was uploaded with since server side
+    copies take those from the source rather than the upload they stand in for."""
+
+    def __init__(self, provider, path, entries=None):
+        self.provider = provider
+        self.path = path
+        self.entries = entries if entries is not None else {}
+        # Paths recorded by this run, which will exist once the stage they're written in is done.
+        self.__added = set()
+
+    @classmethod
+    def load(cls, provider, path):
+        if not provider.exists(path):
+            return cls(provider, path)
+        return cls(provider, path, json.loads(provider.fetch(path).decode()))
+
+    def find(self, digest, no_cache, content_type) -> Optional[str]:
+        """Path of the given content in the storage provider if it has it with the same metadata."""
+        entry = self.entries.get(digest)
+        if entry is None or entry['no_cache'] != no_cache or entry['content_type'] != content_type:
+            return None
+        # Entries of previous runs may have been removed from the storage since.
+        if entry['path'] not in self.__added and not self.provider.exists(entry['path']):
+            log.debug("Dropping content manifest entry for removed %s", entry['path'])
+            del self.entries[digest]
+            return None
+        return entry['path']
+
+    def add(self, digest, path, no_cache, content_type):
+        if digest in self.entries:
+            return
+        self.entries[digest] = {'path': path, 'no_cache': no_cache, 'content_type': content_type}
+        self.__added.add(path)
+
+    def upload_command(self) -> dict:
+        """Storage command writing the manifest, in a single upload so readers see all of it or none."""
+        return {
+            'method': 'upload',
+            'if_not_exists': False,
+            'args': {
+                'destination_path': self.path,
+                'blob': to_json(self.entries).encode('utf-8'),
+                'no_cache': True,
+                'content_type': 'application/json; charset=utf-8'}}
+
 
+def deduplicate_storage_commands(storage_commands: dict, manifest: ContentManifest, digests: dict) -> dict:
+    """Turn uploads of content the manifest knows the storage provider has into copies of it.
+
+    digests has the storage_command_digest of each upload command (By id()). The stage1 uploads which
+    are if_not_exists get recorded in the manifest, which is written in stage2 once they all exist."""
+    deduplicated = {'stage1': [], 'stage2': []}
     for stage in ['stage1', 'stage2']:
-        commands = storage_commands[stage]
-        for provider_name, provider in storage_providers.items():
-            for artifact in commands:
-                path = artifact['args']['destination_path']
+        for command in storage_commands[stage]:
+            if command['method'] == 'upload':
+                args = command['args']
+                digest = digests[id(command)]
+                metadata = (args.get('no_cache', False), args.get('content_type'))
+                source_path = manifest.find(digest, *metadata)
+                if stage == 'stage1' and command['if_not_exists']:
+                    manifest.add(digest, args['destination_path'], *metadata)
+                if source_path is not None and source_path != args['destination_path']:
+                    log.debug("Copying %s to %s instead of uploading the same content", source_path,
+                              args['destination_path'])
+                    command = {
+                        'method': 'copy',
+                        'if_not_exists': command['if_not_exists'],
+                        'args': {
+                            'source_path': source_path,
+                            'destination_path': args['destination_path']}}
+            deduplicated[stage].append(command)
+
+    deduplicated['stage2'].append(manifest.upload_command())
+    return deduplicated
+
+
+def deduplicate_provider_storage_commands(
+        storage_providers: dict,
+        provider_storage_commands: dict,
+        manifest_paths: dict,
+        max_workers: int=16) -> dict:
+    """deduplicate_storage_commands for each storage provider with a content manifest path in manifest_paths.
+
+    Content uploaded to several storage providers / paths is only hashed once."""
+    if not manifest_paths:
+        return provider_storage_commands
+
+    uploads = {}
+    for name in manifest_paths:
+        for stage in ['stage1', 'stage2']:
+            for command in provider_storage_commands[name][stage]:
+                if command['method'] == 'upload':
+                    args = command['args']
+                    key = ('local_path', args['local_path']) if args.get('blob') is None else ('blob', args['blob'])
+                    uploads.setdefault(key, []).append(command)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        key_digests = dict(zip(uploads.keys(), executor.map(
+            lambda commands: storage_command_digest(commands[0]), uploads.values())))
+        manifests = dict(zip(manifest_paths.keys(), executor.map(
+            lambda name: ContentManifest.load(storage_providers[name], manifest_paths[name]), manifest_paths.keys())))
+    digests = {id(command): key_digests[key] for key, commands in uploads.items() for command in commands}
+
+    provider_storage_commands = dict(provider_storage_commands)
+    for name, manifest in manifests.items():
+        provider_storage_commands[name] = deduplicate_storage_commands(
+            provider_storage_commands[name], manifest, digests)
+    return provider_storage_commands
+
+
+class StorageProgress():
+    """Aggregate progress / throughput of applying storage commands to a set of storage providers.
+
+    Safe to update from multiple threads."""
+
+    def __init__(self, provider_names, total):
+        self.total = total
+        self.done = 0
+        self.counts = {name: {'upload': 0, 'copy': 0, 'skipped': 0} for name in provider_names}
+        self.bytes = {name: 0 for name in provider_names}
+        # How storage providers which count it (LocalStorageProvider) copied files: {name: {method: count}}
+        self.copy_methods = {}
+        self.start = time.perf_counter()
+        self.__lock = threading.Lock()
+
+    def record(self, provider_name, action, path, size=0):
+        with self.__lock:
+            self.done += 1
+            self.counts[provider_name][action] += 1
+            self.bytes[provider_name] += size
+            done = self.done
+        log.debug("[%d/%d] %s %s to %s", done, self.total, action, path, provider_name)
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+    def report(self):
+        elapsed = self.elapsed
+        lines = ["Applied {} storage commands in {:.2f}s".format(self.done, elapsed)]
+        for name in sorted(self.counts):
+            counts = self.counts[name]
+            megabytes = self.bytes[name] / (1024 * 1024)
+            lines.append("{}: {} uploaded, {} copied, {} skipped, {:.1f} MiB ({:.1f} MiB/s)".format(
+                name, counts['upload'], counts['copy'], counts['skipped'], megabytes,
+                megabytes / elapsed if elapsed else 0))
+            if self.copy_methods.get(name):
+                lines.append("{} files copied by: {}".format(name, ', '.join(
+                    '{} {}'.format(method, count) for method, count in sorted(self.copy_methods[name].items()))))
+        return '\n'.join(lines)
+
+
+def apply_storage_commands(
+        storage_providers: dict,
+        storage_commands: dict,
+        max_workers: int=16,
+        provider_max_workers: Optional[dict]=None) -> StorageProgress:
+    """Apply the storage commands to all the storage providers.
+
+    Every command in stage1 completes before any command in stage2 starts. Within a stage the
+    commands run concurrently across storage providers and artifacts, using at most max_workers
+    threads in total and at most provider_max_workers[name] (Default: max_workers) at a time
+    against any one provider.
+
+    Existence checks for if_not_exists commands are answered by an ExistenceSnapshot of each
+    storage provider taken before stage1."""
+    assert storage_commands.keys() == {'stage1', 'stage2'}
+    return apply_provider_storage_commands(
+        storage_providers,
+        {name: storage_commands for name in storage_providers},
+        max_workers,
+        provider_max_workers)
+
+
+def apply_provider_storage_commands(
+        storage_providers: dict,
+        provider_storage_commands: dict,
+        max_workers: int=16,
+        provider_max_workers: Optional[dict]=None) -> StorageProgress:
+    """apply_storage_commands, but with separate storage commands for each storage provider."""
+    assert provider_storage_commands.keys() == storage_providers.keys()
+    assert max_workers > 0
+    provider_max_workers = provider_max_workers or {}
+
+    semaphores = {
+        name: threading.BoundedSemaphore(provider_max_workers.get(name, max_workers))
+        for name in storage_providers}
+    total = 0
+    for storage_commands in provider_storage_commands.values():
+        assert storage_commands.keys() == {'stage1', 'stage2'}
+        total += len(storage_commands['stage1']) + len(storage_commands['stage2'])
+    progress = StorageProgress(storage_providers.keys(), total)
+    copy_methods = {
+        name: collections.Counter(getattr(provider, 'copy_methods', {}))
+        for name, provider in storage_providers.items()}
+
+    def take_snapshot(provider_name, provider):
+        # A path only written by its own if_not_exists command can be answered from the snapshot, one
+        # which other commands write as well may have been created by the time it is checked.
+        storage_commands = provider_storage_commands[provider_name]
+        all_commands = storage_commands['stage1'] + storage_commands['stage2']
+        destinations = collections.Counter(command['args']['destination_path'] for command in all_commands)
+        written_paths = {path for path, count in destinations.items() if count > 1}
+        checked_paths = {command['args']['destination_path'] for command in all_commands if command['if_not_exists']}
+        with semaphores[provider_name]:
+            return ExistenceSnapshot(provider, checked_paths, written_paths)
+
+    def apply_chain(provider_name, provider, snapshot, chain):
+        for artifact in chain:
+            path = artifact['args']['destination_path']
+            with semaphores[provider_name]:
                 # If it is only supposed to be if the artifact does not exist, check for existence
                 # and skip if it exists.
-                if artifact['if_not_exists'] and provider.exists(path):
+                if artifact['if_not_exists'] and snapshot.exists(path):
                     log.debug("Store to %s artifact %s skipped because it already exists", provider_name, path)
+                    progress.record(provider_name, 'skipped', path)
                     continue
                 log.debug("Store to %s artifact %s by method %s", provider_name, path, artifact['method'])
                 getattr(provider, artifact['method'])(**artifact['args'])
+            progress.record(provider_name, artifact['method'], path, storage_command_size(artifact))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        snapshots = dict(zip(
+            storage_providers.keys(),
+            executor.map(take_snapshot, storage_providers.keys(), storage_providers.values())))
+        for stage in ['stage1', 'stage2']:
+            futures = [
+                executor.submit(apply_chain, provider_name, provider, snapshots[provider_name], chain)
+                for provider_name, provider in storage_providers.items()
+                for chain in storage_command_chains(provider_storage_commands[provider_name][stage])]
+            try:
+                for future in as_completed(futures):
+                    future.result()
+            except:
+                # Don't start anything new, the commands already running finish on executor shutdown.
+                for future in futures:
+                    future.cancel()
+                raise
+
+    for name, provider in storage_providers.items():
+        copied = collections.Counter(getattr(provider, 'copy_methods', {})) - copy_methods[name]
+        progress.copy_methods[name] = dict(copied)
+
+    return progress
+
+
+def get_local_artifact_paths(metadata, provider_names):
+    """Paths under packages/cache/ which make_channel_artifacts needs locally for the given providers."""
+    paths = set()
+    for module in load_providers(provider_names).values():
+        if hasattr(module, 'local_artifact_paths'):
+            paths |= module.local_artifact_paths(metadata['complete_dict'].keys(), metadata['all_completes'])
+    return paths
+
+
+def core_artifact_source_path(metadata, artifact):
+    """Path of the core artifact in the repository of the release described by metadata."""
+    if 'reproducible_path' in artifact:
+        return metadata['repository_path'] + '/' + artifact['reproducible_path']
+    return metadata['reproducible_artifact_path'] + '/' + artifact['channel_path']
+
+
+class PromotionPlan():
+    """How the core artifacts of a release get to the storage providers it's promoted to.
+
+    Each storage provider which already has a core artifact in the source repository copies it server
+    side. Reproducible artifacts are only downloaded if they're in local_paths (Needed to make the
+    channel artifacts), or are missing from some storage provider which then gets them uploaded."""
+
+    def __init__(self, metadata, storage_providers, local_paths, max_workers=16):
+        sources = {core_artifact_source_path(metadata, artifact) for artifact in metadata['core_artifacts']}
+
+        def find_missing(provider):
+            snapshot = ExistenceSnapshot(provider, sources, set())
+            return {path for path in sources if not snapshot.exists(path)}
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            self.missing = dict(zip(storage_providers.keys(), executor.map(find_missing, storage_providers.values())))
+
+        missing_anywhere = set().union(*self.missing.values())
+        self.downloads = {
+            artifact['reproducible_path'] for artifact in metadata['core_artifacts']
+            if 'reproducible_path' in artifact and (
+                artifact['reproducible_path'] in local_paths or
+                core_artifact_source_path(metadata, artifact) in missing_anywhere)}
+
+    def provider_metadata(self, metadata, provider_name):
+        """The metadata to make storage commands for the given provider from.
+
+        Core artifacts the storage provider doesn't have are uploaded from their local_path rather than
+        copied."""
+        missing = self.missing[provider_name]
+        if not missing:
+            return metadata
+        metadata = copy.copy(metadata)
+        metadata['core_artifacts'] = [
+            {key: value for key, value in artifact.items() if key != 'local_copy_from'}
+            if artifact.get('local_copy_from') in missing else artifact
+            for artifact in metadata['core_artifacts']]
+        return metadata
 
 
 # Two stages of uploading artifacts. First puts all the artifacts into their places / uploads
@@ -695,6 +1152,8 @@ class ReleaseManager():
 
     def _setup_storage(self, storage_config):
         self.__storage_providers = {}
+        self.__provider_max_workers = {}
+        self.__content_manifests = {}
         for name, options in storage_config.items():
             options = copy.deepcopy(options)
             if 'kind' not in options:
@@ -706,6 +1165,12 @@ class ReleaseManager():
             read_only = options.get('read_only', False)
             if 'read_only' in options:
                 del options['read_only']
+            if 'max_concurrency' in options:
+                self.__provider_max_workers[name] = options['max_concurrency']
+                del options['max_concurrency']
+            if 'content_manifest' in options:
+                self.__content_manifests[name] = options['content_manifest']
+                del options['content_manifest']
 
             # Construct the storage, making sure all remaining configuration options
             # are used.
@@ -722,6 +1187,7 @@ class ReleaseManager():
         self.__noop = noop
         self.__config = config
         self.__provider_names = provider_names
+        self.__upload_concurrency = config.get('options', dict()).get('upload_concurrency', 16)
 
         preferred_name = config.get('options', dict()).get('preferred')
         if preferred_name:
@@ -732,7 +1198,10 @@ class ReleaseManager():
     def get_metadata(self, src_channel):
         return from_json(self.__preferred_provider.fetch(src_channel + '/metadata.json').decode())
 
-    def fetch_key_artifacts(self, metadata):
+    def fetch_key_artifacts(self, metadata, reproducible_paths=None):
+        """Point the core artifacts at their copies in the release's repository, downloading them.
+
+        If reproducible_paths is given, only the reproducible artifacts in it are downloaded."""
         assert metadata['reproducible_artifact_path'][-1] != '/'
         assert metadata['repository_path'][-1] != '/'
 
@@ -752,7 +1221,7 @@ class ReleaseManager():
                     dest_path = 'packages/cache/bootstrap/' + dest_path
                 self.__preferred_provider.download(src_path, dest_path)
                 artifact['local_copy_from'] = src_path
-                artifact['local_path'] = artifact['channel_path']
+                artifact['local_path'] = dest_path
             if 'reproducible_path' in artifact:
                 assert artifact['reproducible_path'][0] != '/'
 
@@ -760,12 +1229,14 @@ class ReleaseManager():
 
                 src_path = metadata['repository_path'] + '/' + artifact['reproducible_path']
 
-                self.__preferred_provider.download_if_not_exist(src_path, local_path)
+                if reproducible_paths is None or artifact['reproducible_path'] in reproducible_paths:
+                    self.__preferred_provider.download_if_not_exist(src_path, local_path)
                 artifact['local_copy_from'] = src_path
                 artifact['local_path'] = local_path
 
-        for artifact in metadata['core_artifacts']:
-            fetch_artifact(artifact)
+        with ThreadPoolExecutor(max_workers=self.__upload_concurrency) as executor:
+            for future in [executor.submit(fetch_artifact, artifact) for artifact in metadata['core_artifacts']]:
+                future.result()
 
     def promote(self, src_channel, destination_repository, destination_channel):
         self.log.debug('promote: source channel: %s, destination repository: %s, destination channel: %s',
@@ -777,7 +1248,12 @@ class ReleaseManager():
         assert metadata['commit'] == util.dcos_image_commit, "You must promote from a checkout of " \
             "the same commit when `release create` aws run. {}".format(util.dcos_image_commit)
 
-        self.fetch_key_artifacts(metadata)
+        plan = PromotionPlan(
+            metadata,
+            self.__storage_providers,
+            get_local_artifact_paths(metadata, self.__provider_names),
+            self.__upload_concurrency)
+        self.fetch_key_artifacts(metadata, plan.downloads)
 
         repository = Repository(destination_repository, destination_channel, 'commit/{}'.format(metadata['commit']))
         set_repository_metadata(
@@ -785,10 +1261,12 @@ class ReleaseManager():
         assert 'tag' in metadata
         del metadata['channel_artifacts']
 
-        metadata['channel_artifacts'] = make_channel_artifacts(metadata, self.__provider_names)
+        metadata['channel_artifacts'] = make_channel_artifacts(
+            metadata, self.__provider_names, ReleaseIndex.from_metadata(metadata))
 
-        storage_commands = repository.make_commands(metadata)
-        self.apply_storage_commands(storage_commands)
+        self.apply_provider_storage_commands({
+            name: repository.make_commands(plan.provider_metadata(metadata, name))
+            for name in self.__storage_providers})
 
         return metadata
 
@@ -798,7 +1276,7 @@ class ReleaseManager():
         metadata = self.get_metadata(src_channel)
         self.fetch_key_artifacts(metadata)
         del metadata['channel_artifacts']
-        make_channel_artifacts(metadata, self.__provider_names)
+        make_channel_artifacts(metadata, self.__provider_names, ReleaseIndex.from_metadata(metadata))
 
         return metadata
 
@@ -814,8 +1292,9 @@ class ReleaseManager():
 
         # TOOD(cmaloney): Figure out why the cached version hasn't been working right
         # here from the TeamCity agents. For now hardcoding the non-cached s3 download locatoin.
-        metadata = make_stable_artifacts(
+        index = build_release_index(
             self.__config['options']['cloudformation_s3_url'] + '/' + repository_path, tree_variants)
+        metadata = make_stable_metadata(index)
 
         # Metadata should already have things like bootstrap_id in it.
         assert 'bootstrap_dict' in metadata
@@ -826,9 +1305,7 @@ class ReleaseManager():
         # TODO(branden): Make the complete package list available in the installer (for
         # dcos_installer.backend.do_aws_cf_configure()) and move this assertion to make_bootstrap_artifacts().
         for info in metadata['all_completes'].values():
-            bootstrap_active_packages = set(
-                pkgpanda.util.load_json('packages/cache/bootstrap/{}.active.json'.format(info['bootstrap']))
-            )
+            bootstrap_active_packages = set(index.active_packages(info['bootstrap']))
             assert bootstrap_active_packages <= set(info['packages'])
 
         repository = Repository(repository_path, channel, 'commit/{}'.format(metadata['commit']))
@@ -837,7 +1314,7 @@ class ReleaseManager():
         metadata['tag'] = tag
         assert 'channel_artifacts' not in metadata
 
-        metadata['channel_artifacts'] = make_channel_artifacts(metadata, self.__provider_names)
+        metadata['channel_artifacts'] = make_channel_artifacts(metadata, self.__provider_names, index)
 
         storage_commands = repository.make_commands(metadata)
         self.apply_storage_commands(storage_commands)
@@ -846,12 +1323,24 @@ class ReleaseManager():
 
     def apply_storage_commands(self, storage_commands):
         assert storage_commands.keys() == {'stage1', 'stage2'}
+        self.apply_provider_storage_commands({name: storage_commands for name in self.__storage_providers})
 
+    def apply_provider_storage_commands(self, provider_storage_commands):
         if self.__noop:
             return
 
         with logger.scope("Uploading artifacts"):
-            apply_storage_commands(self.__storage_providers, storage_commands)
+            provider_storage_commands = deduplicate_provider_storage_commands(
+                self.__storage_providers,
+                provider_storage_commands,
+                self.__content_manifests,
+                self.__upload_concurrency)
+            progress = apply_provider_storage_commands(
+                self.__storage_providers,
+                provider_storage_commands,
+                self.__upload_concurrency,
+                self.__provider_max_workers)
+            logger.normal(progress.report())
 
 
 _config = None
@@ -1,14 +1,26 @@
 import abc
+import itertools
+import logging
 import os.path
+from concurrent.futures import ThreadPoolExecutor
 
 from pkgpanda.util import make_directory
 
+log = logging.getLogger(__name__)
+
 
 class UnsupportedOperation(RuntimeError):
     pass
 
 
 class AbstractStorageProvider(metaclass=abc.ABCMeta):
+    # Storage providers which implement the *_multipart_upload / upload_part methods set this. Uploads
+    # from a local_path bigger than part_size then go in parts, part_concurrency at a time, with each
+    # part tried up to part_attempts times.
+    supports_multipart = False
+    part_size = 64 * 1024 * 1024
+    part_concurrency = 4
+    part_attempts = 3
 
     @abc.abstractmethod
     def copy(self,
@@ -17,7 +29,6 @@ class AbstractStorageProvider(metaclass=abc.ABCMeta):
         """Copy the file and all metadata from destination_path to source_path."""
         pass
 
-    @abc.abstractmethod
     def upload(self,
                destination_path,
                blob=None,
@@ -25,8 +36,77 @@ class AbstractStorageProvider(metaclass=abc.ABCMeta):
                no_cache=None,
                content_type=None):
         """Upload to destinoation_path the given blob or local_path, attaching metadata for additional properties."""
+        assert local_path is None or blob is None
+        if self.should_upload_parts(local_path):
+            self.upload_parts(destination_path, local_path, no_cache, content_type)
+        else:
+            self.upload_inner(destination_path, blob, local_path, no_cache, content_type)
+
+    @abc.abstractmethod
+    def upload_inner(self,
+                     destination_path,
+                     blob=None,
+                     local_path=None,
+                     no_cache=None,
+                     content_type=None):
+        """Upload the whole blob or local_path in one go (See upload())."""
         pass
 
+    def configure_parts(self, part_size=None, part_concurrency=None):
+        if part_size is not None:
+            assert part_size > 0
+            self.part_size = part_size
+        if part_concurrency is not None:
+            assert part_concurrency > 0
+            self.part_concurrency = part_concurrency
+
+    def start_multipart_upload(self, destination_path, no_cache=None, content_type=None):
+        """Start a chunked upload to destination_path, returning a handle to pass to the other part methods."""
+        raise NotImplementedError()
+
+    def upload_part(self, upload, number, data):
+        """Upload part number (Starting at 1) of the given upload, returning what complete needs to know about it.
+
+        May be called concurrently for different parts of one upload."""
+        raise NotImplementedError()
+
+    def complete_multipart_upload(self, upload, parts):
+        """Assemble the parts, in order, into the destination of the given upload."""
+        raise NotImplementedError()
+
+    def abort_multipart_upload(self, upload):
+        """Throw away the parts of an upload which won't be completed."""
+        raise NotImplementedError()
+
+    def should_upload_parts(self, local_path):
+        return self.supports_multipart and local_path is not None and os.path.getsize(local_path) > self.part_size
+
+    def upload_parts(self, destination_path, local_path, no_cache=None, content_type=None):
+        """Upload local_path to destination_path in parts of part_size, part_concurrency at a time."""
+        offsets = range(0, os.path.getsize(local_path), self.part_size)
+
+        def send_part(number, offset):
+            with open(local_path, 'rb') as f:
+                f.seek(offset)
+                data = f.read(self.part_size)
+            for attempt in range(1, self.part_attempts + 1):
+                try:
+                    return self.upload_part(upload, number, data)
+                except Exception as ex:
+                    if attempt == self.part_attempts:
+                        raise
+                    log.warning("Retrying part %d of %s after attempt %d failed: %s",
+                                number, destination_path, attempt, ex)
+
+        upload = self.start_multipart_upload(destination_path, no_cache, content_type)
+        try:
+            with ThreadPoolExecutor(max_workers=self.part_concurrency) as executor:
+                parts = list(executor.map(send_part, itertools.count(1), offsets))
+            self.complete_multipart_upload(upload, parts)
+        except:
+            self.abort_multipart_upload(upload)
+            raise
+
     # TODO(cmaloney): Add test for download, download_if_not_exist
     @abc.abstractmethod
     def download_inner(self, path, local_path):
@@ -97,12 +177,12 @@ class ReadOnlyProxy(AbstractStorageProvider):
              destination_path):
         raise UnsupportedOperation("copy on read-only storage")
 
-    def upload(self,
-               destination_path,
-               blob=None,
-               local_path=None,
-               no_cache=None,
-               content_type=None):
+    def upload_inner(self,
+                     destination_path,
+                     blob=None,
+                     local_path=None,
+                     no_cache=None,
+                     content_type=None):
         raise UnsupportedOperation("upload on read-only storage")
 
     def download(self, path, local_path):
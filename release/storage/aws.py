@@ -1,3 +1,4 @@
+import threading
 from typing import Optional
 
 import boto3
@@ -29,9 +30,11 @@ def get_aws_session(access_key_id, secret_access_key, region_name=None):
 
 class S3StorageProvider(AbstractStorageProvider):
     name = 'aws'
+    supports_multipart = True
 
     def __init__(self, bucket, object_prefix, download_url,
-                 access_key_id=None, secret_access_key=None, region_name=None):
+                 access_key_id=None, secret_access_key=None, region_name=None,
+                 part_size=None, part_concurrency=None):
         """ If access_key_id and secret_acccess_key are unset, boto3 will
         try to authenticate by other methods. See here for other credential options:
         http://boto3.readthedocs.io/en/latest/guide/configuration.html#configuring-credentials
@@ -39,10 +42,12 @@ class S3StorageProvider(AbstractStorageProvider):
         if object_prefix is not None:
             assert object_prefix and not object_prefix.startswith('/') and not object_prefix.endswith('/')
 
-        self.__session = get_aws_session(access_key_id, secret_access_key, region_name)
-        self.__bucket = self.__session.resource('s3').Bucket(bucket)
+        self.__session_args = (access_key_id, secret_access_key, region_name)
+        self.__bucket_name = bucket
+        self.__local = threading.local()
         self.__object_prefix = object_prefix
         self.__url = download_url
+        self.configure_parts(part_size, part_concurrency)
 
     @property
     def object_prefix(self):
@@ -50,16 +55,25 @@ class S3StorageProvider(AbstractStorageProvider):
             return ''
         return self.__object_prefix + '/'
 
+    @property
+    def _bucket(self):
+        # boto3 sessions and resources aren't thread safe, so every thread which uses the provider
+        # (ex: the concurrent release.apply_storage_commands) gets its own.
+        if not hasattr(self.__local, 'bucket'):
+            session = get_aws_session(*self.__session_args)
+            self.__local.bucket = session.resource('s3').Bucket(self.__bucket_name)
+        return self.__local.bucket
+
     def _get_path(self, name):
 
         return self.object_prefix + name
 
     def _get_objects_with_prefix(self, prefix):
-        return self.__bucket.objects.filter(Prefix=self._get_path(prefix))
+        return self._bucket.objects.filter(Prefix=self._get_path(prefix))
 
     def get_object(self, name):
         assert not name.startswith('/')
-        return self.__bucket.Object(self._get_path(name))
+        return self._bucket.Object(self._get_path(name))
 
     def fetch(self, path):
         body = self.get_object(path).get()['Body']
@@ -82,18 +96,42 @@ class S3StorageProvider(AbstractStorageProvider):
 
         new_object.copy_from(CopySource=old_path, ACL='bucket-owner-full-control')
 
-    def upload(self,
-               destination_path: str,
-               blob: Optional[bytes]=None,
-               local_path: Optional[str]=None,
-               no_cache: bool=False,
-               content_type: Optional[str]=None):
+    def _extra_args(self, no_cache, content_type):
         extra_args = {}
         extra_args['ACL'] = 'bucket-owner-full-control'
         if no_cache:
             extra_args['CacheControl'] = 'no-cache'
         if content_type:
             extra_args['ContentType'] = content_type
+        return extra_args
+
+    def start_multipart_upload(self, destination_path, no_cache=None, content_type=None):
+        # Only plain values go in the handle since parts are uploaded from other threads, which each
+        # have their own boto3 objects.
+        multipart_upload = self.get_object(destination_path).initiate_multipart_upload(
+            **self._extra_args(no_cache, content_type))
+        return {'key': multipart_upload.object_key, 'upload_id': multipart_upload.id}
+
+    def _get_multipart_upload(self, upload):
+        return self._bucket.Object(upload['key']).MultipartUpload(upload['upload_id'])
+
+    def upload_part(self, upload, number, data):
+        response = self._get_multipart_upload(upload).Part(number).upload(Body=data)
+        return {'PartNumber': number, 'ETag': response['ETag']}
+
+    def complete_multipart_upload(self, upload, parts):
+        self._get_multipart_upload(upload).complete(MultipartUpload={'Parts': parts})
+
+    def abort_multipart_upload(self, upload):
+        self._get_multipart_upload(upload).abort()
+
+    def upload_inner(self,
+                     destination_path: str,
+                     blob: Optional[bytes]=None,
+                     local_path: Optional[str]=None,
+                     no_cache: bool=False,
+                     content_type: Optional[str]=None):
+        extra_args = self._extra_args(no_cache, content_type)
 
         s3_object = self.get_object(destination_path)
 
@@ -119,7 +157,7 @@ class S3StorageProvider(AbstractStorageProvider):
             name = object_summary.key
 
             # Sanity check the prefix is there before removing.
-            assert name.startswith(self.__object_prefix + '/')
+            assert name.startswith(self.object_prefix)
 
             # Add the unprefixed name since the caller of this function doesn't
             # know we've added the prefix / only sees inside the prefix ever.
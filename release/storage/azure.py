@@ -9,8 +9,9 @@ from release.storage import AbstractStorageProvider
 
 class AzureBlockBlobStorageProvider(AbstractStorageProvider):
     name = 'azure'
+    supports_multipart = True
 
-    def __init__(self, account_name, account_key, container, download_url):
+    def __init__(self, account_name, account_key, container, download_url, part_size=None, part_concurrency=None):
         assert download_url.endswith('/')
         self.container = container
         session = requests.Session()
@@ -21,6 +22,7 @@ class AzureBlockBlobStorageProvider(AbstractStorageProvider):
                                                                 account_key=account_key,
                                                                 request_session=session)
         self.__url = download_url
+        self.configure_parts(part_size, part_concurrency)
 
     @property
     def url(self):
@@ -62,19 +64,45 @@ class AzureBlockBlobStorageProvider(AbstractStorageProvider):
         # synchronous and successful.
         assert resp.status == 'success'
 
-    @retry(stop_max_attempt_number=5)
-    def upload(self,
-               destination_path: str,
-               blob: Optional[bytes]=None,
-               local_path: Optional[str]=None,
-               no_cache: bool=False,
-               content_type: Optional[str]=None):
+    def _content_settings(self, no_cache, content_type):
         content_settings = azure.storage.blob.ContentSettings()
 
         if no_cache:
             content_settings.cache_control = None
         if content_type:
             content_settings.content_type = content_type
+        return content_settings
+
+    def start_multipart_upload(self, destination_path, no_cache=None, content_type=None):
+        return {
+            'destination_path': destination_path,
+            'content_settings': self._content_settings(no_cache, content_type)}
+
+    def upload_part(self, upload, number, data):
+        # Block ids must all be the same length within a blob.
+        block_id = '{:08d}'.format(number)
+        self.blob_service.put_block(self.container, upload['destination_path'], data, block_id)
+        return azure.storage.blob.BlobBlock(id=block_id)
+
+    def complete_multipart_upload(self, upload, parts):
+        self.blob_service.put_block_list(
+            self.container,
+            upload['destination_path'],
+            parts,
+            content_settings=upload['content_settings'])
+
+    def abort_multipart_upload(self, upload):
+        # Azure garbage collects uncommitted blocks on its own.
+        pass
+
+    @retry(stop_max_attempt_number=5)
+    def upload_inner(self,
+                     destination_path: str,
+                     blob: Optional[bytes]=None,
+                     local_path: Optional[str]=None,
+                     no_cache: bool=False,
+                     content_type: Optional[str]=None):
+        content_settings = self._content_settings(no_cache, content_type)
 
         # Must be a local_path or blob upload, not both
         assert local_path is None or blob is None
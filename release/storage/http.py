@@ -20,12 +20,12 @@ class HttpStorageProvider(AbstractStorageProvider):
              destination_path):
         raise NotImplementedError()
 
-    def upload(self,
-               destination_path,
-               blob=None,
-               local_path=None,
-               no_cache=None,
-               content_type=None):
+    def upload_inner(self,
+                     destination_path,
+                     blob=None,
+                     local_path=None,
+                     no_cache=None,
+                     content_type=None):
         raise NotImplementedError()
 
     def download_inner(self, path, local_path):
@@ -1,20 +1,33 @@
+import collections
+import logging
+import os
 import os.path
+import threading
 from typing import Optional
 
-from pkgpanda.util import copy_file, is_absolute_path, make_directory, remove_directory
+from pkgpanda.util import copy_file_fast, is_absolute_path, make_directory, remove_directory
 from release.storage import AbstractStorageProvider
 
+log = logging.getLogger(__name__)
+
 
 # Local storage provider useful for testing. Not used for the local artifacts
 # since it would cause excess / needless copies, and doesn't work for "promote"
 # since the artifacts won't be local (And downloading them all to be local
 # would be a significant time sink).
+#
+# Files are copied into / within the storage with pkgpanda.util.copy_file_fast, which hard links them when possible
+# (Unless hardlink is False), so files given to upload() mustn't be modified in place afterwards.
+# copy_methods counts how many files were copied each way.
 class LocalStorageProvider(AbstractStorageProvider):
     name = 'local_storage_provider'
 
-    def __init__(self, path: str):
+    def __init__(self, path: str, hardlink: bool=True):
         assert not path.endswith('/')
         self.__storage_path = path
+        self.__hardlink = hardlink
+        self.__lock = threading.Lock()
+        self.copy_methods = collections.Counter()
 
     def __full_path(self, path):
         return self.__storage_path + '/' + path
@@ -24,17 +37,24 @@ class LocalStorageProvider(AbstractStorageProvider):
             return f.read()
 
     def download_inner(self, path, local_path):
-        copy_file(self.__full_path(path), local_path)
+        # Never hard linked, the downloaded file is the caller's to modify.
+        self.__copy_file(self.__full_path(path), local_path, hardlink=False)
+
+    def __copy_file(self, full_source_path, full_destination_path, hardlink):
+        method = copy_file_fast(full_source_path, full_destination_path, hardlink)
+        log.debug("Copied %s to %s by %s", full_source_path, full_destination_path, method)
+        with self.__lock:
+            self.copy_methods[method] += 1
 
     # Copy between fully qualified paths
     def __copy(self, full_source_path, full_destination_path):
         make_directory(os.path.dirname(full_destination_path))
-        copy_file(full_source_path, full_destination_path)
+        self.__copy_file(full_source_path, full_destination_path, self.__hardlink)
 
     def copy(self, source_path, destination_path):
         self.__copy(self.__full_path(source_path), self.__full_path(destination_path))
 
-    def upload(
+    def upload_inner(
             self,
             destination_path: str,
             blob: Optional[bytes]=None,
@@ -51,8 +71,12 @@ class LocalStorageProvider(AbstractStorageProvider):
             self.__copy(local_path, destination_full_path)
         else:
             assert isinstance(blob, bytes)
-            with open(destination_full_path, 'wb') as f:
+            # Written next to the destination and renamed over it, so readers never see part of the
+            # blob and a file the destination was hard linked to isn't written through.
+            temporary_path = '{}.{}.tmp'.format(destination_full_path, threading.get_ident())
+            with open(temporary_path, 'wb') as f:
                 f.write(blob)
+            os.replace(temporary_path, destination_full_path)
 
     def exists(self, path):
         assert not is_absolute_path(path)
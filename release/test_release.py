@@ -1,16 +1,24 @@
 import copy
+import json
 import logging
 import os
 import subprocess
+import threading
+import time
 import uuid
+from types import SimpleNamespace
 
 import boto3
 import pytest
 
+import pkgpanda.util
 import release
 import release.storage.aws
+import release.storage.azure
+import release.storage.local
 from pkgpanda.build import BuildError
 from pkgpanda.util import is_windows, make_directory, variant_prefix, write_json, write_string
+from release.storage.local import LocalStorageProvider
 from . import load_provider_names
 
 
@@ -216,6 +224,439 @@ def test_storage_provider_local(tmpdir):
     exercise_storage_provider(work_dir, 'local_path', {'path': str(repo_dir)})
 
 
+def test_local_storage_provider_copy_methods(tmpdir):
+    work_dir = tmpdir.mkdir("work")
+    work_dir.join('big').write('big contents')
+    storage = LocalStorageProvider(str(tmpdir.mkdir("repository")))
+
+    progress = release.apply_storage_commands({'local': storage}, {
+        'stage1': [make_storage_command('upload', destination_path='a/big', local_path=str(work_dir.join('big')))],
+        'stage2': [make_storage_command('copy', source_path='a/big', destination_path='b/big')]})
+    assert storage.copy_methods == {'hardlink': 2}
+    assert progress.copy_methods == {'local': {'hardlink': 2}}
+    assert "local files copied by: hardlink 2" in progress.report()
+
+    storage.download('b/big', str(work_dir.join('downloaded')))
+    assert not os.path.samefile(str(work_dir.join('big')), str(work_dir.join('downloaded')))
+    assert storage.copy_methods['hardlink'] == 2
+
+
+class TrackingStorageProvider(LocalStorageProvider):
+    """LocalStorageProvider which is slow to upload and records the most uploads it saw at once."""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+
+    def upload(self, destination_path, blob=None, local_path=None, no_cache=False, content_type=None):
+        with self.lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(0.05)
+        super().upload(destination_path, blob, local_path, no_cache, content_type)
+        with self.lock:
+            self.active -= 1
+
+
+def make_storage_command(method, if_not_exists=False, **args):
+    return {'method': method, 'if_not_exists': if_not_exists, 'args': args}
+
+
+def test_storage_command_chains():
+    upload_a = make_storage_command('upload', destination_path='a', blob=b'a')
+    copy_a = make_storage_command('copy', source_path='a', destination_path='b')
+    copy_b = make_storage_command('copy', source_path='b', destination_path='c')
+    upload_d = make_storage_command('upload', destination_path='d', blob=b'd')
+    copy_external = make_storage_command('copy', source_path='elsewhere', destination_path='e')
+    assert release.storage_command_chains([upload_a, upload_d, copy_a, copy_external, copy_b]) == [
+        [upload_a, copy_a, copy_b], [upload_d], [copy_external]]
+
+
+# TODO: DCOS_OSS-3460 - muted Windows tests requiring investigation
+@pytest.mark.skipif(is_windows, reason="Fails on windows, cause unknown")
+def test_apply_storage_commands(tmpdir):
+    local_file = tmpdir.join('local')
+    local_file.write('local_contents')
+    providers = {
+        'one': TrackingStorageProvider(str(tmpdir.mkdir('one'))),
+        'two': TrackingStorageProvider(str(tmpdir.mkdir('two')))}
+    for name in providers:
+        tmpdir.join(name, 'existing').write('existing')
+
+    stage1 = [make_storage_command('upload', destination_path='r/{}'.format(i), blob=str(i).encode())
+              for i in range(8)]
+    stage1 += [
+        make_storage_command('upload', destination_path='r/local', local_path=str(local_file)),
+        make_storage_command('copy', source_path='r/local', destination_path='c/local'),
+        make_storage_command('upload', True, destination_path='existing', blob=b'new')]
+    stage2 = [make_storage_command('copy', source_path='c/local', destination_path='local')]
+
+    progress = release.apply_storage_commands(
+        providers, {'stage1': stage1, 'stage2': stage2}, max_workers=8, provider_max_workers={'one': 1})
+
+    for name, provider in providers.items():
+        for i in range(8):
+            assert provider.fetch('r/{}'.format(i)) == str(i).encode()
+        assert provider.fetch('local') == b'local_contents'
+        assert provider.fetch('existing') == b'existing'
+        assert progress.counts[name] == {'upload': 9, 'copy': 2, 'skipped': 1}
+        assert progress.bytes[name] == 8 + len('local_contents')
+    assert providers['one'].max_active == 1
+    assert providers['two'].max_active > 1
+    assert progress.done == progress.total == 24
+    assert 'two: 9 uploaded, 2 copied, 1 skipped' in progress.report()
+
+    # A failure in stage1 stops stage2 from running.
+    stage1 = [make_storage_command('copy', source_path='missing', destination_path='missing_copy')]
+    stage2 = [make_storage_command('upload', destination_path='after_failure', blob=b'')]
+    with pytest.raises(FileNotFoundError):
+        release.apply_storage_commands(providers, {'stage1': stage1, 'stage2': stage2})
+    for provider in providers.values():
+        assert not provider.exists('after_failure')
+
+
+class CountingStorageProvider(LocalStorageProvider):
+    """LocalStorageProvider which counts the exists and list_recursive round trips made against it."""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.exists_calls = []
+        self.list_calls = []
+
+    def exists(self, path):
+        self.exists_calls.append(path)
+        return super().exists(path)
+
+    def list_recursive(self, path):
+        self.list_calls.append(path)
+        return super().list_recursive(path)
+
+
+# TODO: DCOS_OSS-3460 - muted Windows tests requiring investigation
+@pytest.mark.skipif(is_windows, reason="Fails on windows, cause unknown")
+def test_apply_storage_commands_existence_snapshot(tmpdir):
+    provider = CountingStorageProvider(str(tmpdir.mkdir('repository')))
+    for i in range(0, 20, 2):
+        provider.upload('repo/packages/p{0}/p{0}.tar.xz'.format(i), blob=b'old')
+    provider.upload('top_level', blob=b'old')
+
+    stage1 = [
+        make_storage_command('upload', True, destination_path='repo/packages/p{0}/p{0}.tar.xz'.format(i), blob=b'new')
+        for i in range(20)]
+    stage1 += [
+        make_storage_command('upload', True, destination_path='top_level', blob=b'new'),
+        make_storage_command('upload', True, destination_path='repo/channel/written', blob=b'first')]
+    # The second stage checks a path the first stage created after the snapshot was taken.
+    stage2 = [make_storage_command('upload', True, destination_path='repo/channel/written', blob=b'second')]
+
+    progress = release.apply_storage_commands({'local': provider}, {'stage1': stage1, 'stage2': stage2})
+
+    for i in range(20):
+        expected = b'old' if i % 2 == 0 else b'new'
+        assert provider.fetch('repo/packages/p{0}/p{0}.tar.xz'.format(i)) == expected
+    assert provider.fetch('top_level') == b'old'
+    assert provider.fetch('repo/channel/written') == b'first'
+    assert progress.counts['local'] == {'upload': 11, 'copy': 0, 'skipped': 12}
+    # All the package folders are found out about from one listing.
+    assert provider.list_calls == ['repo/packages']
+    assert sorted(provider.exists_calls) == ['repo/channel/written', 'repo/channel/written', 'top_level']
+
+
+def test_listing_folders():
+    assert release.listing_folders([
+        'repo/packages/a/a--1.tar.xz',
+        'repo/packages/b/b--1.tar.xz',
+        'repo/bootstrap/id.bootstrap.tar.xz',
+        'repo/bootstrap/id.active.json',
+        'repo/package_lists/id.package_list.json',
+        'repo/pull/1/commit/sha-1/bootstrap.latest',
+        'top_level']) == ['repo/bootstrap', 'repo/package_lists', 'repo/packages', 'repo/pull/1/commit/sha-1']
+    assert release.listing_folders(['packages/a/a--1.tar.xz']) == ['packages']
+    assert release.listing_folders(['a/b/file', 'a/b/c/file', 'a/bc/file']) == ['a/b', 'a/bc']
+
+
+def test_existence_snapshot_nested_folders(tmpdir):
+    provider = CountingStorageProvider(str(tmpdir.mkdir('repository')))
+    provider.upload('a/b/c/file', blob=b'')
+    snapshot = release.ExistenceSnapshot(provider, {'a/b/file', 'a/b/c/file', 'a/bc/file'}, set())
+    assert snapshot.folders == ['a/b', 'a/bc']
+    assert snapshot.exists('a/b/c/file')
+    assert not snapshot.exists('a/b/file')
+    assert not snapshot.exists('a/bc/file')
+    assert provider.exists_calls == []
+
+    # Storage providers which can't list fall back to checking every path.
+    def list_recursive(path):
+        raise NotImplementedError()
+    provider.list_recursive = list_recursive
+    snapshot = release.ExistenceSnapshot(provider, {'a/b/c/file'}, set())
+    assert snapshot.folders == []
+    assert snapshot.exists('a/b/c/file')
+    assert provider.exists_calls == ['a/b/c/file']
+
+    # As do ones which fail to list, e.g. without the permission to.
+    def list_recursive(path):
+        raise RuntimeError('Access Denied')
+    provider.list_recursive = list_recursive
+    snapshot = release.ExistenceSnapshot(provider, {'a/b/c/file', 'a/bc/file'}, set())
+    assert snapshot.folders == []
+    assert snapshot.exists('a/b/c/file')
+    assert not snapshot.exists('a/bc/file')
+    assert provider.exists_calls == ['a/b/c/file', 'a/b/c/file', 'a/bc/file']
+
+
+@pytest.mark.parametrize('object_prefix,keys', [
+    (None, ['repo/packages/a/a--1.tar.xz', 'repo/packages/b/b--1.tar.xz']),
+    ('prefix', ['prefix/repo/packages/a/a--1.tar.xz', 'prefix/repo/packages/b/b--1.tar.xz'])])
+def test_s3_list_recursive(object_prefix, keys):
+    provider = release.storage.aws.S3StorageProvider('bucket', object_prefix, 'https://example.com')
+    prefixes = []
+
+    def get_objects_with_prefix(prefix):
+        prefixes.append(prefix)
+        return [SimpleNamespace(key=key) for key in keys]
+    provider._get_objects_with_prefix = get_objects_with_prefix
+
+    assert provider.list_recursive('repo/packages') == {'repo/packages/a/a--1.tar.xz', 'repo/packages/b/b--1.tar.xz'}
+    assert prefixes == ['repo/packages']
+
+
+class MultipartStorageProvider(LocalStorageProvider):
+    """LocalStorageProvider which uploads big files in parts, failing each part number in fail_parts
+    the given number of times before it succeeds."""
+    supports_multipart = True
+
+    def __init__(self, path, fail_parts):
+        super().__init__(path)
+        self.configure_parts(part_size=10, part_concurrency=3)
+        self.fail_parts = fail_parts
+        self.attempts = []
+        self.aborted = []
+        self.lock = threading.Lock()
+
+    def start_multipart_upload(self, destination_path, no_cache=None, content_type=None):
+        return {'destination_path': destination_path, 'parts': {}}
+
+    def upload_part(self, upload, number, data):
+        with self.lock:
+            self.attempts.append(number)
+            if self.fail_parts.get(number, 0) > 0:
+                self.fail_parts[number] -= 1
+                raise ConnectionError("Part {} failed".format(number))
+        upload['parts'][number] = data
+        return number
+
+    def complete_multipart_upload(self, upload, parts):
+        blob = b''.join(upload['parts'][number] for number in parts)
+        super().upload(upload['destination_path'], blob=blob)
+
+    def abort_multipart_upload(self, upload):
+        self.aborted.append(upload['destination_path'])
+
+
+# TODO: DCOS_OSS-3460 - muted Windows tests requiring investigation
+@pytest.mark.skipif(is_windows, reason="Fails on windows, cause unknown")
+def test_multipart_upload(tmpdir):
+    contents = os.urandom(95)
+    big_file = tmpdir.join('big')
+    big_file.write_binary(contents)
+    small_file = tmpdir.join('small')
+    small_file.write_binary(contents[:10])
+
+    provider = MultipartStorageProvider(str(tmpdir.mkdir('repository')), {3: 1, 10: 2})
+    provider.upload('big', local_path=str(big_file))
+    assert provider.fetch('big') == contents
+    assert sorted(provider.attempts) == [1, 2, 3, 3, 4, 5, 6, 7, 8, 9, 10, 10, 10]
+
+    # Files no bigger than one part are uploaded whole.
+    provider.attempts = []
+    provider.upload('small', local_path=str(small_file))
+    assert provider.fetch('small') == contents[:10]
+    assert provider.attempts == []
+
+    # A part which fails every attempt aborts the upload.
+    provider.fail_parts = {5: provider.part_attempts}
+    with pytest.raises(ConnectionError):
+        provider.upload('failed', local_path=str(big_file))
+    assert provider.aborted == ['failed']
+    assert not provider.exists('failed')
+
+
+class FailingBlobService:
+    """Stands in for an azure BlockBlobService, recording every call and failing it."""
+
+    def __init__(self):
+        self.calls = []
+
+    def put_block(self, container, blob_name, block, block_id):
+        self.calls.append('put_block ' + block_id)
+        raise ConnectionError()
+
+    def create_blob_from_path(self, container, blob_name, file_path, **kwargs):
+        self.calls.append('create_blob_from_path ' + blob_name)
+        raise ConnectionError()
+
+
+def test_azure_upload_retries(tmpdir):
+    provider = release.storage.azure.AzureBlockBlobStorageProvider(
+        'account', 'a2V5', 'container', 'https://example.com/', part_size=10, part_concurrency=1)
+    provider.blob_service = FailingBlobService()
+    big_file = tmpdir.join('big')
+    big_file.write_binary(os.urandom(20))
+    small_file = tmpdir.join('small')
+    small_file.write_binary(os.urandom(10))
+
+    # Only each part is retried, the multipart upload as a whole isn't started over. Parts which
+    # haven't started when one fails are cancelled.
+    with pytest.raises(ConnectionError):
+        provider.upload('big', local_path=str(big_file))
+    assert provider.blob_service.calls[:3] == ['put_block 00000001'] * 3
+    assert provider.blob_service.calls[3:] in ([], ['put_block 00000002'] * 3)
+
+    # Uploads in one go are retried as a whole.
+    provider.blob_service.calls = []
+    with pytest.raises(ConnectionError):
+        provider.upload('small', local_path=str(small_file))
+    assert provider.blob_service.calls == ['create_blob_from_path small'] * 5
+
+
+def test_deduplicate_provider_storage_commands(tmpdir):
+    package = tmpdir.join('package.tar.xz')
+    package.write('package contents')
+    providers = {
+        'deduplicated': LocalStorageProvider(str(tmpdir.mkdir('deduplicated'))),
+        'plain': LocalStorageProvider(str(tmpdir.mkdir('plain')))}
+    manifest_paths = {'deduplicated': 'content-manifest.json'}
+
+    def apply(stage1, stage2=[]):
+        provider_storage_commands = release.deduplicate_provider_storage_commands(
+            providers, {name: {'stage1': stage1, 'stage2': stage2} for name in providers}, manifest_paths)
+        release.apply_provider_storage_commands(providers, provider_storage_commands)
+        return {name: [command['method'] for command in commands['stage1']]
+                for name, commands in provider_storage_commands.items()}
+
+    # Reproducible uploads get recorded, and repeats within the run copy the first.
+    assert apply([
+        make_storage_command('upload', True, destination_path='r1/package.tar.xz', local_path=str(package)),
+        make_storage_command('upload', True, destination_path='r1/same.tar.xz', blob=b'package contents')],
+        [make_storage_command('upload', destination_path='channel/version', blob=b'1', no_cache=True)]) == {
+            'deduplicated': ['upload', 'copy'],
+            'plain': ['upload', 'upload']}
+    manifest = json.loads(providers['deduplicated'].fetch('content-manifest.json').decode())
+    assert [entry['path'] for entry in manifest.values()] == ['r1/package.tar.xz']
+    assert not providers['plain'].exists('content-manifest.json')
+
+    # Later runs copy content the storage already has, unless it was uploaded with other metadata.
+    assert apply([
+        make_storage_command('upload', True, destination_path='r2/package.tar.xz', local_path=str(package)),
+        make_storage_command('upload', destination_path='r2/no_cache', blob=b'package contents', no_cache=True)]) == {
+            'deduplicated': ['copy', 'upload'],
+            'plain': ['upload', 'upload']}
+    for name, provider in providers.items():
+        assert provider.fetch('r2/package.tar.xz') == b'package contents'
+
+    # Entries whose content was removed from the storage since are dropped.
+    providers['deduplicated'].remove_recursive('r1/package.tar.xz')
+    assert apply([
+        make_storage_command('upload', True, destination_path='r3/package.tar.xz', local_path=str(package))]) == {
+            'deduplicated': ['upload'],
+            'plain': ['upload']}
+    manifest = json.loads(providers['deduplicated'].fetch('content-manifest.json').decode())
+    assert [entry['path'] for entry in manifest.values()] == ['r3/package.tar.xz']
+
+
+def test_promotion_plan(tmpdir):
+    metadata = {
+        'repository_path': 'testing',
+        'reproducible_artifact_path': 'testing/pull/1/commit/sha-1',
+        'core_artifacts': [
+            {'reproducible_path': 'packages/a/a--1.tar.xz'},
+            {'reproducible_path': 'packages/b/b--1.tar.xz'},
+            {'reproducible_path': 'bootstrap/id.bootstrap.tar.xz'},
+            {'channel_path': 'bootstrap.latest'}]}
+    providers = {
+        'one': CountingStorageProvider(str(tmpdir.mkdir('one'))),
+        'two': CountingStorageProvider(str(tmpdir.mkdir('two')))}
+    for artifact in metadata['core_artifacts']:
+        providers['one'].upload(release.core_artifact_source_path(metadata, artifact), blob=b'')
+    providers['two'].upload('testing/packages/a/a--1.tar.xz', blob=b'')
+    providers['two'].upload('testing/pull/1/commit/sha-1/bootstrap.latest', blob=b'')
+
+    plan = release.PromotionPlan(metadata, providers, {'bootstrap/id.bootstrap.tar.xz'})
+    assert plan.missing == {
+        'one': set(),
+        'two': {'testing/packages/b/b--1.tar.xz', 'testing/bootstrap/id.bootstrap.tar.xz'}}
+    # Needed locally to make channel artifacts or to upload to 'two'. packages/a is copied server side.
+    assert plan.downloads == {'packages/b/b--1.tar.xz', 'bootstrap/id.bootstrap.tar.xz'}
+
+    for artifact in metadata['core_artifacts']:
+        artifact['local_copy_from'] = release.core_artifact_source_path(metadata, artifact)
+        artifact['local_path'] = 'packages/cache/' + artifact.get('reproducible_path', artifact.get('channel_path'))
+    assert plan.provider_metadata(metadata, 'one') is metadata
+    two_metadata = plan.provider_metadata(metadata, 'two')
+    assert [('local_copy_from' in artifact) for artifact in two_metadata['core_artifacts']] == [
+        True, False, False, True]
+    assert all('local_copy_from' in artifact for artifact in metadata['core_artifacts'])
+
+    # 'one' copies everything server side, 'two' gets what it's missing uploaded from the downloads.
+    metadata['channel_artifacts'] = []
+    repository = release.Repository('stable', None, 'commit/sha-1')
+    with tmpdir.as_cwd():
+        for path in plan.downloads:
+            make_directory(os.path.dirname('packages/cache/' + path))
+            write_string('packages/cache/' + path, 'downloaded')
+        release.apply_provider_storage_commands(
+            providers, {name: repository.make_commands(plan.provider_metadata(metadata, name)) for name in providers})
+    assert providers['one'].fetch('stable/packages/b/b--1.tar.xz') == b''
+    assert providers['two'].fetch('stable/packages/b/b--1.tar.xz') == b'downloaded'
+    assert providers['two'].fetch('stable/packages/a/a--1.tar.xz') == b''
+
+
+def test_promotion_plan_provider_calls(tmpdir):
+    packages = ['p{0}/p{0}--1.tar.xz'.format(i) for i in range(50)]
+    metadata = {
+        'repository_path': 'testing',
+        'reproducible_artifact_path': 'testing/pull/1/commit/sha-1',
+        'core_artifacts': [{'reproducible_path': 'packages/' + package} for package in packages] + [
+            {'reproducible_path': 'bootstrap/id.bootstrap.tar.xz'},
+            {'reproducible_path': 'bootstrap/id.active.json'},
+            {'reproducible_path': 'package_lists/id.package_list.json'},
+            {'channel_path': 'bootstrap.latest'},
+            {'channel_path': 'complete.latest.json'}]}
+    providers = {
+        'one': CountingStorageProvider(str(tmpdir.mkdir('one'))),
+        'two': CountingStorageProvider(str(tmpdir.mkdir('two')))}
+    for artifact in metadata['core_artifacts']:
+        providers['one'].upload(release.core_artifact_source_path(metadata, artifact), blob=b'')
+    providers['two'].upload('testing/packages/' + packages[0], blob=b'')
+
+    plan = release.PromotionPlan(metadata, providers, set())
+    assert plan.missing['one'] == set()
+    assert len(plan.missing['two']) == len(metadata['core_artifacts']) - 1
+
+    # A listing per kind of artifact, however many packages there are, and no existence checks.
+    for provider in providers.values():
+        assert sorted(provider.list_calls) == [
+            'testing/bootstrap', 'testing/package_lists', 'testing/packages', 'testing/pull/1/commit/sha-1']
+        assert provider.exists_calls == []
+
+
+def test_get_local_artifact_paths():
+    metadata = {
+        'complete_dict': {None: {'bootstrap': 'bootstrap_id', 'packages': ['a--b']}},
+        'all_completes': {
+            None: {'bootstrap': 'bootstrap_id', 'packages': ['a--b']},
+            'installer': {'bootstrap': 'installer_bootstrap_id', 'packages': ['c--d']}}}
+    assert release.get_local_artifact_paths(metadata, ['aws', 'azure']) == set()
+    assert release.get_local_artifact_paths(metadata, ['aws', 'azure', 'bash']) == {
+        'bootstrap/bootstrap_id.bootstrap.tar.xz',
+        'bootstrap/bootstrap_id.active.json',
+        'bootstrap/installer_bootstrap_id.bootstrap.tar.xz',
+        'packages/a/a--b.tar.xz'}
+
+
 copy_make_commands_result = {'stage1': [
     {
         'if_not_exists': True,
@@ -547,6 +988,44 @@ def test_make_stable_artifacts(monkeypatch, tmpdir):
         release.make_stable_artifacts("http://test", [None])
 
 
+def test_release_index(monkeypatch, tmpdir):
+    monkeypatch.setattr("release.do_build_packages", mock_do_build_packages)
+    monkeypatch.setattr("gen.build_deploy.util.dcos_image_commit", "commit_sha1")
+    loads = []
+    load_json = pkgpanda.util.load_json
+
+    def counting_load_json(filename):
+        loads.append(filename)
+        return load_json(filename)
+
+    monkeypatch.setattr("pkgpanda.util.load_json", counting_load_json)
+
+    with tmpdir.as_cwd():
+        index = release.build_release_index("http://test", [None])
+        assert release.make_stable_metadata(index) == stable_artifacts_metadata
+        assert index.active_packages('installer_bootstrap_id') == ['c--d', 'e--f']
+
+        # Each bootstrap's active.json is loaded once however often it's needed.
+        assert sorted(loads) == [
+            'packages/cache/bootstrap/bootstrap_id.active.json',
+            'packages/cache/bootstrap/downstream_installer_bootstrap_id.active.json',
+            'packages/cache/bootstrap/installer_bootstrap_id.active.json']
+
+        # Package artifacts are handed out as copies which can be modified independently.
+        artifact = index.package_artifact('a--b')
+        artifact['local_copy_from'] = 'somewhere'
+        assert index.package_artifact('a--b') == release.get_package_artifact('a--b')
+
+        assert index.complete_dict.keys() == {None}
+        assert index.variant_arguments('https://example.com/r_path', 'aws') == {
+            None: {
+                'bootstrap_url': 'https://example.com/r_path',
+                'provider': 'aws',
+                'bootstrap_id': 'bootstrap_id',
+                'bootstrap_variant': '',
+                'package_ids': '["a--b", "c--d"]'}}
+
+
 # NOTE: Implicitly tests all gen.build_deploy do_create functions since it calls them.
 # TODO(cmaloney): Test make_channel_artifacts, module do_create functions
 def mock_make_installer_docker(variant, bootstrap_id, installer_bootstrap_id):